@@ -0,0 +1,12 @@
+"""
+TIFlash benchmark suite
+
+Times tiflash against a synthetic CCS installation (see synthetic.py) using a
+fake DSS script launcher, so no CCS installation or device is needed. Run
+from the repo root with:
+
+    python -m benchmarks
+
+Results are compared against a stored baseline (baseline.json).
+
+"""
@@ -0,0 +1,81 @@
+"""
+Runs the TIFlash benchmarks (python -m benchmarks -h for usage)
+
+"""
+
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+from benchmarks import suite
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+        description="Times tiflash against a synthetic CCS installation and "
+                    "compares the times against the stored baseline")
+    parser.add_argument('names', nargs='*', metavar='benchmark',
+                        help="Benchmarks to run (default: all of %s)"
+                        % ", ".join(suite.BENCHMARKS.keys()))
+    parser.add_argument('-n', '--devices', type=int, default=500,
+                        help="Number of device xmls in TargetDB")
+    parser.add_argument('--connections', type=int, default=50,
+                        help="Number of connection xmls in TargetDB")
+    parser.add_argument('--cpus', type=int, default=20,
+                        help="Number of cpu xmls in TargetDB")
+    parser.add_argument('-r', '--repeat', type=int,
+                        default=suite.DEFAULT_REPEAT,
+                        help="Number of times to run each benchmark")
+    parser.add_argument('--threshold', type=float,
+                        default=suite.DEFAULT_THRESHOLD,
+                        help="Allowed slowdown as fraction of baseline time")
+    parser.add_argument('--baseline', default=suite.BASELINE_PATH,
+                        help="Baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store results as the new baseline")
+    parser.add_argument('--json', action='store_true',
+                        help="Print results as JSON")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs benchmarks; exits with 1 if any time regressed"""
+    args = parse_args(argv)
+    root = tempfile.mkdtemp(prefix="tiflash_bench_")
+
+    try:
+        env = suite.make_env(root, devices=args.devices,
+                             connections=args.connections, cpus=args.cpus)
+        results = suite.run(env, repeat=args.repeat, names=args.names)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.save_baseline:
+        suite.save_baseline(env, results, path=args.baseline)
+        baseline = None
+    else:
+        baseline = suite.load_baseline(args.baseline)
+        if baseline is not None and baseline['params'] != env['params']:
+            sys.stderr.write("Baseline was run with %s; not comparing\n"
+                             % baseline['params'])
+            baseline = None
+
+    rows = suite.compare(results, baseline, threshold=args.threshold)
+
+    if args.json:
+        print(json.dumps({'params': env['params'], 'results': results},
+                         indent=2))
+    else:
+        print(suite.format_rows(rows))
+
+    if any(row[-1] for row in rows):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
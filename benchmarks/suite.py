@@ -0,0 +1,280 @@
+"""
+TIFlash benchmarks and baseline comparison
+
+Each benchmark is run 'repeat' times in the same process. The first run is
+cold (empty ~/.tiflash caches, nothing loaded yet); the median of the
+remaining runs is the warm time. Both are compared against the baseline.
+
+"""
+
+import os
+import sys
+import json
+import timeit
+import subprocess
+import platform
+from collections import OrderedDict
+
+from benchmarks import synthetic
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "baseline.json")
+DEFAULT_REPEAT = 10
+DEFAULT_THRESHOLD = 1.0     # allowed slowdown (fraction of baseline time)
+MIN_DELTA = 0.02            # slowdowns below this (seconds) are noise
+DSS_TIMEOUT = 30
+MEMORY_READ_BYTES = 0x4000
+DETECTED_DEVICES = 16       # boards 'connected' for detect_devices
+IMAGE_BYTES = 0x200000      # size of the ELF parsed by image_load
+
+
+class BenchmarkError(Exception):
+    """Generic Benchmark Error"""
+    pass
+
+
+def bench_find_ccs(env):
+    from tiflash.utils import ccs
+    ccs.find_ccs(ccs_prefix=env['prefix'])
+
+
+def bench_get_devicetypes(env):
+    from tiflash.core import api
+    api.get_devicetypes(ccs=env['ccs_path'])
+
+
+def bench_handle_ccxml(env):
+    from tiflash.core import api
+    api.__handle_ccxml(env['ccs_path'], serno=synthetic.get_serno(0),
+                       devicetype=synthetic.get_device_name(0),
+                       connection=synthetic.XDS110_CONNECTION)
+
+
+def bench_detect_devices(env):
+    from tiflash.core import api
+    found = api.detect_devices(ccs=env['ccs_path'])
+    if len(found) != DETECTED_DEVICES:
+        raise BenchmarkError("detect_devices found %d of %d boards"
+                             % (len(found), DETECTED_DEVICES))
+
+
+def bench_memory_read(env):
+    env['flash'].memory_read(0, num_bytes=MEMORY_READ_BYTES)
+
+
+def bench_image_load(env):
+    from tiflash import image
+    with image.load(env['image']) as img:
+        if img.size != IMAGE_BYTES:
+            raise BenchmarkError("image_load parsed %d of %d bytes"
+                                 % (img.size, IMAGE_BYTES))
+
+
+def bench_cli_startup(env):
+    # Trivial command; catches imports creeping back into CLI startup
+    import tiflash
+    package_dir = os.path.dirname(os.path.dirname(tiflash.__file__))
+    cli_env = dict(os.environ)
+    cli_env['PYTHONPATH'] = os.pathsep.join(
+        [package_dir] + [p for p in [cli_env.get('PYTHONPATH')] if p])
+
+    subprocess.check_output([sys.executable, "-m", "tiflash.core",
+                             "--version"], env=cli_env)
+
+
+def bench_call_dss(env):
+    from tiflash.utils import dss
+    retcode, result = dss.call_dss(env['launcher'],
+                                   dss.format_args({'list': {'devices': True}}),
+                                   timeout=DSS_TIMEOUT)
+    if not retcode:
+        raise BenchmarkError("call_dss failed: %s" % result)
+
+
+# name: function running one iteration (in the order they are run)
+BENCHMARKS = OrderedDict([
+    ('find_ccs', bench_find_ccs),
+    ('get_devicetypes', bench_get_devicetypes),
+    ('handle_ccxml', bench_handle_ccxml),
+    ('detect_devices', bench_detect_devices),
+    ('memory_read', bench_memory_read),
+    ('image_load', bench_image_load),
+    ('cli_startup', bench_cli_startup),
+    ('call_dss', bench_call_dss),
+])
+
+
+def make_env(root, devices=500, connections=50, cpus=20):
+    """Generates a synthetic CCS installation and points tiflash's home
+    directory (~/.tiflash caches, ccxml folder) at root.
+
+    Must be called before tiflash is used in this process.
+
+    Args:
+        root (str): empty directory to build the benchmark environment in
+        devices (int): number of device xmls in TargetDB
+        connections (int): number of connection xmls in TargetDB
+        cpus (int): number of cpu xmls in TargetDB
+
+    Returns:
+        dict: benchmark environment
+    """
+    home = os.path.join(root, "home")
+    os.makedirs(home)
+    os.environ['HOME'] = home
+    os.environ['USERPROFILE'] = home
+
+    ccs_path = synthetic.make_ccs(root, devices=devices,
+                                  connections=connections, cpus=cpus)
+    image_path = os.path.join(root, "image.out")
+    synthetic.make_elf(image_path, IMAGE_BYTES)
+
+    return {
+        'prefix': os.path.abspath(root),
+        'ccs_path': ccs_path,
+        'image': image_path,
+        'launcher': synthetic.get_launcher_path(ccs_path),
+        'params': {'devices': devices, 'connections': connections,
+                   'cpus': cpus},
+    }
+
+
+def run(env, repeat=DEFAULT_REPEAT, names=None):
+    """Runs the benchmarks
+
+    Args:
+        env (dict): benchmark environment (see make_env)
+        repeat (int): number of times to run each benchmark (at least 2)
+        names (list, optional): only run these benchmarks
+
+    Returns:
+        OrderedDict: {name: {'first': seconds, 'median': seconds}}
+    """
+    from tiflash.core.core import TIFlash
+    from tiflash.utils import ccxml
+    from tiflash.utils import detect
+
+    if repeat < 2:
+        raise BenchmarkError("Benchmarks must be repeated at least twice")
+
+    names = names or list(BENCHMARKS.keys())
+    unknown = [name for name in names if name not in BENCHMARKS.keys()]
+    if unknown:
+        raise BenchmarkError("Unknown benchmarks: %s" % ", ".join(unknown))
+
+    # Session for memory_read (the fake launcher ignores the ccxml's content)
+    ccxml_path = os.path.join(ccxml.get_ccxml_directory(), "benchmark.ccxml")
+    ccxml.generate_ccxml(ccxml_path, synthetic.XDS110_CONNECTION,
+                         synthetic.get_device_name(0), env['ccs_path'])
+    env['flash'] = TIFlash(env['ccs_path'])
+    env['flash'].set_session(ccxml_path, "fake")
+    env['flash'].set_timeout(DSS_TIMEOUT)
+
+    # Boards 'connected' to the machine (no hardware is enumerated)
+    detected = [synthetic.XDS110_VIDPID + (synthetic.get_serno(i),)
+                for i in range(DETECTED_DEVICES)]
+    detect_devices = detect.detect_devices
+    detect.detect_devices = lambda: list(detected)
+
+    results = OrderedDict()
+    try:
+        for name in BENCHMARKS.keys():
+            if name not in names:
+                continue
+
+            times = list()
+            for i in range(repeat):
+                start = timeit.default_timer()
+                BENCHMARKS[name](env)
+                times.append(timeit.default_timer() - start)
+
+            results[name] = {'first': times[0],
+                             'median': __median(times[1:])}
+    finally:
+        detect.detect_devices = detect_devices
+
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Returns the stored baseline or None if there is none
+
+    Returns:
+        dict or None: {'params': dict, 'platform': str, 'results': dict}
+    """
+    if not os.path.isfile(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(env, results, path=BASELINE_PATH):
+    """Stores results as the baseline"""
+    baseline = {
+        'params': env['params'],
+        'platform': "%s python %s" % (platform.system(),
+                                      platform.python_version()),
+        'results': results,
+    }
+
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD,
+            min_delta=MIN_DELTA):
+    """Compares results against a baseline
+
+    A time regressed if it is more than 'threshold' (fraction) and more than
+    'min_delta' seconds slower than the baseline time.
+
+    Args:
+        results (dict): results returned by run()
+        baseline (dict): baseline returned by load_baseline()
+        threshold (float): allowed slowdown as fraction of baseline time
+        min_delta (float): allowed slowdown in seconds
+
+    Returns:
+        list: rows of (name, 'first' or 'median', seconds, baseline seconds
+        or None, regressed (bool))
+    """
+    base_results = baseline['results'] if baseline else dict()
+    rows = list()
+
+    for name in results.keys():
+        for key in ('first', 'median'):
+            value = results[name][key]
+            base = base_results.get(name, dict()).get(key)
+            regressed = base is not None and \
+                value - base > max(base * threshold, min_delta)
+            rows.append((name, key, value, base, regressed))
+
+    return rows
+
+
+def format_rows(rows):
+    """Returns comparison rows as a printable table"""
+    lines = ["%-18s %-7s %10s %10s %8s" % ("benchmark", "run", "time (ms)",
+                                           "base (ms)", "ratio")]
+    for name, key, value, base, regressed in rows:
+        if base is None:
+            base_str, ratio_str = "-", "-"
+        else:
+            base_str = "%.2f" % (base * 1000)
+            ratio_str = "%.2f" % (value / base) if base > 0 else "-"
+        lines.append("%-18s %-7s %10.2f %10s %8s%s" % (
+            name, key, value * 1000, base_str, ratio_str,
+            "  REGRESSED" if regressed else ""))
+
+    return "\n".join(lines)
+
+
+def __median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
@@ -0,0 +1,213 @@
+"""
+helper module for generating a synthetic CCS installation
+
+The installation has everything tiflash reads from a real one: an
+eclipse/ccs.properties file, a TargetDB with the given number of devices,
+connections and cpus, board_ids.json and debug_probes.json files and a fake
+DSS script launcher (tests/resources/fakeccs/eclipse/ccstudio) that posts
+results the same way js/result.js does.
+
+"""
+
+import os
+import json
+import stat
+import struct
+import shutil
+import platform
+
+CCS_VERSION = "9.0.1.00004"
+FAKE_LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, "tests", "resources", "fakeccs",
+                             "eclipse", "ccstudio")
+
+TARGETDB_PATH = "ccs_base/common/targetdb"
+TARGET_DETECTION_PATH = "ccs_base/cloudagent/src/targetDetection"
+
+# Connection every synthetic device can be generated with (its vid/pid is
+# also in tiflash/utils/debug_probes.json)
+XDS110_CONNECTION = "Texas Instruments XDS110 USB Debug Probe"
+XDS110_XML = "TIXDS110_Connection"
+XDS110_VIDPID = (0x0451, 0xbef3)
+
+CCS_PROPERTIES = """ccs_buildid=%s
+PF_FILTERS=%s
+"""
+
+DEVICE_XML = """<?xml version="1.0"?>
+<device id="%(id)s" partnum="%(name)s" HW_revision="1" XML_version="1.2">
+  <router isa="ICEPICK_C" id="IcePick_C_0">
+    <subpath id="subpath_0">
+      <cpu id="%(cpu_id)s_0" isa="CORTEX_M3" desc="%(cpu_name)s">
+        <instance href="cpus/%(cpu_id)s.xml" id="%(cpu_id)s" xml="%(cpu_id)s.xml" xmlpath="cpus"/>
+      </cpu>
+    </subpath>
+  </router>
+</device>
+"""
+
+CONNECTION_XML = """<?xml version="1.0"?>
+<connection id="%(name)s" class="%(id)s">
+  <property Type="choicelist" Value="0" Name="Debug Probe Selection" ID="SEPK.POD_PORT">
+    <choice Name="Only one probe installed" value="0"/>
+    <choice Name="Select by serial number" value="0">
+      <property Type="stringfield" Value="" Name="-- Enter the serial number" ID="SEPK.POD_SERIAL"/>
+    </choice>
+  </property>
+  <drivers id="drivers" isa="ICEPICK_C">
+    <instance XML_version="1.2" href="drivers/tixds510icepick_c.xml" id="drivers" xml="tixds510icepick_c.xml" xmlpath="drivers"/>
+  </drivers>
+  <drivers id="drivers" isa="Cortex_M3">
+    <instance XML_version="1.2" href="drivers/tixds510cortexM.xml" id="drivers" xml="tixds510cortexM.xml" xmlpath="drivers"/>
+  </drivers>
+</connection>
+"""
+
+CPU_XML = """<?xml version="1.0"?>
+<cpu id="%(id)s" desc="%(name)s" isa="CORTEX_M3" XML_version="1.2"/>
+"""
+
+
+class SyntheticCCSError(Exception):
+    """Generic Synthetic CCS Error"""
+    pass
+
+
+def get_device_name(i):
+    """Returns the devicetype of the i-th synthetic device"""
+    return "DEV%04dF128" % i
+
+
+def get_serno(i):
+    """Returns a serial number that board_ids.json maps to the i-th
+    synthetic device"""
+    return "L%04dXYZ" % i
+
+
+def get_launcher_path(ccs_path):
+    """Returns full path to the fake DSS script launcher of a synthetic
+    installation
+
+    Args:
+        ccs_path (str): full path to synthetic ccs installation
+
+    Returns:
+        str: full path to eclipse/ccstudio (OS specific)
+    """
+    system = platform.system()
+
+    if system == "Linux":
+        launcher = "eclipse/ccstudio"
+    elif system == "Darwin":
+        launcher = "eclipse/Ccstudio.app/Contents/MacOS/ccstudio"
+    else:   # The fake launcher is a python script (no eclipsec.exe)
+        raise SyntheticCCSError("Unsupported Operating System: %s" % system)
+
+    return os.path.normpath(os.path.join(ccs_path, launcher))
+
+
+def write_elf32(path, segments):
+    """Writes a minimal little endian ELF32 file with a PT_LOAD program
+    header per (paddr, data) segment"""
+    phoff = 52
+    data_offset = phoff + 32 * len(segments)
+    header = b"\x7fELF" + bytes(bytearray([1, 1, 1])) + b"\x00" * 9
+    header += struct.pack("<HHIIIIIHHHHHH", 2, 40, 1, 0, phoff, 0, 0, 52, 32,
+                          len(segments), 40, 0, 0)
+    phdrs = b""
+    offset = data_offset
+    for paddr, data in segments:
+        phdrs += struct.pack("<IIIIIIII", 1, offset, paddr, paddr,
+                             len(data), len(data), 5, 4)
+        offset += len(data)
+
+    with open(path, 'wb') as f:
+        f.write(header + phdrs)
+        for paddr, data in segments:
+            f.write(data)
+
+
+def make_elf(path, size, segments=4, address=0x0):
+    """Generates a little endian ELF32 image loading 'size' bytes in
+    'segments' adjacent PT_LOAD segments starting at 'address'"""
+    segment_size = size // segments
+    data = bytes(bytearray(i & 0xFF for i in range(segment_size)))
+
+    write_elf32(path, [(address + i * segment_size, data)
+                       for i in range(segments)])
+
+
+def make_ccs(root, devices=500, connections=50, cpus=20):
+    """Generates a synthetic CCS installation
+
+    Args:
+        root (str): directory to create installation in (ccs root is
+            root/ccs)
+        devices (int): number of device xmls
+        connections (int): number of connection xmls (plus the XDS110
+            connection all devices can use)
+        cpus (int): number of cpu xmls
+
+    Returns:
+        str: full path to ccs root of installation
+    """
+    if cpus < 1:
+        raise SyntheticCCSError("Synthetic installation needs at least 1 cpu")
+
+    ccs_path = os.path.abspath(os.path.join(root, "ccs"))
+    if os.path.exists(ccs_path):
+        shutil.rmtree(ccs_path)
+
+    targetdb = os.path.join(ccs_path, TARGETDB_PATH)
+    for kind in ("devices", "connections", "cpus", "drivers"):
+        os.makedirs(os.path.join(targetdb, kind))
+    os.makedirs(os.path.join(ccs_path, TARGET_DETECTION_PATH))
+
+    # eclipse/ccs.properties and the fake script launcher
+    launcher_path = get_launcher_path(ccs_path)
+    os.makedirs(os.path.dirname(launcher_path))
+    __write(os.path.join(ccs_path, "eclipse", "ccs.properties"),
+            CCS_PROPERTIES % (CCS_VERSION, "CC13xx,CC26xx,CC32xx"))
+    shutil.copy(FAKE_LAUNCHER, launcher_path)
+    os.chmod(launcher_path, os.stat(launcher_path).st_mode | stat.S_IEXEC)
+
+    # TargetDB
+    for i in range(cpus):
+        __write(os.path.join(targetdb, "cpus", "cpu%03d.xml" % i),
+                CPU_XML % {'id': "cpu%03d" % i, 'name': "CPU%03d" % i})
+
+    for i in range(devices):
+        __write(os.path.join(targetdb, "devices", "dev%04d.xml" % i),
+                DEVICE_XML % {'id': "dev%04d" % i, 'name': get_device_name(i),
+                              'cpu_id': "cpu%03d" % (i % cpus),
+                              'cpu_name': "CPU%03d" % (i % cpus)})
+
+    __write(os.path.join(targetdb, "connections", XDS110_XML + ".xml"),
+            CONNECTION_XML % {'id': "TIXDS110", 'name': XDS110_CONNECTION})
+    for i in range(connections):
+        __write(os.path.join(targetdb, "connections", "conn%03d.xml" % i),
+                CONNECTION_XML % {'id': "CONN%03d" % i,
+                                  'name': "Synthetic Debug Probe %03d" % i})
+
+    # board_ids.json (serno prefix: device xml)
+    board_ids = dict(("L%04d" % i, {'deviceXml': "dev%04d" % i})
+                     for i in range(devices))
+    __write(os.path.join(ccs_path, TARGET_DETECTION_PATH, "board_ids.json"),
+            json.dumps(board_ids, indent=1))
+
+    # debug_probes.json (vid/pid: connection xml)
+    debug_probes = [{'vid': "%04x" % XDS110_VIDPID[0],
+                     'pid': "%04x" % XDS110_VIDPID[1],
+                     'connectionXml': XDS110_XML}]
+    debug_probes.extend({'vid': "1cbe", 'pid': "%04x" % i,
+                         'connectionXml': "conn%03d" % i}
+                        for i in range(connections))
+    __write(os.path.join(ccs_path, TARGET_DETECTION_PATH, "debug_probes.json"),
+            json.dumps(debug_probes, indent=1))
+
+    return ccs_path
+
+
+def __write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
@@ -40,7 +40,7 @@ setup(  name='tiflash',
         install_requires=[
             'pyserial>=3.4;platform_system != "Windows"'
         ],
-        packages=find_packages(),
+        packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
         cmdclass = { 'install' : CustomInstallCommand },
         python_requires=">=2.7.13, <4",
         entry_points = {
@@ -0,0 +1,56 @@
+import os
+import sys
+import subprocess
+import pytest
+
+import tiflash
+
+# Modules that only specific commands should import
+HEAVY_MODULES = ["tiflash.core.api", "tiflash.core.core", "tiflash.utils.dss",
+                 "tiflash.utils.detect", "tiflash.farm", "serial",
+                 "xml.etree.ElementTree", "xml.dom.minidom"]
+
+
+def run_python(*args):
+    """Runs python with tiflash importable; returns its output"""
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(tiflash.__file__))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [package_dir] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    output = subprocess.check_output([sys.executable] + list(args), env=env)
+
+    return output.decode("utf-8")
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="lazy imports need module __getattr__")
+class TestCLIStartup():
+    def test_import_is_lazy(self, tenv):
+        script = ("import sys, tiflash; "
+                  "print(','.join(m for m in %r if m in sys.modules))"
+                  % HEAVY_MODULES)
+
+        output = run_python("-c", script)
+
+        assert output.strip() == ""
+
+    def test_version_is_lazy(self, tenv):
+        script = ("import sys\n"
+                  "sys.argv = ['tiflash', '--version']\n"
+                  "from tiflash.core.__main__ import main\n"
+                  "try:\n"
+                  "    main()\n"
+                  "except SystemExit:\n"
+                  "    pass\n"
+                  "print('loaded:' + ','.join(m for m in %r if m in sys.modules))"
+                  % HEAVY_MODULES)
+
+        output = run_python("-c", script)
+
+        assert output.strip().split("\n")[-1] == "loaded:"
+
+    def test_api_available(self, tenv):
+        output = run_python("-c", "import tiflash; print(tiflash.flash)")
+
+        assert "function flash" in output
@@ -31,3 +31,17 @@ def test_env_setup(request, tenv):
         shutil.rmtree(tenv["paths"]["tmp"])
 
     request.addfinalizer(teardown)
+
+
+@pytest.fixture
+def fake_flash(tenv):
+    """Fixture for a TIFlash object using the fake CCS installation
+    (tests/resources/fakeccs); no CCS installation or device needed"""
+    from tiflash.core.core import TIFlash
+
+    flash = TIFlash(tenv['paths']['resources'] + "/fakeccs")
+    flash.set_session(tenv['paths']['resources'] +
+                      "/general/cc3220sf.ccxml", "fake")
+    flash.set_timeout(10)
+
+    return flash
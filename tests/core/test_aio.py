@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import threading
+import pytest
+
+if sys.version_info < (3, 6):
+    pytest.skip("tiflash.aio needs Python 3.6+", allow_module_level=True)
+
+import asyncio
+
+import tiflash
+from tiflash import aio
+from tiflash.utils import dss
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def fake_dss(tenv):
+    return os.path.normpath(tenv['paths']['resources'] +
+                            "/fakeccs/eclipse/ccstudio")
+
+
+def get_pids(marker):
+    """Returns pids of processes with marker in their command line"""
+    pids = list()
+    for pid in os.listdir("/proc"):
+        try:
+            with open("/proc/%s/cmdline" % pid, 'rb') as f:
+                if marker.encode() in f.read():
+                    pids.append(pid)
+        except (IOError, OSError):
+            pass
+
+    return pids
+
+
+class TestAio():
+    """Tests tiflash.aio using the fake CCS installation; no CCS
+    installation needed"""
+
+    def test_call_dss(self, loop, fake_dss):
+        cmds = dss.format_args({'list': {'devices': True}})
+
+        result = loop.run_until_complete(aio.call_dss(fake_dss, cmds,
+                                                      timeout=10))
+
+        assert result == (True, "fake0;;fake1;;fake2")
+
+    def test_call_dss_concurrent(self, loop, fake_dss):
+        calls = [aio.call_dss(fake_dss, ['--fail'] if i % 2 else
+                              dss.format_args({'list': {'devices': True}}),
+                              timeout=10) for i in range(16)]
+
+        results = loop.run_until_complete(asyncio.gather(*calls))
+
+        for i, result in enumerate(results):
+            if i % 2:
+                assert result == (False, "Fake failure")
+            else:
+                assert result == (True, "fake0;;fake1;;fake2")
+
+    def test_run(self, loop, fake_flash):
+        result = loop.run_until_complete(aio.run(fake_flash.memory_read,
+                                                 16, num_bytes=3))
+
+        assert result == [18, 17, 16]
+
+    def test_run_error(self, loop, fake_flash):
+        with pytest.raises(tiflash.TIFlashError):
+            loop.run_until_complete(aio.run(fake_flash.register_read,
+                                            "INVALID"))
+
+    def test_run_max_workers(self, loop):
+        running = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def work(i):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.05)
+            with lock:
+                running['now'] -= 1
+            return i
+
+        aio.set_max_workers(2)
+        try:
+            results = loop.run_until_complete(asyncio.gather(
+                *[aio.run(work, i) for i in range(6)]))
+        finally:
+            aio.set_max_workers(aio.AIO_DEFAULT_WORKERS)
+
+        assert results == list(range(6))
+        assert running['max'] <= 2
+
+    def test_set_max_workers_invalid(self):
+        with pytest.raises(aio.AIOError):
+            aio.set_max_workers(0)
+
+    @pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+    def test_cancel_kills_dss(self, loop, fake_dss, tenv):
+        # The fake launcher serves forever in server mode
+        workspace = tenv['paths']['tmp'] + "/aio_cancel_ws"
+        cmds = dss.format_args({'server': {'maxsessions': 1,
+                                           'idletimeout': 60}})
+        task = loop.create_task(aio.call_dss(fake_dss, cmds,
+                                             workspace=workspace))
+
+        loop.run_until_complete(asyncio.sleep(1))
+        assert len(get_pids(workspace)) > 0
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            loop.run_until_complete(task)
+
+        deadline = time.time() + 5
+        while get_pids(workspace) and time.time() < deadline:
+            time.sleep(0.1)
+        assert get_pids(workspace) == []
+
+    def test_api_functions(self):
+        for name in aio.API_FUNCTIONS:
+            assert asyncio.iscoroutinefunction(getattr(aio, name))
+            assert getattr(aio, name).__name__ == name
@@ -43,3 +43,224 @@ class TestFlashApi():
             result = tiflash.flash(tdev['hex-image'], binary=True, serno=tdev['serno'],
                                 connection=tdev['connection'],
                                 devicetype=tdev['devicetype'])
+
+
+@pytest.fixture(scope="function")
+def flash_runs(fake_flash, tenv, monkeypatch):
+    """Isolates the flash state store and counts DSS calls"""
+    from tiflash.utils import flash_state
+    from tiflash.utils import dss
+
+    store = flash_state.FlashStateStore(tenv['paths']['tmp'] +
+                                        "/flash_state.json")
+    monkeypatch.setattr(flash_state, "__store", store)
+
+    calls = list()
+    call_dss = dss.call_dss
+
+    def counting_call_dss(dss_path, commands, *args, **kwargs):
+        calls.append(list(commands))
+        return call_dss(dss_path, commands, *args, **kwargs)
+
+    monkeypatch.setattr(dss, "call_dss", counting_call_dss)
+
+    return calls
+
+
+@pytest.fixture(scope="function")
+def image(tenv):
+    """Binary image matching what the fake CCS reads at address 0x10"""
+    path = tenv['paths']['tmp'] + "/app.bin"
+    with open(path, 'wb') as f:
+        f.write(bytearray([(0x10 + i) & 0xFF for i in range(128)]))
+
+    return path
+
+
+class TestSkipIfSame():
+    """Tests skip_if_same flashing using the fake CCS installation"""
+
+    def test_skip_if_same(self, fake_flash, flash_runs, image):
+        assert fake_flash.flash(image, binary=True, address=0x10,
+                                skip_if_same=True) is True
+        assert len(flash_runs) == 1
+
+        assert fake_flash.flash(image, binary=True, address=0x10,
+                                skip_if_same=True) is True
+        assert len(flash_runs) == 1
+
+    def test_changed_image(self, fake_flash, flash_runs, image):
+        fake_flash.flash(image, binary=True, skip_if_same=True)
+        with open(image, 'ab') as f:
+            f.write(b"\x00")
+
+        fake_flash.flash(image, binary=True, skip_if_same=True)
+
+        assert len(flash_runs) == 2
+
+    def test_erase_forgets_image(self, fake_flash, flash_runs, image):
+        fake_flash.flash(image, binary=True, skip_if_same=True)
+        fake_flash.erase()
+
+        fake_flash.flash(image, binary=True, skip_if_same=True)
+
+        assert len(flash_runs) == 3
+
+    def test_confirm_same(self, fake_flash, flash_runs, image):
+        fake_flash.flash(image, binary=True, address=0x10)
+
+        fake_flash.flash(image, binary=True, address=0x10, skip_if_same=True,
+                         confirm_same=True)
+
+        # Read back matched; only the memory read was run
+        assert len(flash_runs) == 2
+        assert "--memory" in flash_runs[1]
+
+    def test_confirm_same_mismatch(self, fake_flash, flash_runs, image):
+        fake_flash.flash(image, binary=True, address=0x20)
+
+        fake_flash.flash(image, binary=True, address=0x20, skip_if_same=True,
+                         confirm_same=True)
+
+        assert len(flash_runs) == 3
+        assert "--flash" in flash_runs[2]
+
+
+class TestMultiImageFlash():
+    """Tests flashing several images at once using the fake CCS
+    installation"""
+
+    def test_flash_images(self, fake_flash, flash_runs, image, tenv):
+        app = tenv['paths']['tmp'] + "/app.out"
+        with open(app, 'wb') as f:
+            f.write(b"\x00" * 16)
+
+        result = fake_flash.flash([app, {'image': image, 'binary': True,
+                                         'address': 0x3F000}])
+
+        # All images are flashed with one DSS call
+        assert result is True
+        assert len(flash_runs) == 1
+        assert "-images" in flash_runs[0]
+
+    def test_flash_images_skip_if_same(self, fake_flash, flash_runs, image):
+        images = [image, {'image': image, 'address': 0x1000}]
+
+        fake_flash.flash(images, binary=True, skip_if_same=True)
+        fake_flash.flash(images, binary=True, skip_if_same=True)
+        fake_flash.flash(images[:1], binary=True, skip_if_same=True)
+
+        assert len(flash_runs) == 2
+
+    def test_flash_missing_image(self, fake_flash, flash_runs, image):
+        with pytest.raises(tiflash.TIFlashError):
+            fake_flash.flash([image, image + ".missing"])
+
+        assert len(flash_runs) == 0
+
+    def test_flash_empty_image(self, fake_flash, flash_runs, tenv):
+        empty = tenv['paths']['tmp'] + "/empty.bin"
+        open(empty, 'wb').close()
+
+        with pytest.raises(tiflash.TIFlashError):
+            fake_flash.flash(empty, binary=True)
+
+        assert len(flash_runs) == 0
+
+
+class TestDeltaFlash():
+    """Tests delta flashing using the fake CCS installation (memory reads
+    return (address + i) & 0xFF)"""
+
+    @pytest.fixture(scope="function")
+    def delta_image(self, tenv):
+        """Binary image (at 0x1000) matching the fake CCS memory except for
+        one byte in the sector at 0x2000"""
+        path = tenv['paths']['tmp'] + "/delta.bin"
+        data = bytearray([(0x1000 + i) & 0xFF for i in range(0x3000)])
+        data[0x1005] ^= 0xFF
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        return path
+
+    @pytest.fixture(scope="function")
+    def flashed_memory(self, fake_flash, flash_runs, delta_image, monkeypatch):
+        """Memory reads return the delta image once it has been flashed (the
+        fake CCS does not keep what is written)"""
+        with open(delta_image, 'rb') as f:
+            data = f.read()
+        memory_read = fake_flash.memory_read
+
+        def read(address, num_bytes=1, page=0, raw=False):
+            if any("--flash" in run for run in flash_runs):
+                return data[address - 0x1000:address - 0x1000 + num_bytes]
+            return memory_read(address, num_bytes, page=page, raw=raw)
+
+        monkeypatch.setattr(fake_flash, "memory_read", read)
+
+    def test_delta_flash(self, fake_flash, flash_runs, delta_image,
+                         flashed_memory):
+        result = fake_flash.flash(delta_image, binary=True, address=0x1000,
+                                  delta=True, sector_size=0x1000)
+
+        # One bulk read, the device's erase option is looked up, then only
+        # the differing sector is flashed (erasing only that sector)
+        assert result is True
+        assert len(flash_runs) == 3
+        assert "--memory" in flash_runs[0]
+        assert "--getoption" in flash_runs[1]
+        assert "-binary" in flash_runs[2]
+        assert flash_runs[2][flash_runs[2].index("-address") + 1] == "0x2000"
+        assert "Necessary Sectors Only" in flash_runs[2]
+        assert "setoption" not in fake_flash.args
+
+    def test_delta_flash_same(self, fake_flash, flash_runs, image):
+        assert fake_flash.flash(image, binary=True, address=0x10,
+                                delta=True) is True
+
+        assert len(flash_runs) == 1
+        assert "--memory" in flash_runs[0]
+
+    def test_delta_flash_full_erase(self, fake_flash, flash_runs,
+                                    delta_image):
+        # Loader erases the whole flash; delta would lose the other sectors
+        opts = {"FlashEraseSetting": "All Unprotected Sectors"}
+        assert fake_flash.flash(delta_image, binary=True, address=0x1000,
+                                options=opts, delta=True) is True
+
+        assert len(flash_runs) == 1
+        assert "--memory" not in flash_runs[0]
+        assert delta_image in flash_runs[0]
+
+    def test_delta_flash_erase_option_set(self, fake_flash, flash_runs,
+                                          delta_image, flashed_memory):
+        opts = {"FlashEraseSetting": "Necessary Sectors Only"}
+        assert fake_flash.flash(delta_image, binary=True, address=0x1000,
+                                options=opts, delta=True) is True
+
+        assert len(flash_runs) == 2     # no option lookup
+        assert "-binary" in flash_runs[1]
+
+    def test_delta_flash_not_verified(self, fake_flash, flash_runs,
+                                      delta_image):
+        # Fake CCS memory still differs after flashing the sector (as if
+        # the loader had erased everything); image is flashed in full
+        assert fake_flash.flash(delta_image, binary=True, address=0x1000,
+                                delta=True, sector_size=0x1000) is True
+
+        assert len(flash_runs) == 5
+        assert flash_runs[2][flash_runs[2].index("-address") + 1] == "0x2000"
+        assert "--memory" in flash_runs[3]
+        assert delta_image in flash_runs[4]
+
+    def test_delta_flash_crc_expr(self, fake_flash, flash_runs, delta_image):
+        # The fake CCS evaluates every expression to its pid (never the CRC)
+        fake_flash.flash(delta_image, binary=True, address=0x1000,
+                         delta=True, sector_size=0x1000,
+                         crc_expr="crc32({address}, {size})")
+
+        assert "--pipeline" in flash_runs[0]
+        assert "-images" not in flash_runs[2]   # sectors merged into one run
+        assert flash_runs[2][flash_runs[2].index("-address") + 1] == "0x1000"
+        assert "--pipeline" in flash_runs[3]    # checked with crc_expr too
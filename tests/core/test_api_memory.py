@@ -1,3 +1,4 @@
+import array
 import pytest
 
 import tiflash
@@ -52,6 +53,29 @@ class TestMemoryApi():
                         devicetype=tdev['devicetype'])
 
 
+    def test_raw_memory_read(self, tdev):
+        """Tests raw memory read returns same bytes as memory read (in
+        address order)"""
+        result = tiflash.memory_read(tdev['read-address'], 4,
+                            serno=tdev['serno'],
+                            connection=tdev['connection'],
+                            devicetype=tdev['devicetype'])
+        raw_result = tiflash.memory_read(tdev['read-address'], 4, raw=True,
+                            serno=tdev['serno'],
+                            connection=tdev['connection'],
+                            devicetype=tdev['devicetype'])
+
+        assert list(bytearray(raw_result)) == list(reversed(result))
+
+    def test_raw_memory_write(self, tdev):
+        """Tests memory write of a bytes-like object"""
+        WRITE_DATA = bytearray([0x11, 0x22, 0x33])
+        tiflash.memory_write(tdev['write-address'], WRITE_DATA,
+                        serno=tdev['serno'],
+                        connection=tdev['connection'],
+                        devicetype=tdev['devicetype'])
+
+
     def test_invalid_address_memory_read(self, tdev):
         """Tests an Error is raised when trying to access invalid memory for
         memory read"""
@@ -76,3 +100,78 @@ class TestMemoryApi():
                             serno=tdev['serno'],
                             connection=tdev['connection'],
                             devicetype=tdev['devicetype'])
+
+
+class TestMemoryRaw():
+    """Tests binary memory transfers using the fake CCS installation"""
+
+    def test_raw_memory_read(self, fake_flash):
+        result = fake_flash.memory_read(16, 3, raw=True)
+
+        assert result == b"\x10\x11\x12"
+
+    def test_large_raw_memory_read(self, fake_flash):
+        result = fake_flash.memory_read(0, 256 * 1024, raw=True)
+
+        assert len(result) == 256 * 1024
+        assert bytearray(result[:4]) == bytearray([0, 1, 2, 3])
+
+    @pytest.mark.parametrize("data", [
+        b"\x11\x22\x33",
+        bytearray([0x11, 0x22, 0x33]),
+        memoryview(b"\x11\x22\x33"),
+        array.array('B', [0x11, 0x22, 0x33]),
+    ])
+    def test_raw_memory_write(self, fake_flash, data):
+        fake_flash.memory_write(0x20000000, data)
+
+    def test_memory_write_list(self, fake_flash):
+        fake_flash.memory_write(0x20000000, [0x11, 0x22, 0x33])
+
+
+class TestMemoryDump():
+    """Tests memory dumps using the fake CCS installation"""
+
+    def test_memory_dump(self, fake_flash, tenv):
+        out_path = tenv['paths']['tmp'] + "/dump.bin"
+
+        result = fake_flash.memory_dump(0x100, 1000, out_path, chunk_size=64)
+
+        assert result == 1000
+        with open(out_path, 'rb') as f:
+            data = bytearray(f.read())
+        assert data == bytearray([i & 0xFF for i in range(0x100, 0x100 + 1000)])
+
+    def test_memory_dump_progress(self, fake_flash, tenv):
+        out_path = tenv['paths']['tmp'] + "/dump.bin"
+        updates = list()
+
+        fake_flash.memory_dump(0, 1000, out_path, chunk_size=100,
+                               progress=lambda done, total:
+                                   updates.append((done, total)))
+
+        assert updates == sorted(updates)
+        assert updates[-1] == (1000, 1000)
+        assert all(total == 1000 for done, total in updates)
+
+    def test_memory_dump_resume(self, fake_flash, tenv):
+        out_path = tenv['paths']['tmp'] + "/dump.bin"
+        with open(out_path, 'wb') as f:
+            f.write(bytearray(range(100)))
+
+        result = fake_flash.memory_dump(0, 256, out_path, chunk_size=64,
+                                        resume=True)
+
+        assert result == 156
+        with open(out_path, 'rb') as f:
+            assert bytearray(f.read()) == bytearray(range(256))
+
+    def test_memory_dump_overwrites(self, fake_flash, tenv):
+        out_path = tenv['paths']['tmp'] + "/dump.bin"
+        with open(out_path, 'wb') as f:
+            f.write(b"old dump")
+
+        fake_flash.memory_dump(0, 4, out_path)
+
+        with open(out_path, 'rb') as f:
+            assert bytearray(f.read()) == bytearray([0, 1, 2, 3])
@@ -0,0 +1,94 @@
+import os
+import pytest
+
+import tiflash
+from tiflash.core.core import BATCH_SKIPPED_MSG
+
+
+class TestPipelineApi():
+
+    def test_basic_pipeline(self, tdev):
+        """Tests erase, flash, verify and reset in a single pipeline"""
+        assert tdev['hex-image'] is not None
+        steps = ['erase',
+                 ('flash', {'image': tdev['hex-image']}),
+                 ('verify', {'image': tdev['hex-image']}),
+                 'reset']
+
+        result = tiflash.pipeline(steps, serno=tdev['serno'],
+                            connection=tdev['connection'],
+                            devicetype=tdev['devicetype'])
+
+        assert [r['op'] for r in result] == ['erase', 'flash', 'verify',
+                                             'reset']
+        assert all(r['success'] for r in result)
+
+    def test_pipeline_memory_read(self, tdev):
+        """Tests memory read results are returned for each step"""
+        steps = [('memory_read', {'address': tdev['read-address'],
+                                  'num_bytes': 4}),
+                 ('memory_read', {'address': tdev['read-address'],
+                                  'num_bytes': 1})]
+
+        result = tiflash.pipeline(steps, serno=tdev['serno'],
+                            connection=tdev['connection'],
+                            devicetype=tdev['devicetype'])
+
+        assert len(result[0]['result']) == 4
+        assert len(result[1]['result']) == 1
+
+    def test_pipeline_stops_on_failure(self, tdev):
+        """Tests steps after a failing step are not run"""
+        steps = [('register_read', {'regname': 'INVALIDREGNAME'}), 'reset']
+
+        result = tiflash.pipeline(steps, serno=tdev['serno'],
+                            connection=tdev['connection'],
+                            devicetype=tdev['devicetype'])
+
+        assert result[0]['success'] is False
+        assert result[0]['error']
+        assert result[1]['success'] is False
+        assert result[1]['error'] == BATCH_SKIPPED_MSG
+
+
+class TestBatch():
+    """Tests TIFlash.batch using the fake CCS installation
+    (tests/resources/fakeccs); no CCS installation needed"""
+
+    def test_batch(self, fake_flash):
+        steps = ['reset',
+                 ('memory_read', {'address': 16, 'num_bytes': 3}),
+                 {'op': 'register_read', 'regname': 'PC'}]
+
+        result = fake_flash.batch(steps)
+
+        assert result[0] == {'op': 'reset', 'success': True, 'result': True,
+                             'error': None}
+        # memory read results are reversed (same as TIFlash.memory_read)
+        assert result[1]['result'] == [18, 17, 16]
+        assert result[2]['result'] == 1
+
+    def test_batch_single_process(self, fake_flash):
+        # fake launcher evaluates expressions to its pid
+        steps = [('evaluate', {'expr': 'x'}), ('evaluate', {'expr': 'y'})]
+
+        result = fake_flash.batch(steps)
+
+        assert result[0]['success'] is True
+        assert result[0]['result'] == result[1]['result']
+
+    def test_batch_stops_on_failure(self, fake_flash):
+        steps = ['erase', ('register_read', {'regname': 'INVALID'}), 'reset']
+
+        result = fake_flash.batch(steps)
+
+        assert [r['success'] for r in result] == [True, False, False]
+        assert result[1]['error'] == "Fake invalid register"
+        assert result[2]['error'] == BATCH_SKIPPED_MSG
+
+    def test_batch_invalid_step(self, fake_flash):
+        with pytest.raises(tiflash.TIFlashError):
+            fake_flash.batch(['unknown'])
+
+        with pytest.raises(tiflash.TIFlashError):
+            fake_flash.batch([('flash', {'bad_arg': 'x'})])
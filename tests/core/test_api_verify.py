@@ -61,3 +61,82 @@ class TestVerifyApi():
             result = tiflash.verify(tdev['hex-image'], binary=True, serno=tdev['serno'],
                                 connection=tdev['connection'],
                                 devicetype=tdev['devicetype'])
+
+
+@pytest.fixture(scope="function")
+def dss_calls(monkeypatch):
+    """Records the commands of each DSS call"""
+    from tiflash.utils import dss
+
+    calls = list()
+    call_dss = dss.call_dss
+
+    def recording_call_dss(dss_path, commands, *args, **kwargs):
+        calls.append(list(commands))
+        return call_dss(dss_path, commands, *args, **kwargs)
+
+    monkeypatch.setattr(dss, "call_dss", recording_call_dss)
+
+    return calls
+
+
+@pytest.fixture(scope="function")
+def image(tenv):
+    """Binary image matching what the fake CCS reads at address 0x100 except
+    for the byte at 0x150"""
+    path = tenv['paths']['tmp'] + "/verify.bin"
+    data = bytearray([(0x100 + i) & 0xFF for i in range(0x80)])
+    data[0x50] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    return path
+
+
+class TestFastVerify():
+    """Tests python-side verify using the fake CCS installation (memory reads
+    return (address + i) & 0xFF)"""
+
+    def test_binary_verify_args(self, fake_flash, dss_calls, image):
+        fake_flash.verify(image, binary=True, address=0x100)
+
+        assert "-binary" in dss_calls[0]
+        assert "-address" in dss_calls[0]
+
+    def test_fast_verify(self, fake_flash, dss_calls, image):
+        results = fake_flash.verify_segments(image, binary=True,
+                                             address=0x100)
+
+        assert results == [{'address': 0x100, 'size': 0x80,
+                            'success': False, 'mismatch': 0x150}]
+        assert len(dss_calls) == 1
+
+        with pytest.raises(tiflash.TIFlashError) as e:
+            fake_flash.verify(image, binary=True, address=0x100, fast=True)
+        assert "0x150" in str(e.value)
+
+    def test_fast_verify_match(self, fake_flash, image):
+        with open(image, 'wb') as f:
+            f.write(bytearray([(0x100 + i) & 0xFF for i in range(0x80)]))
+
+        assert fake_flash.verify(image, binary=True, address=0x100,
+                                 fast=True) is True
+        assert fake_flash.verify(image, binary=True, address=0x100,
+                                 checksum_only=True) is True
+
+    def test_checksum_only(self, fake_flash, dss_calls, image):
+        results = fake_flash.verify_segments(image, binary=True,
+                                             address=0x100,
+                                             checksum_only=True)
+
+        assert results[0]['success'] is False
+        assert results[0]['mismatch'] is None
+
+    def test_crc_expr(self, fake_flash, dss_calls, image):
+        # The fake CCS evaluates every expression to its pid (never the CRC)
+        results = fake_flash.verify_segments(
+            image, binary=True, address=0x100,
+            crc_expr="crc32({address}, {size})")
+
+        assert results[0]['success'] is False
+        assert "--pipeline" in dss_calls[0]
@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+
+from tiflash import farm
+
+
+class TestFarmApi():
+
+    def test_basic_farm_flash(self, tdev):
+        """Tests flashing each device in devices.cfg through the farm"""
+        assert tdev['hex-image'] is not None
+        board = {'serno': tdev['serno'], 'connection': tdev['connection'],
+                 'devicetype': tdev['devicetype']}
+
+        result = farm.flash(tdev['hex-image'], [board])
+
+        assert result == [{'board': tdev['serno'], 'success': True,
+                           'result': True, 'error': None}]
+
+
+class TestFarmRun():
+    """Tests farm.run with a stand-in function; no boards needed"""
+
+    def test_run_results_in_board_order(self):
+        boards = ["S%d" % i for i in range(10)]
+
+        result = farm.run(lambda serno, value: (serno, value), boards,
+                          workers=4, value=1)
+
+        assert [r['board'] for r in result] == boards
+        assert [r['result'] for r in result] == [(b, 1) for b in boards]
+        assert all(r['success'] for r in result)
+
+    def test_run_failure_does_not_stop_others(self):
+        def func(serno):
+            if serno == "BAD":
+                raise Exception("flash failed")
+            return True
+
+        result = farm.run(func, ["S0", "BAD", "S1"], workers=2)
+
+        assert [r['success'] for r in result] == [True, False, True]
+        assert result[1]['error'] == "flash failed"
+
+    def test_run_is_concurrent(self):
+        barrier = {'count': 0, 'event': threading.Event()}
+        lock = threading.Lock()
+
+        def func(serno):
+            with lock:
+                barrier['count'] += 1
+                if barrier['count'] == 3:
+                    barrier['event'].set()
+            # Only returns True if all boards are running at the same time
+            return barrier['event'].wait(5)
+
+        result = farm.run(func, ["S0", "S1", "S2"], workers=3)
+
+        assert all(r['result'] for r in result)
+
+    def test_run_same_probe_not_concurrent(self):
+        running = {'S0': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def func(serno, ccxml=None):
+            with lock:
+                running['S0'] += 1
+                running['max'] = max(running['max'], running['S0'])
+            time.sleep(0.05)
+            with lock:
+                running['S0'] -= 1
+            return True
+
+        farm.run(func, [{'serno': 'S0'}, {'serno': 'S0', 'ccxml': 'a.ccxml'},
+                        'S0'], workers=3)
+
+        assert running['max'] == 1
+
+    def test_run_ccxml_board(self):
+        result = farm.run(lambda ccxml: ccxml, ["/tmp/board.ccxml"])
+
+        assert result[0]['result'] == "/tmp/board.ccxml"
+
+    def test_run_no_boards(self):
+        with pytest.raises(farm.FarmError):
+            farm.run(lambda serno: True, [])
+
+    def test_run_invalid_board(self):
+        with pytest.raises(farm.FarmError):
+            farm.run(lambda serno: True, [{'devicetype': 'CC1310F128'}])
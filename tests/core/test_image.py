@@ -0,0 +1,129 @@
+import os
+import pytest
+
+from tiflash import image
+from imagehelpers import write_elf32
+
+
+def hex_record(address, record_type, data):
+    record = bytearray([len(data), (address >> 8) & 0xFF, address & 0xFF,
+                        record_type]) + bytearray(data)
+    record.append((-sum(record)) & 0xFF)
+    return ":" + "".join("%02X" % b for b in record) + "\n"
+
+
+@pytest.fixture(scope="function")
+def paths(tenv):
+    root = tenv['paths']['tmp']
+    paths = {
+        'elf': os.path.join(root, "image.out"),
+        'hex': os.path.join(root, "image.hex"),
+        'txt': os.path.join(root, "image.txt"),
+        'bin': os.path.join(root, "image.bin"),
+    }
+
+    yield paths
+
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class TestImage():
+    def test_load_elf(self, paths):
+        write_elf32(paths['elf'], [(0x1000, b""), (0x2000, b"\xAA" * 100),
+                                   (0x20000000, b"\x55" * 8)])
+
+        with image.load(paths['elf']) as img:
+            assert img.format == image.FORMAT_ELF
+            assert img.segments() == [(0x2000, 100), (0x20000000, 8)]
+            assert img.size == 108
+            assert img.get_data(1) == b"\x55" * 8
+
+    def test_load_large_elf(self, paths):
+        data = bytearray(range(256)) * (0x200000 // 256)
+        write_elf32(paths['elf'], [(0x0, bytes(data))])
+
+        with image.load(paths['elf']) as img:
+            assert img.segments() == [(0x0, 0x200000)]
+            assert img.read(0x1FFFF0, 16) == data[-16:]
+
+    def test_load_hex(self, paths):
+        with open(paths['hex'], 'w') as f:
+            f.write(hex_record(0, image.HEX_EXT_LINEAR_ADDR, b"\x00\x01"))
+            f.write(hex_record(0x0000, image.HEX_DATA, b"\x01\x02\x03\x04"))
+            f.write(hex_record(0x0004, image.HEX_DATA, b"\x05\x06"))
+            f.write(hex_record(0x0100, image.HEX_DATA, b"\xFF"))
+            f.write(hex_record(0, image.HEX_EOF, b""))
+
+        with image.load(paths['hex']) as img:
+            assert img.format == image.FORMAT_HEX
+            assert img.segments() == [(0x10000, 6), (0x10100, 1)]
+            assert img.get_data(0) == b"\x01\x02\x03\x04\x05\x06"
+
+    def test_load_hex_bad_checksum(self, paths):
+        with open(paths['hex'], 'w') as f:
+            f.write(":0400000001020304F0\n")
+
+        with pytest.raises(image.ImageError):
+            image.load(paths['hex'])
+
+    def test_load_titxt(self, paths):
+        with open(paths['txt'], 'w') as f:
+            f.write("@8000\n01 02 03 04\n05 06\n@FFFE\n00 80\nq\n")
+
+        with image.load(paths['txt']) as img:
+            assert img.format == image.FORMAT_TITXT
+            assert img.segments() == [(0x8000, 6), (0xFFFE, 2)]
+            assert img.get_data(1) == b"\x00\x80"
+
+    def test_load_hex_titxt_crlf(self, paths):
+        # Files span several pages of the mmap and use windows line endings
+        data = bytearray(range(256)) * 64
+        with open(paths['hex'], 'wb') as f:
+            for offset in range(0, len(data), 16):
+                f.write(hex_record(offset, image.HEX_DATA,
+                                   data[offset:offset + 16]).encode("ascii")
+                        .replace(b"\n", b"\r\n"))
+            f.write(b":00000001FF\r\n")
+        with open(paths['txt'], 'wb') as f:
+            f.write(b"@0\r\n")
+            for offset in range(0, len(data), 16):
+                f.write(b" ".join(b"%02X" % b for b in data[offset:offset + 16])
+                        + b"\r\n")
+            f.write(b"q\r\n")
+
+        for path in (paths['hex'], paths['txt']):
+            with image.load(path) as img:
+                assert img.segments() == [(0x0, len(data))]
+                assert img.read(0x3FF0, 16) == data[-16:]
+
+    def test_load_binary(self, paths):
+        with open(paths['bin'], 'wb') as f:
+            f.write(bytearray(range(200)))
+
+        with image.load(paths['bin'], binary=True, address="0x4000") as img:
+            assert img.format == image.FORMAT_BINARY
+            assert img.segments() == [(0x4000, 200)]
+            assert img.read(0x4010, 4) == bytearray([16, 17, 18, 19])
+            assert img.read(0x40C0, 16) is None
+
+    def test_load_unsupported(self, paths):
+        with open(paths['bin'], 'wb') as f:
+            f.write(b"\xc2\x00\x00\x00")
+
+        with pytest.raises(image.ImageError):
+            image.load(paths['bin'])
+
+    def test_ranges_and_fits(self, paths):
+        write_elf32(paths['elf'], [(0x0, b"\x00" * 0x100),
+                                   (0x100, b"\x00" * 0x100),
+                                   (0x20000000, b"\x00" * 0x10)])
+
+        with image.load(paths['elf']) as img:
+            assert img.get_ranges() == [(0x0, 0x200),
+                                        (0x20000000, 0x20000010)]
+            assert img.fits([(0x0, 0x1000), (0x20000000, 0x1000)])
+            assert not img.fits([(0x0, 0x1000)])
+            assert img.get_outside([(0x0, 0x180)]) == \
+                [(0x180, 0x200), (0x20000000, 0x20000010)]
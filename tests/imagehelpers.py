@@ -0,0 +1,21 @@
+"""Helper functions for writing test images"""
+import struct
+
+
+def write_elf32(path, segments):
+    """Writes a minimal little endian ELF32 file with a PT_LOAD program
+    header per (paddr, data) segment"""
+    phoff = 52
+    data_offset = phoff + 32 * len(segments)
+    header = b"\x7fELF" + bytes(bytearray([1, 1, 1])) + b"\x00" * 9
+    header += struct.pack("<HHIIIIIHHHHHH", 2, 40, 1, 0, phoff, 0, 0, 52, 32,
+                          len(segments), 40, 0, 0)
+    phdrs = b""
+    content = b""
+    for paddr, data in segments:
+        phdrs += struct.pack("<IIIIIIII", 1, data_offset + len(content),
+                             paddr, paddr, len(data), len(data), 5, 4)
+        content += data
+
+    with open(path, 'wb') as f:
+        f.write(header + phdrs + content)
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import shutil
+import pytest
+
+from tiflash.utils import board_ids
+
+
+def write_json(path, content):
+    with open(path, 'w') as f:
+        json.dump(content, f)
+
+
+@pytest.fixture(scope="function")
+def board_ids_files(tenv):
+    """Creates a default and a custom board_ids.json file"""
+    root = os.path.join(tenv['paths']['tmp'], "board_ids")
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+
+    default = os.path.join(root, "board_ids.json")
+    custom = os.path.join(root, "custom_board_ids.json")
+    write_json(default, {
+        "L1": {"deviceXml": "cc1310f128"},
+        "L10": {"deviceXml": "cc1350f128"},
+        "L100": {"deviceXml": "cc2640r2f"},
+        "M4": {"deviceXml": "msp432p401r"},
+    })
+
+    yield {'default': default, 'custom': custom}
+
+    shutil.rmtree(root)
+
+
+class TestBoardIdsIndex():
+    @pytest.mark.parametrize("serno,expected", [
+        ("L1900ABC", "cc1310f128"),
+        ("L1020ABC", "cc1350f128"),
+        ("L1000ABC", "cc2640r2f"),
+        ("M4321ABC", "msp432p401r"),
+    ])
+    def test_lookup_longest_prefix(self, board_ids_files, serno, expected):
+        index = board_ids.BoardIdsIndex([board_ids_files['default']])
+
+        result = index.lookup(serno)
+
+        assert result['deviceXml'] == expected
+
+    def test_lookup_unknown(self, board_ids_files):
+        index = board_ids.BoardIdsIndex([board_ids_files['default']])
+
+        assert index.lookup("X0000000") is None
+
+    def test_lookup_many(self, board_ids_files):
+        index = board_ids.BoardIdsIndex([board_ids_files['default']])
+
+        result = index.lookup_many(["L1000ABC", "X0000000"])
+
+        assert result["L1000ABC"]['deviceXml'] == "cc2640r2f"
+        assert result["X0000000"] is None
+
+    def test_custom_override(self, board_ids_files):
+        index = board_ids.BoardIdsIndex([board_ids_files['default'],
+                                         board_ids_files['custom']])
+        assert index.lookup("M4321ABC")['deviceXml'] == "msp432p401r"
+
+        write_json(board_ids_files['custom'],
+                   {"M4": {"deviceXml": "msp432e401y"},
+                    "X0": {"deviceXml": "custom_device"}})
+
+        assert index.lookup("M4321ABC")['deviceXml'] == "msp432e401y"
+        assert index.lookup("X0000000")['deviceXml'] == "custom_device"
+
+    def test_reload_on_change(self, board_ids_files):
+        index = board_ids.BoardIdsIndex([board_ids_files['default']])
+        assert index.lookup("X0000000") is None
+
+        write_json(board_ids_files['default'],
+                   {"X0": {"deviceXml": "new_device"}})
+        os.utime(board_ids_files['default'], (0, time.time() + 10))
+
+        assert index.lookup("X0000000")['deviceXml'] == "new_device"
+
+    def test_invalid_file(self, board_ids_files):
+        with open(board_ids_files['custom'], 'w') as f:
+            f.write("{")
+        index = board_ids.BoardIdsIndex([board_ids_files['default'],
+                                         board_ids_files['custom']])
+
+        with pytest.raises(board_ids.BoardIdsError):
+            index.lookup("L1000ABC")
@@ -1,6 +1,9 @@
 import os
+import time
+import shutil
 import pytest
 from tiflash.utils.ccs import FindCCSError, find_ccs, get_workspace_dir, get_ccs_version
+from tiflash.utils.ccs import CCSRegistry
 
 class TestCCS():
     """Test suite for testing ccsfinder unit"""
@@ -66,3 +69,90 @@ class TestCCS():
         os.environ['CCS_PREFIX'] = "/nonexistant/path/to/ccs"
         with pytest.raises(Exception):
             ccs_path = find_ccs()
+
+
+def make_ccs_install(path, version):
+    """Creates a fake (linux) ccs installation"""
+    os.makedirs(path + "/eclipse")
+    os.makedirs(path + "/ccs_base")
+    with open(path + "/eclipse/ccs.properties", 'w') as f:
+        f.write("PF_FILTERS=100,200\nccs_buildid=%s\n" % version)
+    with open(path + "/eclipse/ccstudio", 'w') as f:
+        f.write("")
+
+
+@pytest.fixture(scope="function")
+def ccs_prefix(tenv):
+    """Creates a directory containing two fake ccs installations"""
+    root = os.path.join(tenv['paths']['tmp'], "ccs_registry")
+    prefix = os.path.join(root, "ti")
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    make_ccs_install(prefix + "/ccsv7/ccs", "7.4.0.00015")
+    make_ccs_install(prefix + "/ccsv8/ccs", "8.1.0.00011")
+
+    yield {'prefix': prefix, 'cache': os.path.join(root, "cache")}
+
+    shutil.rmtree(root)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="fake installs use linux layout")
+class TestCCSRegistry():
+    """Test suite for CCS installation registry"""
+
+    def test_get_installations(self, ccs_prefix):
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'])
+
+        result = registry.get_installations(ccs_prefix['prefix'])
+
+        versions = sorted([i['version'] for i in result])
+        assert versions == ["7.4.0.00015", "8.1.0.00011"]
+        assert result[0]['pf_filters'] == ["100", "200"]
+
+    def test_new_installation(self, ccs_prefix):
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'],
+                               revalidate_interval=0)
+        registry.get_installations(ccs_prefix['prefix'])
+
+        make_ccs_install(ccs_prefix['prefix'] + "/ccs900/ccs", "9.0.0.00007")
+        os.utime(ccs_prefix['prefix'], (0, time.time() + 10))
+
+        result = registry.get_installations(ccs_prefix['prefix'])
+
+        assert len(result) == 3
+
+    def test_updated_installation(self, ccs_prefix):
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'],
+                               revalidate_interval=0)
+        root = ccs_prefix['prefix'] + "/ccsv8/ccs"
+        registry.get_installation(root)
+
+        with open(root + "/eclipse/ccs.properties", 'w') as f:
+            f.write("ccs_buildid=8.2.0.00007\n")
+
+        assert registry.get_installation(root)['version'] == "8.2.0.00007"
+
+    def test_saved_registry(self, ccs_prefix):
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'])
+        expected = registry.get_installations(ccs_prefix['prefix'])
+        registry.set_dss_path(ccs_prefix['prefix'] + "/ccsv8/ccs",
+                              ccs_prefix['prefix'] +
+                              "/ccsv8/ccs/eclipse/ccstudio")
+
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'])
+
+        assert registry.get_installations(ccs_prefix['prefix']) == expected
+        assert registry.get_dss_path(ccs_prefix['prefix'] + "/ccsv8/ccs") == \
+            os.path.normpath(ccs_prefix['prefix'] +
+                             "/ccsv8/ccs/eclipse/ccstudio")
+
+    def test_removed_dss_path(self, ccs_prefix):
+        registry = CCSRegistry(cache_dir=ccs_prefix['cache'],
+                               revalidate_interval=0)
+        root = ccs_prefix['prefix'] + "/ccsv8/ccs"
+        registry.set_dss_path(root, root + "/eclipse/ccstudio")
+
+        os.remove(root + "/eclipse/ccstudio")
+
+        assert registry.get_dss_path(root) is None
@@ -1,7 +1,9 @@
 import shutil
 import os
+import pytest
 
 from tiflash.utils import ccxml
+from tiflash.utils import xmlhelper
 
 
 class TestCCXML():
@@ -92,3 +94,87 @@ class TestCCXML():
 
         # Restore CCSTargetConfigurations directory
         os.rename(ccxml_dir_tmp, ccxml_dir)
+
+
+CONNECTION_XML = """<?xml version="1.0"?>
+<connection id="Texas Instruments XDS110 USB Debug Probe" class="TIXDS110">
+  <property Type="choicelist" Value="0" Name="Debug Probe Selection" ID="SEPK.POD_PORT">
+    <choice Name="Only one XDS110 installed" value="0"/>
+    <choice Name="Select by serial number" value="0">
+      <property Type="stringfield" Value="" Name="-- Enter the serial number" ID="SEPK.POD_SERIAL"/>
+    </choice>
+  </property>
+  <drivers id="drivers" isa="TMS320C28XX">
+    <instance XML_version="1.2" href="drivers/tixds510c28x.xml" id="drivers" xml="tixds510c28x.xml" xmlpath="drivers"/>
+  </drivers>
+  <drivers id="drivers" isa="ICEPICK_C">
+    <instance XML_version="1.2" href="drivers/tixds510icepick_c.xml" id="drivers" xml="tixds510icepick_c.xml" xmlpath="drivers"/>
+  </drivers>
+  <drivers id="drivers" isa="Cortex_M3">
+    <instance XML_version="1.2" href="drivers/tixds510cortexM.xml" id="drivers" xml="tixds510cortexM.xml" xmlpath="drivers"/>
+  </drivers>
+</connection>
+"""
+DEVICE_XML = """<?xml version="1.0"?>
+<device id="cc1350f128" partnum="CC1350F128">
+  <router isa="ICEPICK_C" id="IcePick_C_0">
+    <subpath id="subpath_0">
+      <cpu id="Cortex_M3_0" isa="CORTEX_M3">
+        <instance href="cpus/cortex_m3.xml" id="Cortex_M3" xml="cortex_m3.xml" xmlpath="cpus"/>
+      </cpu>
+    </subpath>
+  </router>
+</device>
+"""
+
+
+class TestGenerateCCXML():
+    def setup_targetdb(self, tenv):
+        ccs_path = os.path.join(tenv['paths']['tmp'], "genccxml_ccs")
+        db = ccs_path + "/ccs_base/common/targetdb"
+        if os.path.exists(ccs_path):
+            shutil.rmtree(ccs_path)
+        os.makedirs(db + "/connections")
+        os.makedirs(db + "/devices")
+        with open(db + "/connections/TIXDS110_Connection.xml", 'w') as f:
+            f.write(CONNECTION_XML)
+        with open(db + "/devices/cc1350f128.xml", 'w') as f:
+            f.write(DEVICE_XML)
+
+        return ccs_path
+
+    def test_generate_ccxml(self, tenv):
+        ccs_path = self.setup_targetdb(tenv)
+        ccxml_path = os.path.join(tenv['paths']['tmp'], "GENERATED.ccxml")
+
+        result = ccxml.generate_ccxml(
+            ccxml_path, "Texas Instruments XDS110 USB Debug Probe",
+            "CC1350F128", ccs_path, serno="L1000ABC")
+
+        assert result == ccxml_path
+        assert ccxml.get_devicetype(ccxml_path) == "CC1350F128"
+        assert ccxml.get_connection(ccxml_path) == \
+            "Texas Instruments XDS110 USB Debug Probe"
+        assert ccxml.get_serno(ccxml_path) == "L1000ABC"
+        assert ccxml.get_connection_xml(ccxml_path, ccs_path) == \
+            os.path.normpath(ccs_path + "/ccs_base/common/targetdb/"
+                             "connections/TIXDS110_Connection.xml")
+
+        # Only drivers used by the device are included
+        drivers = [i.attrib['xml'] for i in
+                   xmlhelper.get_xml_root(ccxml_path).findall(
+                       "configuration/connection/instance")]
+        assert drivers == ["tixds510icepick_c.xml", "tixds510cortexM.xml"]
+
+        shutil.rmtree(ccs_path)
+
+    def test_generate_ccxml_unknown_device(self, tenv):
+        ccs_path = self.setup_targetdb(tenv)
+        ccxml_path = os.path.join(tenv['paths']['tmp'], "GENERATED.ccxml")
+
+        with pytest.raises(ccxml.CCXMLError):
+            ccxml.generate_ccxml(
+                ccxml_path, "Texas Instruments XDS110 USB Debug Probe",
+                "CC2640R2F", ccs_path)
+
+        shutil.rmtree(ccs_path)
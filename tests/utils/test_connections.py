@@ -1,4 +1,8 @@
 import os
+import json
+import time
+import shutil
+import pytest
 
 from tiflash.utils import connections
 
@@ -26,3 +30,82 @@ class TestConnections():
         result = connections.get_connection_name(connxml)
 
         assert result == expected
+
+
+@pytest.fixture(scope="function")
+def probes_ccs(tenv, monkeypatch):
+    """Creates a fake ccs installation with a debug_probes.json file"""
+    # Do not use the debug_probes.json file shipped in utils/
+    monkeypatch.setattr(connections, "CUSTOM_DEBUG_PROBES_FILE",
+                        "no_custom_debug_probes.json")
+    ccs_path = os.path.join(tenv['paths']['tmp'], "probes_ccs")
+    if os.path.exists(ccs_path):
+        shutil.rmtree(ccs_path)
+    os.makedirs(ccs_path + connections.CONNECTIONS_DIR)
+    os.makedirs(os.path.dirname(ccs_path + connections.DEBUG_PROBES_PATH))
+
+    with open(ccs_path + connections.CONNECTIONS_DIR +
+              "/TIXDS110_Connection.xml", 'w') as f:
+        f.write("<connection id='Texas Instruments XDS110 USB Debug Probe'/>")
+
+    probes = [
+        {"vid": "0x0451", "pid": "0xbef3",
+         "connectionXml": "TIXDS110_Connection"},
+        {"vid": "0x0451", "pid": "0xbef3",
+         "connectionXml": "SecondEntry_Connection"},
+        {"vid": "0x1cbe", "pid": "0x00fd",
+         "probeDetection": {"algorithm": "TIXDS110_Connection"}},
+        {"vid": "0x0403", "pid": "0xa6d0",
+         "connectionXml": "NotInstalled_Connection"},
+        {"vid": "0x0403", "pid": "0x0000"},
+    ]
+    with open(ccs_path + connections.DEBUG_PROBES_PATH, 'w') as f:
+        json.dump(probes, f)
+
+    yield ccs_path
+
+    shutil.rmtree(ccs_path)
+
+
+class TestVidPidMap():
+    def test_get_vidpid_map(self, probes_ccs):
+        xml = os.path.normpath(probes_ccs + connections.CONNECTIONS_DIR +
+                               "/TIXDS110_Connection.xml")
+
+        result = connections.get_vidpid_map(probes_ccs)
+
+        assert result == {(0x0451, 0xbef3): xml, (0x1cbe, 0x00fd): xml,
+                          (0x0403, 0xa6d0): None}
+
+    def test_get_connection_xml_from_vidpid(self, probes_ccs):
+        expected = os.path.normpath(probes_ccs + connections.CONNECTIONS_DIR +
+                                    "/TIXDS110_Connection.xml")
+
+        result = connections.get_connection_xml_from_vidpid(0x0451, 0xbef3,
+                                                            probes_ccs)
+
+        assert result == expected
+
+    def test_unknown_vidpid(self, probes_ccs):
+        with pytest.raises(connections.ConnectionsError):
+            connections.get_connection_xml_from_vidpid(0x0403, 0x0000,
+                                                       probes_ccs)
+
+    def test_missing_debug_probes(self, probes_ccs):
+        os.remove(probes_ccs + connections.DEBUG_PROBES_PATH)
+
+        with pytest.raises(connections.ConnectionsError):
+            connections.get_vidpid_map(probes_ccs)
+
+    def test_rebuilt_on_change(self, probes_ccs):
+        path = probes_ccs + connections.DEBUG_PROBES_PATH
+        connections.get_vidpid_map(probes_ccs)
+
+        with open(path, 'w') as f:
+            json.dump([{"vid": "0x0001", "pid": "0x0002",
+                        "connectionXml": "TIXDS110_Connection"}], f)
+        os.utime(path, (0, time.time() + 10))
+
+        result = connections.get_vidpid_map(probes_ccs)
+
+        assert list(result.keys()) == [(0x0001, 0x0002)]
@@ -0,0 +1,53 @@
+import pytest
+
+from tiflash.utils import delta
+
+
+class FakeImage(object):
+    """Stand-in for tiflash.image.Image"""
+    def __init__(self, segments):
+        self.addresses = [address for address, data in segments]
+        self.sizes = [len(data) for address, data in segments]
+        self.data = [data for address, data in segments]
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def get_data(self, index):
+        return self.data[index]
+
+
+@pytest.fixture(scope="function")
+def sectors():
+    img = FakeImage([(0x0F00, b"\x01" * 0x200), (0x3000, b"\x02" * 0x10)])
+
+    return delta.get_sectors([img], sector_size=0x1000)
+
+
+class TestDelta():
+    def test_get_sectors(self, sectors):
+        assert sectors == [(0x0000, [(0x0F00, b"\x01" * 0x100)]),
+                           (0x1000, [(0x1000, b"\x01" * 0x100)]),
+                           (0x3000, [(0x3000, b"\x02" * 0x10)])]
+
+    def test_get_sectors_invalid_size(self):
+        with pytest.raises(delta.DeltaError):
+            delta.get_sectors([], sector_size=0)
+
+    def test_get_read_ranges(self, sectors):
+        assert delta.get_read_ranges(sectors) == [(0x0F00, 0x200),
+                                                  (0x3000, 0x10)]
+
+    def test_get_changed_sectors(self, sectors):
+        checksums = {0x0F00: delta.get_checksum(b"\x01" * 0x100),
+                     0x1000: delta.get_checksum(b"\x00" * 0x100)}
+
+        changed = delta.get_changed_sectors(sectors, checksums)
+
+        # 0x3000 has no checksum; treated as differing
+        assert [sector for sector, pieces in changed] == [0x1000, 0x3000]
+
+    def test_get_runs(self, sectors):
+        runs = delta.get_runs(sectors)
+
+        assert runs == [(0x0F00, b"\x01" * 0x200), (0x3000, b"\x02" * 0x10)]
@@ -31,3 +31,121 @@ class TestDSS():
         result = dss.call_dss(dss_path, [], timeout=60)
 
         assert result == expected
+
+
+class TestDSSServer():
+    """Tests DSS round trips using the fake script launcher
+    (tests/resources/fakeccs/eclipse/ccstudio); no CCS installation needed"""
+
+    @pytest.fixture
+    def fake_dss(self, tenv):
+        fake_dss_path = os.path.normpath(tenv['paths']['resources'] +
+                                         "/fakeccs/eclipse/ccstudio")
+        yield fake_dss_path
+        dss.stop_server(fake_dss_path)
+
+    def test_call_dss_without_server(self, fake_dss):
+        cmds = dss.format_args({'list': {'devices': True}})
+
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result == (True, "fake0;;fake1;;fake2")
+
+    def test_call_dss_failure(self, fake_dss):
+        result = dss.call_dss(fake_dss, ['--fail'], timeout=10)
+
+        assert result == (False, "Fake failure")
+
+    def test_start_server(self, fake_dss):
+        port = dss.start_server(fake_dss)
+
+        assert dss.get_server(fake_dss) == port
+        assert dss.start_server(fake_dss) == port
+
+    def test_stop_server(self, fake_dss):
+        dss.start_server(fake_dss)
+
+        assert dss.stop_server(fake_dss) is True
+        assert dss.get_server(fake_dss) is None
+        assert dss.stop_server(fake_dss) is False
+
+    def test_call_dss_uses_server(self, fake_dss):
+        # fake launcher evaluates expressions to its pid
+        cmds = dss.format_args({'evaluate': {'expression': 'x'}})
+        dss.start_server(fake_dss)
+
+        first = dss.call_dss(fake_dss, cmds, timeout=10)
+        second = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert first[0] is True
+        assert first == second
+
+    def test_call_dss_server_result(self, fake_dss):
+        cmds = dss.format_args({'memory': {'read': True, 'address': '16',
+                                           'numBytes': '3'}})
+        dss.start_server(fake_dss)
+
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result == (True, "16;;17;;18")
+
+    def test_call_dss_falls_back_when_server_gone(self, fake_dss):
+        cmds = dss.format_args({'evaluate': {'expression': 'x'}})
+        dss.start_server(fake_dss)
+        server_pid = dss.call_dss(fake_dss, cmds, timeout=10)[1]
+        dss._send_request(dss.get_server(fake_dss), [dss.SHUTDOWN_REQUEST])
+
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result[0] is True
+        assert result[1] != server_pid
+        assert dss.get_server(fake_dss) is None
+
+    def test_server_reuses_session(self, fake_dss):
+        # fake launcher reads registers as the number of connects
+        cmds = dss.format_args({'session': {'ccxml': 'a.ccxml', 'chip': 'c'},
+                                'register': {'read': True, 'regname': 'PC'}})
+        dss.start_server(fake_dss)
+
+        first = dss.call_dss(fake_dss, cmds, timeout=10)
+        second = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert first == (True, "1")
+        assert second == (True, "1")
+
+    def test_server_evicts_lru_session(self, fake_dss):
+        cmds_a = dss.format_args({'session': {'ccxml': 'a.ccxml', 'chip': 'a'},
+                                  'register': {'read': True, 'regname': 'PC'}})
+        cmds_b = dss.format_args({'session': {'ccxml': 'a.ccxml', 'chip': 'b'},
+                                  'register': {'read': True, 'regname': 'PC'}})
+        dss.start_server(fake_dss, max_sessions=1)
+
+        dss.call_dss(fake_dss, cmds_a, timeout=10)
+        dss.call_dss(fake_dss, cmds_b, timeout=10)
+        result = dss.call_dss(fake_dss, cmds_a, timeout=10)
+
+        assert result == (True, "2")
+
+    def test_server_discards_failed_session(self, fake_dss):
+        session = {'ccxml': 'a.ccxml', 'chip': 'a'}
+        cmds = dss.format_args({'session': session,
+                                'register': {'read': True, 'regname': 'PC'}})
+        dss.start_server(fake_dss)
+
+        dss.call_dss(fake_dss, cmds, timeout=10)
+        dss.call_dss(fake_dss, dss.format_args({'session': session,
+                                                'fail': True}), timeout=10)
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result == (True, "2")
+
+    def test_server_splits_args_like_command_line(self, fake_dss):
+        # fake launcher returns the bytes written
+        cmds = dss.format_args({'memory': {'write': True, 'address': '0',
+                                           'data': '1 2 3'}})
+        expected = dss.call_dss(fake_dss, cmds, timeout=10)
+        dss.start_server(fake_dss)
+
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result == expected == (True, "1;;2;;3")
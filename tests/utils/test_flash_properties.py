@@ -0,0 +1,146 @@
+import os
+import shutil
+import pytest
+
+from tiflash.utils import flash_properties
+
+TRANSLATOR_XML = """<?xml version="1.0"?>
+<FlashPropertiesTranslator>
+  <FlashProperties name="CC26xx">
+    <partnum beginsWith="CC26*0"/>
+  </FlashProperties>
+  <FlashProperties name="CC13xx">
+    <partnum regex="F128$"/>
+    <partnum beginsWith="CC13"/>
+  </FlashProperties>
+</FlashPropertiesTranslator>
+"""
+DEVICE_PROPERTIES_XML = """<?xml version="1.0"?>
+<PropertyValues>
+  <property id="FlashEraseSelection">
+    <target>cortex_m3</target>
+    <valueType>ChoiceList</valueType>
+    <values>
+      <value>Entire Flash</value>
+      <value>Necessary Pages Only</value>
+    </values>
+    <defaultValue>Necessary Pages Only</defaultValue>
+  </property>
+  <property id="FlashVerify">
+    <target>cortex_m3</target>
+    <valueType>Boolean</valueType>
+  </property>
+  <property id="FlashEraseButton">
+    <target>cortex_m3</target>
+    <action>Erase</action>
+  </property>
+  <property id="FlashInternal">
+    <target>cortex_m3</target>
+    <valueType>String</valueType>
+    <hidden/>
+  </property>
+</PropertyValues>
+"""
+GENERIC_PROPERTIES_XML = """<?xml version="1.0"?>
+<PropertyValues>
+  <property id="ResetOnRestart">
+    <target>generic</target>
+    <valueType>Boolean</valueType>
+    <defaultValue>false</defaultValue>
+  </property>
+  <property id="OtherTarget">
+    <target>other</target>
+    <valueType>Boolean</valueType>
+  </property>
+</PropertyValues>
+"""
+
+
+@pytest.fixture(scope="function")
+def properties_ccs(tenv):
+    """Creates a fake ccs installation with a propertyDB"""
+    ccs_path = os.path.join(tenv['paths']['tmp'], "properties_ccs")
+    prop_dir = ccs_path + flash_properties.PROPERTIES_DIR
+    if os.path.exists(ccs_path):
+        shutil.rmtree(ccs_path)
+    os.makedirs(prop_dir)
+
+    for name, content in (
+            (flash_properties.FLASH_PROPERTIES_TRANSLATOR, TRANSLATOR_XML),
+            ("CC13xx_FlashProperties.xml", DEVICE_PROPERTIES_XML),
+            ("CC26xx_FlashProperties.xml", DEVICE_PROPERTIES_XML),
+            (flash_properties.PROPERTIESDB_XML, GENERIC_PROPERTIES_XML)):
+        with open(prop_dir + "/" + name, 'w') as f:
+            f.write(content)
+
+    yield {'ccs': ccs_path, 'dir': prop_dir}
+
+    shutil.rmtree(ccs_path)
+
+
+class TestFlashProperties():
+    @pytest.mark.parametrize("devicetype,expected", [
+        ("CC2640R2F", "CC26xx"),
+        ("CC1310F128", "CC13xx"),
+        ("CC1352R1F3", "CC13xx"),
+        ("CC2650F128", "CC26xx"),   # first matching file in translator wins
+    ])
+    def test_get_device_properties_xml(self, properties_ccs, devicetype,
+                                       expected):
+        result = flash_properties.get_device_properties_xml(
+            devicetype, properties_ccs['ccs'])
+
+        assert result == os.path.normpath(
+            properties_ccs['dir'] + "/%s_FlashProperties.xml" % expected)
+
+    def test_untranslatable_devicetype(self, properties_ccs):
+        with pytest.raises(flash_properties.FlashPropertiesError):
+            flash_properties.get_device_properties_xml("MSP432P401R",
+                                                       properties_ccs['ccs'])
+
+    def test_translator_inline_flags(self, tenv):
+        # An inline flag must only apply to its own pattern
+        translator_xml = os.path.join(tenv['paths']['tmp'],
+                                      "flags_translator.xml")
+        with open(translator_xml, 'w') as f:
+            f.write(TRANSLATOR_XML.replace(
+                "</FlashPropertiesTranslator>",
+                '<FlashProperties name="MSP432">'
+                '<partnum regex="(?i)msp432"/></FlashProperties>'
+                "</FlashPropertiesTranslator>"))
+
+        translator = flash_properties._Translator(translator_xml)
+
+        assert translator.translate("msp432p401r") == "MSP432"
+        assert translator.translate("CC1310F64") == "CC13xx"
+        assert translator.translate("cc1310f64") is None
+
+    def test_get_options(self, properties_ccs):
+        xml = properties_ccs['dir'] + "/CC13xx_FlashProperties.xml"
+
+        result = flash_properties.get_options(xml)
+
+        assert result == {
+            'FlashEraseSelection': {
+                'type': "ChoiceList",
+                'choices': ["Entire Flash", "Necessary Pages Only"],
+                'default': "Necessary Pages Only"},
+            'FlashVerify': {'type': "Boolean"},
+        }
+
+    def test_get_options_target(self, properties_ccs):
+        xml = properties_ccs['dir'] + "/" + flash_properties.PROPERTIESDB_XML
+
+        result = flash_properties.get_options(xml, target="generic")
+
+        assert result == {'ResetOnRestart': {'type': "Boolean",
+                                             'default': "false"}}
+
+    def test_get_options_returns_copies(self, properties_ccs):
+        xml = properties_ccs['dir'] + "/CC13xx_FlashProperties.xml"
+
+        flash_properties.get_options(xml)['FlashEraseSelection'][
+            'choices'].append("Modified")
+
+        result = flash_properties.get_options(xml)
+        assert "Modified" not in result['FlashEraseSelection']['choices']
@@ -0,0 +1,91 @@
+import os
+import pytest
+
+from tiflash.utils import flash_state
+from imagehelpers import write_elf32
+
+
+@pytest.fixture(scope="function")
+def images(tenv):
+    root = tenv['paths']['tmp']
+    paths = {
+        'elf': os.path.join(root, "app.out"),
+        'bin': os.path.join(root, "app.bin"),
+        'hex': os.path.join(root, "app.hex"),
+    }
+    write_elf32(paths['elf'], [(0x1000, b"\x00" * 0), (0x2000, b"\xAA" * 100),
+                               (0x20000000, b"\x55" * 8)])
+    with open(paths['bin'], 'wb') as f:
+        f.write(bytearray(range(200)))
+    with open(paths['hex'], 'w') as f:
+        f.write(":00000001FF\n")
+
+    yield paths
+
+    for path in paths.values():
+        os.remove(path)
+
+
+class TestFlashState():
+    def test_get_regions_elf(self, images):
+        result = flash_state.get_regions(images['elf'])
+
+        assert result == [(0x2000, 100), (0x20000000, 8)]
+
+    def test_get_regions_binary(self, images):
+        result = flash_state.get_regions(images['bin'], binary=True,
+                                         address=0x4000)
+
+        assert result == [(0x4000, 200)]
+
+    def test_get_regions_hex(self, images):
+        assert flash_state.get_regions(images['hex']) == []
+
+    def test_get_regions_unknown_format(self, images):
+        with open(images['hex'], 'wb') as f:
+            f.write(b"\xc2\x00\x00\x00")     # COFF
+        assert flash_state.get_regions(images['hex']) == []
+
+    def test_get_check_region(self, images):
+        result = flash_state.get_check_region(images['elf'])
+
+        assert result == (0x2000, b"\xAA" * flash_state.CHECK_BYTES)
+        assert flash_state.get_check_region(images['hex']) is None
+
+    def test_fingerprint(self, images):
+        fingerprint = flash_state.get_fingerprint(images['bin'], binary=True)
+
+        assert fingerprint == flash_state.get_fingerprint(images['bin'],
+                                                          binary=True)
+        assert fingerprint != flash_state.get_fingerprint(
+            images['bin'], binary=True, address=0x4000)
+        assert fingerprint != flash_state.get_fingerprint(
+            images['bin'], binary=True, options={'ResetOnRestart': True})
+
+        with open(images['bin'], 'ab') as f:
+            f.write(b"\x00")
+        assert fingerprint != flash_state.get_fingerprint(images['bin'],
+                                                          binary=True)
+
+    def test_board_key(self):
+        assert flash_state.get_board_key("L400", chip="Cortex_M4_0") == \
+            "serno:L400::Cortex_M4_0"
+        assert flash_state.get_board_key(None, ccxml_path="/a/b.ccxml") == \
+            "ccxml:" + os.path.normpath(os.path.abspath("/a/b.ccxml"))
+
+        with pytest.raises(flash_state.FlashStateError):
+            flash_state.get_board_key(None)
+
+    def test_store(self, tenv):
+        path = os.path.join(tenv['paths']['tmp'], "state", "flash_state.json")
+        store = flash_state.FlashStateStore(path)
+
+        assert store.get("serno:L400") is None
+
+        store.record("serno:L400", "abc", "app.out")
+        record = flash_state.FlashStateStore(path).get("serno:L400")
+        assert record['fingerprint'] == "abc"
+        assert record['image'] == os.path.abspath("app.out")
+
+        store.forget("serno:L400")
+        assert flash_state.FlashStateStore(path).get("serno:L400") is None
@@ -0,0 +1,118 @@
+import socket
+import struct
+import threading
+import time
+
+from tiflash.utils import result
+
+
+def post_frames(port, frames):
+    """Posts (request_id, payload) frames the same way js/result.js does"""
+    conn = socket.create_connection((result.HOST, port))
+    for request_id, payload in frames:
+        payload = payload.encode("utf-8")
+        conn.sendall(struct.pack(">II", len(payload), request_id) + payload)
+    conn.close()
+
+
+class TestResultChannel():
+
+    def test_get_channel(self):
+        channel = result.get_channel()
+
+        assert channel.port > 0
+        assert result.get_channel() is channel
+
+    def test_request_ids_unique(self):
+        channel = result.get_channel()
+        requests = [channel.open_request() for i in range(10)]
+
+        assert len(set(r.id for r in requests)) == 10
+
+        for r in requests:
+            r.close()
+
+    def test_post_result(self):
+        request = result.get_channel().open_request()
+
+        post_frames(request.port, [(request.id, "fake0;;fake1")])
+
+        assert request.get_result(timeout=5) == "fake0;;fake1"
+        request.close()
+
+    def test_post_empty_result(self):
+        request = result.get_channel().open_request()
+
+        post_frames(request.port, [(request.id, "")])
+
+        assert request.get_result(timeout=5) == ""
+        request.close()
+
+    def test_no_result(self):
+        request = result.get_channel().open_request()
+
+        assert request.get_result(timeout=0) is None
+        request.close()
+
+    def test_large_result(self):
+        request = result.get_channel().open_request()
+        payload = ";;".join(str(i & 0xFF) for i in range(256 * 1024))
+
+        post_frames(request.port, [(request.id, payload)])
+
+        assert request.get_result(timeout=5) == payload
+        request.close()
+
+    def test_many_requests_in_flight(self):
+        channel = result.get_channel()
+        requests = [channel.open_request() for i in range(50)]
+
+        threads = [threading.Thread(target=post_frames,
+                                    args=(r.port, [(r.id, str(r.id))]))
+                   for r in reversed(requests)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for r in requests:
+            assert r.get_result(timeout=5) == str(r.id)
+            r.close()
+
+    def test_frames_on_one_connection(self):
+        channel = result.get_channel()
+        first = channel.open_request()
+        second = channel.open_request()
+
+        post_frames(channel.port, [(second.id, "2"), (first.id, "1")])
+
+        assert first.get_result(timeout=5) == "1"
+        assert second.get_result(timeout=5) == "2"
+        first.close()
+        second.close()
+
+    def test_closed_request_dropped(self):
+        channel = result.get_channel()
+        closed = channel.open_request()
+        closed.close()
+        request = channel.open_request()
+
+        post_frames(channel.port, [(closed.id, "x"), (request.id, "y")])
+
+        assert request.get_result(timeout=5) == "y"
+        assert closed.get_result(timeout=0) is None
+        request.close()
+
+    def test_callback_request(self):
+        updates = list()
+        request = result.get_channel().open_request(callback=updates.append)
+
+        post_frames(request.port, [(request.id, "1"), (request.id, "2")])
+
+        request.get_result(timeout=5)
+        for i in range(50):
+            if len(updates) == 2:
+                break
+            time.sleep(0.1)
+        assert updates == ["1", "2"]
+        request.close()
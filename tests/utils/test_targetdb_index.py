@@ -0,0 +1,187 @@
+import os
+import time
+import shutil
+import pytest
+
+from tiflash.utils import targetdb_index
+
+DEVICE_XML = """<?xml version="1.0"?>
+<device id="%s" partnum="%s" HW_revision="1">
+  <cpu id="cortex_m3" desc="CORTEX_M3"/>
+</device>
+"""
+CONNECTION_XML = """<?xml version="1.0"?>
+<connection id="%s" class="class" />
+"""
+
+
+def write_xml(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+@pytest.fixture(scope="function")
+def targetdb(tenv):
+    """Creates a fake ccs installation with a small TargetDB"""
+    root = os.path.join(tenv['paths']['tmp'], "targetdb_index")
+    ccs = os.path.join(root, "ccs")
+    cache = os.path.join(root, "cache")
+    db = ccs + "/ccs_base/common/targetdb"
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    for kind in ("devices", "connections", "cpus"):
+        os.makedirs(os.path.join(db, kind))
+
+    write_xml(db + "/devices/cc1350f128.xml",
+              DEVICE_XML % ("cc1350f128", "CC1350F128"))
+    write_xml(db + "/devices/cc3220sf.xml",
+              DEVICE_XML % ("cc3220sf", "CC3220SF"))
+    write_xml(db + "/devices/invalid.xml", "<device")
+    write_xml(db + "/connections/TIXDS110_Connection.xml",
+              CONNECTION_XML % "Texas Instruments XDS110 USB Debug Probe")
+
+    yield {'ccs': ccs, 'cache': cache, 'db': db}
+
+    shutil.rmtree(root)
+
+
+class TestTargetDBIndex():
+    def test_get_names(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        assert index.get_names('devices') == ["CC1350F128", "CC3220SF"]
+        assert index.get_names('connections') == \
+            ["Texas Instruments XDS110 USB Debug Probe"]
+        assert index.get_names('cpus') == []
+
+    def test_get_xml(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        result = index.get_xml('devices', "CC3220SF")
+
+        assert result == os.path.normpath(targetdb['db'] +
+                                          "/devices/cc3220sf.xml")
+        assert index.get_xml('devices', "CC2640R2F") is None
+
+    def test_get_record(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        result = index.get_record('devices',
+                                  targetdb['db'] + "/devices/cc3220sf.xml")
+
+        assert result['cpu'] == "CORTEX_M3"
+        assert result['attrib']['HW_revision'] == "1"
+
+    def test_unknown_kind(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        with pytest.raises(targetdb_index.TargetDBIndexError):
+            index.get_names('boards')
+
+    def test_new_xml(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+        index.get_names('devices')
+
+        time.sleep(0.01)
+        write_xml(targetdb['db'] + "/devices/cc2640r2f.xml",
+                  DEVICE_XML % ("cc2640r2f", "CC2640R2F"))
+        # Make sure directory mtime changes on coarse filesystems
+        os.utime(targetdb['db'] + "/devices", (0, time.time() + 10))
+
+        assert "CC2640R2F" in index.get_names('devices')
+
+    def test_modified_xml(self, targetdb):
+        xml_path = targetdb['db'] + "/devices/cc3220sf.xml"
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+        index.get_names('devices')
+
+        write_xml(xml_path, DEVICE_XML % ("cc3220sf", "CC3220SF_REV2"))
+        os.utime(xml_path, (0, time.time() + 10))
+
+        # Changed xmls are picked up by a new index (i.e. next run)
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        assert index.get_xml('devices', "CC3220SF") is None
+        assert index.get_xml('devices', "CC3220SF_REV2") == \
+            os.path.normpath(xml_path)
+
+    def test_modified_xml_in_place(self, targetdb):
+        xml_path = targetdb['db'] + "/devices/cc3220sf.xml"
+        dir_stat = os.stat(targetdb['db'] + "/devices")
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'],
+                                             revalidate_interval=0)
+        index.get_names('devices')
+
+        # Editing an xml in place does not change the directory mtime
+        write_xml(xml_path, DEVICE_XML % ("cc3220sf", "CC3220SF_REV2"))
+        os.utime(xml_path, (0, time.time() + 10))
+        os.utime(targetdb['db'] + "/devices",
+                 (dir_stat.st_atime, dir_stat.st_mtime))
+
+        assert index.get_xml('devices', "CC3220SF") is None
+        assert index.get_xml('devices', "CC3220SF_REV2") == \
+            os.path.normpath(xml_path)
+
+    def test_revalidate_interval(self, targetdb):
+        xml_path = targetdb['db'] + "/devices/cc3220sf.xml"
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'],
+                                             revalidate_interval=60)
+        index.get_names('devices')
+
+        write_xml(xml_path, DEVICE_XML % ("cc3220sf", "CC3220SF_REV2"))
+        os.utime(xml_path, (0, time.time() + 10))
+
+        # Directory was scanned less than revalidate_interval ago
+        assert index.get_xml('devices', "CC3220SF_REV2") is None
+
+    def test_saved_index(self, targetdb):
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+        expected = index.get_names('devices')
+
+        assert len(os.listdir(targetdb['cache'])) == 1
+
+        # Saved records are used when mtime and size did not change
+        xml_path = targetdb['db'] + "/devices/cc1350f128.xml"
+        stat = os.stat(xml_path)
+        write_xml(xml_path, DEVICE_XML % ("cc1350f128", "XXXXXXXXXX"))
+        os.utime(xml_path, (stat.st_atime, stat.st_mtime))
+
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        assert index.get_names('devices') == expected
+
+    def test_get_skipped(self, targetdb):
+        write_xml(targetdb['db'] + "/devices/board.xml", "<board id='x'/>")
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        result = index.get_skipped('devices')
+
+        assert sorted(result.keys()) == ["board.xml", "invalid.xml"]
+        assert "<board>" in result["board.xml"]
+        assert "could not parse" in result["invalid.xml"]
+
+    def test_many_xmls(self, targetdb):
+        for i in range(80):
+            write_xml(targetdb['db'] + "/devices/dev%02d.xml" % i,
+                      DEVICE_XML % ("dev%02d" % i, "DEV%02d" % i))
+        index = targetdb_index.TargetDBIndex(targetdb['ccs'],
+                                             cache_dir=targetdb['cache'])
+
+        result = index.get_names('devices')
+
+        assert result == ["CC1350F128", "CC3220SF"] + \
+            ["DEV%02d" % i for i in range(80)]
+        assert list(index.get_skipped('devices').keys()) == ["invalid.xml"]
@@ -0,0 +1,102 @@
+import os
+import json
+import pytest
+
+from tiflash.utils import trace
+from tiflash.utils import dss
+
+
+@pytest.fixture(scope="function")
+def spans():
+    """Collects the top level spans finished while the fixture is used"""
+    collected = list()
+    trace.add_hook(collected.append)
+
+    yield collected
+
+    trace.remove_hook(collected.append)
+
+
+def find_span(span, name):
+    if span['name'] == name:
+        return span
+    for child in span['children']:
+        found = find_span(child, name)
+        if found is not None:
+            return found
+
+    return None
+
+
+class TestTrace():
+    def test_disabled(self):
+        with trace.span("outer") as span:
+            assert span is None
+
+        assert trace.is_enabled() is False
+
+    def test_nested_spans(self, spans):
+        with trace.span("outer", board="L4000CE"):
+            with trace.span("inner") as inner:
+                inner.set(retcode=0)
+            with trace.span("inner2"):
+                pass
+
+        assert len(spans) == 1
+        assert spans[0]['name'] == "outer"
+        assert spans[0]['attrs'] == {'board': "L4000CE"}
+        assert [c['name'] for c in spans[0]['children']] == ["inner",
+                                                             "inner2"]
+        assert spans[0]['children'][0]['attrs'] == {'retcode': 0}
+        assert spans[0]['duration'] >= spans[0]['children'][0]['duration']
+
+        # Span dicts are JSON serializable
+        json.dumps(spans)
+
+    def test_span_error(self, spans):
+        with pytest.raises(ValueError):
+            with trace.span("outer"):
+                raise ValueError("bad value")
+
+        assert spans[0]['attrs'] == {'error': "bad value"}
+
+    def test_traced(self, spans):
+        @trace.traced("api.test")
+        def func(x):
+            return x * 2
+
+        assert func(2) == 4
+        assert spans[0]['name'] == "api.test"
+
+    def test_remove_hook(self):
+        collected = list()
+        trace.add_hook(collected.append)
+
+        assert trace.remove_hook(collected.append) is True
+        assert trace.remove_hook(collected.append) is False
+
+        with trace.span("outer"):
+            pass
+
+        assert collected == []
+
+    def test_invalid_hook(self):
+        with pytest.raises(trace.TraceError):
+            trace.add_hook("not callable")
+
+    def test_call_dss_spans(self, tenv, spans):
+        fake_dss = os.path.normpath(tenv['paths']['resources'] +
+                                    "/fakeccs/eclipse/ccstudio")
+        cmds = dss.format_args({'list': {'devices': True}})
+
+        result = dss.call_dss(fake_dss, cmds, timeout=10)
+
+        assert result == (True, "fake0;;fake1;;fake2")
+        assert spans[0]['name'] == "dss.call_dss"
+        spawn = find_span(spans[0], "dss.spawn")
+        assert spawn is not None
+        assert find_span(spans[0], "dss.result") is not None
+
+        # DSS side timings are added to the span of the DSS process
+        assert [c['name'] for c in spawn['children']] == ["js.commands"]
+        assert spawn['children'][0]['duration'] <= spawn['duration']
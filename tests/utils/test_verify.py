@@ -0,0 +1,28 @@
+from tiflash.utils import verify
+
+
+class TestVerify():
+    def test_find_mismatch(self):
+        expected = bytes(bytearray(range(256))) * 64
+
+        assert verify.find_mismatch(expected, expected) is None
+
+        actual = bytearray(expected)
+        actual[0x2345] ^= 0xFF
+        assert verify.find_mismatch(expected, bytes(actual),
+                                    chunk_size=0x100) == 0x2345
+
+    def test_find_mismatch_short_read(self):
+        assert verify.find_mismatch(b"\x01\x02\x03", b"\x01\x02") == 2
+
+    def test_format_mismatches(self):
+        results = [{'address': 0x0, 'size': 16, 'success': True,
+                    'mismatch': None},
+                   {'address': 0x100, 'size': 16, 'success': False,
+                    'mismatch': 0x104},
+                   {'address': 0x200, 'size': 8, 'success': False,
+                    'mismatch': None}]
+
+        assert verify.format_mismatches(results) == \
+            "Segment 0x100 (16 bytes) does not match at 0x104\n" \
+            "Segment 0x200 (8 bytes) does not match"
@@ -0,0 +1,97 @@
+import os
+import pytest
+
+from tiflash.utils import xmlhelper
+
+
+@pytest.fixture(scope="function")
+def device_xml(tenv):
+    path = os.path.join(tenv['paths']['tmp'], "xmlhelper_device.xml")
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0"?>\n'
+                '<device id="cc1310f128" partnum="CC1310F128">\n'
+                '  <router id="IcePick_C_0"><cpu id="Cortex_M3_0"/></router>\n'
+                '  <broken>\n')      # never parsed by the fast path
+
+    yield path
+
+    os.remove(path)
+
+
+class TestXMLHelper():
+    def test_get_xml_root_attrib(self, device_xml):
+        tag, attrib = xmlhelper.get_xml_root_attrib(device_xml)
+
+        assert tag == "device"
+        assert attrib == {'id': "cc1310f128", 'partnum': "CC1310F128"}
+
+    def test_iter_xml_elements(self, device_xml):
+        elements = xmlhelper.iter_xml_elements(device_xml)
+
+        result = [next(elements)[0] for i in range(3)]
+        elements.close()
+
+        assert result == ["device", "router", "cpu"]
+
+    def test_get_xml_root_attrib_missing_file(self, tenv):
+        with pytest.raises(xmlhelper.XMLHelperError):
+            xmlhelper.get_xml_root_attrib("/nonexistent/file.xml")
+
+
+@pytest.fixture(scope="function")
+def ccxml_file(tenv):
+    path = os.path.join(tenv['paths']['tmp'], "xmlhelper_cache.ccxml")
+    with open(path, 'w') as f:
+        f.write('<configurations id="configurations_0"/>')
+    xmlhelper.invalidate_xml_cache()
+
+    yield path
+
+    os.remove(path)
+
+
+class TestXMLCache():
+    def test_cached_root_is_shared(self, ccxml_file):
+        first = xmlhelper.get_cached_xml_root(ccxml_file)
+        second = xmlhelper.get_cached_xml_root(ccxml_file)
+
+        assert first is second
+        assert first.attrib['id'] == "configurations_0"
+
+    def test_changed_file_is_reparsed(self, ccxml_file):
+        first = xmlhelper.get_cached_xml_root(ccxml_file)
+
+        with open(ccxml_file, 'w') as f:
+            f.write('<configurations id="configurations_10"/>')
+
+        result = xmlhelper.get_cached_xml_root(ccxml_file)
+
+        assert result is not first
+        assert result.attrib['id'] == "configurations_10"
+
+    def test_invalidate(self, ccxml_file):
+        first = xmlhelper.get_cached_xml_root(ccxml_file)
+        stat = os.stat(ccxml_file)
+
+        # Same size and mtime; only invalidating picks up the change
+        with open(ccxml_file, 'w') as f:
+            f.write('<configurations id="configurations_1"/>')
+        os.utime(ccxml_file, (stat.st_atime, stat.st_mtime))
+        assert xmlhelper.get_cached_xml_root(ccxml_file) is first
+
+        xmlhelper.invalidate_xml_cache(ccxml_file)
+
+        result = xmlhelper.get_cached_xml_root(ccxml_file)
+        assert result.attrib['id'] == "configurations_1"
+
+    def test_cache_size(self, ccxml_file, monkeypatch):
+        monkeypatch.setattr(xmlhelper, "XML_CACHE_SIZE", 1)
+        first = xmlhelper.get_cached_xml_root(ccxml_file)
+        other = ccxml_file + ".other"
+        with open(other, 'w') as f:
+            f.write('<configurations id="other"/>')
+
+        xmlhelper.get_cached_xml_root(other)    # evicts ccxml_file
+        os.remove(other)
+
+        assert xmlhelper.get_cached_xml_root(ccxml_file) is not first
@@ -4,7 +4,60 @@ Licensed under the MIT license (see `LICENSE` file)
 
 A (unofficial) python module for flashing TI devices.
 """
-from tiflash.core import    (   get_connections,
+import sys
+
+from tiflash.version import version_string as __version__
+
+__author__ = "Cameron Webb (webbjcam@gmail.com)"
+
+__all__ = [ 'get_connections',
+            'get_devicetypes',
+            'get_cpus',
+            'list_options',
+            'get_option',
+            'set_option',
+            'reset',
+            'erase',
+            'verify',
+            'flash',
+            'memory_read',
+            'memory_write',
+            'memory_dump',
+            'register_read',
+            'register_write',
+            'evaluate',
+            'attach',
+            'pipeline',
+            'xds110_reset',
+            'xds110_list',
+            'xds110_upgrade',
+            'detect_devices',
+            'get_info',
+            'start_server',
+            'stop_server',
+
+            'TIFlashError'
+          ]
+
+if sys.version_info >= (3, 7):
+    # The api (and every utils module) is imported on first use, so that
+    # 'import tiflash' (and the CLI) starts fast
+    def __getattr__(name):
+        if name not in __all__:
+            raise AttributeError("module %r has no attribute %r"
+                                 % (__name__, name))
+
+        from tiflash import core
+        value = getattr(core, name)
+        globals()[name] = value
+
+        return value
+
+    def __dir__():
+        return sorted(set(globals().keys()) | set(__all__))
+
+else:   # No module __getattr__ (PEP 562); import api up front
+    from tiflash.core import (  get_connections,
                                 get_devicetypes,
                                 get_cpus,
                                 list_options,
@@ -16,24 +69,25 @@ from tiflash.core import    (   get_connections,
                                 flash,
                                 memory_read,
                                 memory_write,
+                                memory_dump,
                                 register_read,
                                 register_write,
                                 evaluate,
                                 attach,
+                                pipeline,
                                 xds110_reset,
                                 xds110_list,
                                 xds110_upgrade,
                                 detect_devices,
                                 get_info,
+                                start_server,
+                                stop_server,
 
                                 TIFlashError
                             )
-
-from tiflash.version import version_string as __version__
-
-__author__ = "Cameron Webb (webbjcam@gmail.com)"
+    del core
 
 
 # Remove any imported modules we don't want exported
 del version
-del core
+del sys
@@ -0,0 +1,468 @@
+"""
+aio.py      --  asyncio versions of the tiflash api (Python 3.6+)
+
+
+Every function of the tiflash api (tiflash.flash, tiflash.reset,
+tiflash.memory_read, ...) has an awaitable version here, taking the same
+arguments and returning the same result.
+
+DSS is run with asyncio.create_subprocess_exec and results are received on an
+asyncio socket server (one per event loop). The rest of an api call (finding
+CCS, generating the ccxml, parsing results) runs the same code as the blocking
+api in a worker thread, which waits on the event loop while DSS runs.
+
+Worker threads come from a shared thread pool of AIO_DEFAULT_WORKERS threads,
+so at most that many api calls run at once; further calls wait for a free
+worker. Use set_max_workers() to change the size of the pool. call_dss itself
+needs no worker thread.
+
+Cancelling an awaitable kills the DSS process it is waiting on (and any
+process the launcher started) and stops the operation before it makes another
+DSS call.
+
+Example:
+    import asyncio
+    from tiflash import aio
+
+    async def flash_all(boards):
+        return await asyncio.gather(
+            *[aio.flash("app.out", serno=serno) for serno in boards],
+            return_exceptions=True)
+
+    asyncio.get_event_loop().run_until_complete(flash_all(["L4000CE",
+                                                           "L4000CF"]))
+
+Note: on Windows, subprocesses need the ProactorEventLoop (default since
+Python 3.8).
+
+"""
+import os
+import signal
+import asyncio
+import weakref
+import functools
+import threading
+import concurrent.futures
+
+from tiflash.core import api
+from tiflash.utils import dss
+from tiflash.utils.result import HOST, FRAME_HEADER
+
+AIO_DEFAULT_WORKERS = 32    # api calls run at once (each waits in a thread)
+
+# api functions with an awaitable version in this module
+API_FUNCTIONS = [
+    'get_connections',
+    'get_devicetypes',
+    'get_cpus',
+    'list_options',
+    'print_options',
+    'get_bool_option',
+    'get_float_option',
+    'get_option',
+    'set_option',
+    'reset',
+    'erase',
+    'verify',
+    'flash',
+    'memory_read',
+    'memory_write',
+    'memory_dump',
+    'register_read',
+    'register_write',
+    'evaluate',
+    'attach',
+    'nop',
+    'pipeline',
+    'start_server',
+    'stop_server',
+    'xds110_reset',
+    'xds110_list',
+    'xds110_upgrade',
+    'detect_devices',
+    'get_info',
+]
+
+
+class AIOError(Exception):
+    """Generic AIO Error"""
+    pass
+
+
+class ResultRequest(object):
+    """Awaitable result of a single command posted to the ResultChannel
+    (see tiflash.utils.result.ResultRequest)"""
+
+    def __init__(self, channel, request_id, callback=None):
+        """Initializes the ResultRequest
+
+        Args:
+            channel (ResultChannel): channel the result is posted to
+            request_id (int): id of request
+            callback (callable, optional): function called with each result
+                posted (called from the event loop)
+        """
+        self.channel = channel
+        self.id = request_id
+        self.port = channel.port
+        self.callback = callback
+
+        self._future = channel.loop.create_future()
+
+    async def get_result(self, timeout=None):
+        """Returns the result posted for this request
+
+        Args:
+            timeout (int): time to wait for result to be posted. If 'None'
+                will wait forever.
+
+        Returns:
+            str: result posted or None if no result was posted in time
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future),
+                                          timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        """Stops listening for the result of this request"""
+        self.channel._close_request(self.id)
+
+    def _post(self, payload):
+        result = payload.decode("utf-8")
+        if self.callback is not None:
+            self.callback(result)
+        if not self._future.done():
+            self._future.set_result(result)
+
+
+class ResultChannel(object):
+    """Asyncio socket server receiving results from js/main.js subprocesses
+    (and DSS servers); frames are the same as tiflash.utils.result's."""
+
+    def __init__(self, loop):
+        """Initializes the ResultChannel (use get_channel())
+
+        Args:
+            loop (asyncio.AbstractEventLoop): event loop of channel
+        """
+        self.loop = loop
+        self.port = None
+        self.started = None     # task starting the channel
+
+        self._server = None
+        self._requests = dict()
+        self._next_id = 1
+
+    async def start(self, host=HOST):
+        """Starts listening on an OS assigned port
+
+        Raises:
+            AIOError: raised if channel socket could not be opened
+        """
+        try:
+            self._server = await asyncio.start_server(self._handle_client,
+                                                      host, 0)
+        except OSError as e:
+            raise AIOError("Could not open result channel: %s" % e)
+
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def open_request(self, callback=None):
+        """Returns a new ResultRequest to receive a result on
+
+        Args:
+            callback (callable, optional): function called with each result
+                posted to the request
+
+        Returns:
+            ResultRequest: request with a unique id
+        """
+        request = ResultRequest(self, self._next_id, callback=callback)
+        self._requests[request.id] = request
+        # ids are written by java as a (signed) int
+        self._next_id = (self._next_id % 0x7FFFFFFF) + 1
+
+        return request
+
+    def close(self):
+        """Stops listening for results"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    def _close_request(self, request_id):
+        self._requests.pop(request_id, None)
+
+    async def _handle_client(self, reader, writer):
+        """Reads frames until the client closes the connection"""
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                length, request_id = FRAME_HEADER.unpack(header)
+                payload = await reader.readexactly(length)
+
+                # Results of closed (timed out) requests are dropped
+                request = self._requests.get(request_id)
+                if request is not None:
+                    try:
+                        request._post(payload)
+                    except Exception:
+                        pass    # Errors in callbacks are not ours to handle
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+__channels = weakref.WeakKeyDictionary()
+
+
+async def get_channel():
+    """Returns the result channel of the running event loop (started on
+    first use)
+
+    Returns:
+        ResultChannel: result channel of event loop
+    """
+    loop = asyncio.get_event_loop()
+
+    channel = __channels.get(loop)
+    if channel is None:
+        channel = ResultChannel(loop)
+        channel.started = loop.create_task(channel.start())
+        __channels[loop] = channel
+
+    try:
+        await asyncio.shield(channel.started)
+    except AIOError:
+        if __channels.get(loop) is channel:
+            __channels.pop(loop)
+        raise
+
+    return channel
+
+
+async def call_dss(dss_path, commands, workspace=None,
+                   timeout=dss.CMD_DEFAULT_TIMEOUT, progress=None):
+    """Awaitable version of tiflash.utils.dss.call_dss
+
+    Cancelling it kills the DSS process (and every process it started).
+
+    Args:
+        dss_path (str): Path to dss.bat/.sh installation to use
+        commands (list): list of string commands to pass to main.js
+        workspace (str): workspace name
+        timeout (int):  time to give command to complete (negative == infinite)
+        progress (callable, optional): function called with each progress
+            update (str) posted by the commands (called from the event loop)
+
+    Returns:
+        (bool, str): returns tuple with (bool=result, str=value)
+            caller must convert value to proper value
+    """
+    channel = await get_channel()
+    request = channel.open_request()
+    progress_request = None
+    retcode = None
+
+    # Progress updates are posted to their own request
+    if progress is not None:
+        progress_request = channel.open_request(callback=progress)
+        commands = list(commands) + dss.format_args({'progress': {
+            'port': progress_request.port, 'id': progress_request.id}})
+
+    # Remove timeout if negative number provided (inifinite timeout)
+    if timeout < 0:
+        timeout = None
+
+    # Attaching CCS needs its own process (it waits on stdin)
+    server_port = None
+    if dss.ATTACH_CMD not in commands:
+        server_port = dss.get_server(dss_path, workspace=workspace)
+
+    try:
+        if server_port is not None:
+            try:
+                retcode = await _send_request(server_port,
+                    [request.port, request.id] + list(commands),
+                    timeout=timeout)
+            except dss.DSSServerUnavailable:
+                pass    # Stale server entry; spawn a new process
+
+        if retcode is None:
+            cmd = dss._get_dss_cmd(dss_path, request.port, request.id,
+                                   commands, workspace=workspace)
+            retcode = await __run_process(cmd)
+
+        # Command completed; result is posted (or in flight) by now
+        result = await request.get_result(timeout=dss.RESULT_TIMEOUT)
+    finally:
+        request.close()
+        if progress_request is not None:
+            progress_request.close()
+
+    return (retcode == 0, result)
+
+
+async def _send_request(server_port, request, timeout=None):
+    """Awaitable version of tiflash.utils.dss._send_request"""
+    try:
+        (reader, writer) = await asyncio.wait_for(
+            asyncio.open_connection(dss.SERVER_HOST, server_port),
+            dss.SERVER_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        raise dss.DSSServerUnavailable("Could not connect to DSS server on "
+                                       "port %d" % server_port)
+
+    try:
+        writer.write(dss._encode_request(request))
+        response = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+
+    return dss._parse_response(response)
+
+
+async def __run_process(cmd):
+    """Runs cmd; kills it (and the processes it started) if cancelled"""
+    if os.name == 'posix':
+        proc = await asyncio.create_subprocess_exec(*cmd,
+                                                    start_new_session=True)
+    else:
+        proc = await asyncio.create_subprocess_exec(*cmd)
+
+    try:
+        return await proc.wait()
+    finally:
+        if proc.returncode is None:
+            __kill(proc)
+
+
+def __kill(proc):
+    """Kills proc and (on posix) its process group"""
+    try:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (OSError, ProcessLookupError):
+        pass    # Already exited
+
+
+__executor = None
+__executor_lock = threading.Lock()
+
+
+def set_max_workers(workers):
+    """Sets the number of worker threads api calls are run in (default is
+    AIO_DEFAULT_WORKERS); calls already started keep their thread
+
+    Args:
+        workers (int): number of api calls to run at once
+
+    Raises:
+        AIOError: raised if workers is less than 1
+    """
+    global __executor
+
+    if workers < 1:
+        raise AIOError("Number of workers must be at least 1")
+
+    with __executor_lock:
+        old_executor = __executor
+        __executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="tiflash-aio")
+
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+
+
+def __submit(target):
+    """Runs target in the worker thread pool; returns its
+    concurrent.futures.Future"""
+    global __executor
+
+    with __executor_lock:
+        if __executor is None:
+            __executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=AIO_DEFAULT_WORKERS,
+                thread_name_prefix="tiflash-aio")
+        return __executor.submit(target)
+
+
+async def run(func, *args, **kwargs):
+    """Runs a (blocking) tiflash function in a worker thread (see
+    set_max_workers); its DSS calls are run on the event loop (see
+    call_dss) while the function waits.
+
+    Cancelling it kills the running DSS call and stops func from making
+    another one (func is not run at all if it is still waiting for a
+    worker).
+
+    Args:
+        func (callable): tiflash function to run (i.e. tiflash.flash)
+        args (*list): positional arguments of func
+        kwargs (**dict): keyword arguments of func
+
+    Returns:
+        value returned by func
+    """
+    loop = asyncio.get_event_loop()
+
+    calls = set()   # DSS calls in flight
+    state = {'cancelled': False}
+    lock = threading.Lock()
+
+    def run_dss(dss_path, commands, **dss_kwargs):
+        with lock:
+            if state['cancelled']:
+                raise concurrent.futures.CancelledError()
+            call = asyncio.run_coroutine_threadsafe(
+                call_dss(dss_path, commands, **dss_kwargs), loop)
+            calls.add(call)
+
+        try:
+            return call.result()
+        finally:
+            with lock:
+                calls.discard(call)
+
+    def target():
+        dss.set_runner(run_dss)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            dss.set_runner(None)
+
+    try:
+        return await asyncio.wrap_future(__submit(target), loop=loop)
+    except asyncio.CancelledError:
+        with lock:
+            state['cancelled'] = True
+            for call in calls:
+                call.cancel()
+        raise
+
+
+def __make_async(func):
+    """Returns the awaitable version of an api function"""
+    @functools.wraps(func)
+    async def async_func(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    async_func.__doc__ = "Awaitable version of tiflash.%s\n\n%s" % (
+        func.__name__, func.__doc__ or "")
+
+    return async_func
+
+
+for __name in API_FUNCTIONS:
+    globals()[__name] = __make_async(getattr(api, __name))
+del __name
+
+TIFlashError = api.TIFlashError
+
+__all__ = API_FUNCTIONS + ['run', 'call_dss', 'get_channel',
+                           'set_max_workers', 'TIFlashError']
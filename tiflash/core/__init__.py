@@ -1,29 +1,89 @@
-from tiflash.core.core import TIFlashError  #, TIFlash
-from tiflash.core.api import(   get_connections,
-                                get_devicetypes,
-                                get_cpus,
-                                list_options,
-                                print_options,
-                                get_bool_option,
-                                get_float_option,
-                                get_option,
-                                set_option,
-                                reset,
-                                erase,
-                                verify,
-                                flash,
-                                memory_read,
-                                memory_write,
-                                register_read,
-                                register_write,
-                                evaluate,
-                                attach,
-                                xds110_reset,
-                                xds110_list,
-                                xds110_upgrade,
-                                detect_devices,
-                                get_info,
-                            )
-# Remove anything that shouldn't be included at api level
-del core
-del api
+import sys
+
+__all__ = [ 'get_connections',
+            'get_devicetypes',
+            'get_cpus',
+            'list_options',
+            'print_options',
+            'get_bool_option',
+            'get_float_option',
+            'get_option',
+            'set_option',
+            'reset',
+            'erase',
+            'verify',
+            'flash',
+            'memory_read',
+            'memory_write',
+            'memory_dump',
+            'register_read',
+            'register_write',
+            'evaluate',
+            'attach',
+            'pipeline',
+            'xds110_reset',
+            'xds110_list',
+            'xds110_upgrade',
+            'detect_devices',
+            'get_info',
+            'start_server',
+            'stop_server',
+
+            'TIFlashError'
+          ]
+
+if sys.version_info >= (3, 7):
+    # api is imported on first use (see tiflash/__init__.py)
+    def __getattr__(name):
+        if name not in __all__:
+            raise AttributeError("module %r has no attribute %r"
+                                 % (__name__, name))
+
+        if name == 'TIFlashError':
+            from tiflash.core.core import TIFlashError as value
+        else:
+            from tiflash.core import api
+            value = getattr(api, name)
+        globals()[name] = value
+
+        return value
+
+    def __dir__():
+        return sorted(set(globals().keys()) | set(__all__))
+
+else:   # No module __getattr__ (PEP 562); import api up front
+    from tiflash.core.core import TIFlashError  #, TIFlash
+    from tiflash.core.api import(   get_connections,
+                                    get_devicetypes,
+                                    get_cpus,
+                                    list_options,
+                                    print_options,
+                                    get_bool_option,
+                                    get_float_option,
+                                    get_option,
+                                    set_option,
+                                    reset,
+                                    erase,
+                                    verify,
+                                    flash,
+                                    memory_read,
+                                    memory_write,
+                                    memory_dump,
+                                    register_read,
+                                    register_write,
+                                    evaluate,
+                                    attach,
+                                    pipeline,
+                                    xds110_reset,
+                                    xds110_list,
+                                    xds110_upgrade,
+                                    detect_devices,
+                                    get_info,
+                                    start_server,
+                                    stop_server,
+                                )
+    # Remove anything that shouldn't be included at api level
+    del core
+    del api
+
+del sys
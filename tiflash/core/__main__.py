@@ -1,6 +1,8 @@
+import os
+import sys
+import json
 import argparse
 from platform import python_version
-from pprint import pprint
 
 import tiflash
 from tiflash.core.args import (
@@ -15,6 +17,7 @@ from tiflash.core.args import (
     FlashParser,
     MemoryReadParser,
     MemoryWriteParser,
+    MemoryDumpParser,
     RegisterReadParser,
     RegisterWriteParser,
     ExpressionParser,
@@ -22,12 +25,122 @@ from tiflash.core.args import (
     XDS110ResetParser,
     XDS110UpgradeParser,
     XDS110ListParser,
+    ServerStartParser,
+    ServerStopParser,
+    FarmFlashParser,
     DetectParser,
     InfoParser,
 
     get_session_args
 )
 
+# Sub commands: (name, parent parser, usage, description)
+SUBCOMMANDS = [
+    # Options
+    ('options-get', OptionsGetParser,
+        "tiflash [Session Arguments] options-get <optionID> [optionals]",
+        "Get value of a device option."),
+    ('options-set', OptionsSetParser,
+        "tiflash [Session Arguments] options-set <optionID> <optionVal> [optionals]",
+        "Set value of a device option."),
+    ('options-list', OptionsListParser,
+        "tiflash [Session Arguments] options-list [optionID]",
+        "List device options."),
+
+    # List
+    ('list', ListParser,
+        "tiflash [Session Arguments] list [optionals]",
+        "List device/environment information."),
+
+    # Reset
+    ('reset', ResetParser,
+        "tiflash [Session Arguments] reset [optionals]",
+        "Reset a device. (Board Reset)"),
+
+    # Erase
+    ('erase', EraseParser,
+        "tiflash [Session Arguments] erase [optionals]",
+        "Erase a device's flash."),
+
+    # Verify
+    ('verify', VerifyParser,
+        "tiflash [Session Arguments] verify [optionals]",
+        "Verify an image on a device's flash."),
+
+    # Flash
+    ('flash', FlashParser,
+        "tiflash [Session Arguments] flash [optionals]",
+        "Flash a device with an image(s)."),
+
+    # Memory
+    ('memory-read', MemoryReadParser,
+        "tiflash [Session Arguments] memory-read <address> [optionals]",
+        "Read from memory location on a device."),
+    ('memory-write', MemoryWriteParser,
+        "tiflash [Session Arguments] memory-write <address> [optionals]",
+        "Write to memory location on a device."),
+    ('memory-dump', MemoryDumpParser,
+        "tiflash [Session Arguments] memory-dump <address> <length> -o <file> [optionals]",
+        "Dump a range of memory on a device to a file."),
+
+    # Register
+    ('register-read', RegisterReadParser,
+        "tiflash [Session Arguments] register-read <regname> [optionals]",
+        "Read from register on a device."),
+    ('register-write', RegisterWriteParser,
+        "tiflash [Session Arguments] register-write <reganame> <value>",
+        "Write value to register on a device."),
+
+    # Evaluate
+    ('evaluate', ExpressionParser,
+        "tiflash [Session Arguments] evaluate <expression> [optionals]",
+        "Evaluate a C/GEL expression on a device."),
+
+    # Attach
+    ('attach', AttachParser,
+        "tiflash [Session Arguments] attach",
+        "Open up CCS session & attach to device"),
+
+    # XDS110 Parsers
+    ('xds110-reset', XDS110ResetParser,
+        "tiflash [Session Arguments] xds110-reset",
+        "Calls xds110reset on specified device"),
+    ('xds110-upgrade', XDS110UpgradeParser,
+        "tiflash [Session Arguments] xds110-upgrade",
+        "Upgrades XDS110 firmware on device"),
+    ('xds110-list', XDS110ListParser,
+        "tiflash [Session Arguments] xds110-list",
+        "Lists sernos of connected XDS110 devices"),
+
+    # DSS Server Parsers
+    ('server-start', ServerStartParser,
+        "tiflash [Session Arguments] server-start",
+        "Starts a DSS server that commands are sent to"),
+    ('server-stop', ServerStopParser,
+        "tiflash [Session Arguments] server-stop",
+        "Stops the running DSS server"),
+
+    # Farm Parsers
+    ('farm-flash', FarmFlashParser,
+        "tiflash [Session Arguments] farm-flash <image> -B <board> [<board> ...] [optionals]",
+        "Flash an image on to many boards at once"),
+
+    # Detect
+    ('detect', DetectParser,
+        "tiflash [Session Arguments] detect",
+        "Detect devices connected to machine"),
+
+    # Info
+    ('info', InfoParser,
+        "tiflash [Session Arguments] info",
+        "Prints out information of tiflash environment"),
+]
+
+SUBCOMMAND_NAMES = [subcommand[0] for subcommand in SUBCOMMANDS]
+
+HELP_ARGS = ('-h', '--help')
+
+
 def __exit_with_error(e):
     """Helper function for printing Exception message and exiting with non-zero
     exit number
@@ -37,9 +150,13 @@ def __exit_with_error(e):
     """
     raise SystemExit(e)
 
-def generate_parser():
+def generate_parser(cmd=None):
     """Generates an argument parser
 
+    Args:
+        cmd (str, optional): only add the sub command parser of this command
+            (all sub commands are added if None)
+
     Returns:
         argparse.ArgumentParser
     """
@@ -58,88 +175,10 @@ def generate_parser():
 
     sub_parsers = main_parser.add_subparsers(dest='cmd')
 
-    # Options
-    sub_parsers.add_parser('options-get', parents=[OptionsGetParser],
-        usage="tiflash [Session Arguments] options-get <optionID> [optionals]",
-        description="Get value of a device option.")
-    sub_parsers.add_parser('options-set', parents=[OptionsSetParser],
-        usage="tiflash [Session Arguments] options-set <optionID> <optionVal> [optionals]",
-        description="Set value of a device option.")
-    sub_parsers.add_parser('options-list', parents=[OptionsListParser],
-        usage="tiflash [Session Arguments] options-list [optionID]",
-        description="List device options.")
-
-    # List
-    sub_parsers.add_parser('list', parents=[ListParser],
-        usage="tiflash [Session Arguments] list [optionals]",
-        description="List device/environment information.")
-
-    # Reset
-    sub_parsers.add_parser('reset', parents=[ResetParser],
-        usage="tiflash [Session Arguments] reset [optionals]",
-        description="Reset a device. (Board Reset)")
-
-    # Erase
-    sub_parsers.add_parser('erase', parents=[EraseParser],
-        usage="tiflash [Session Arguments] erase [optionals]",
-        description="Erase a device's flash.")
-
-    # Verify
-    sub_parsers.add_parser('verify', parents=[VerifyParser],
-        usage="tiflash [Session Arguments] verify [optionals]",
-        description="Verify an image on a device's flash.")
-
-    # Flash
-    sub_parsers.add_parser('flash', parents=[FlashParser],
-        usage="tiflash [Session Arguments] flash [optionals]",
-        description="Flash a device with an image(s).")
-
-    # Memory
-    sub_parsers.add_parser('memory-read', parents=[MemoryReadParser],
-        usage="tiflash [Session Arguments] memory-read <address> [optionals]",
-        description="Read from memory location on a device.")
-    sub_parsers.add_parser('memory-write', parents=[MemoryWriteParser],
-        usage="tiflash [Session Arguments] memory-write <address> [optionals]",
-        description="Write to memory location on a device.")
-
-    # Register
-    sub_parsers.add_parser('register-read', parents=[RegisterReadParser],
-        usage="tiflash [Session Arguments] register-read <regname> [optionals]",
-        description="Read from register on a device.")
-    sub_parsers.add_parser('register-write', parents=[RegisterWriteParser],
-        usage="tiflash [Session Arguments] register-write <reganame> <value>",
-        description="Write value to register on a device.")
-
-    # Evaluate
-    sub_parsers.add_parser('evaluate', parents=[ExpressionParser],
-        usage="tiflash [Session Arguments] evaluate <expression> [optionals]",
-        description="Evaluate a C/GEL expression on a device.")
-
-    # Attach
-    sub_parsers.add_parser('attach', parents=[AttachParser],
-        usage="tiflash [Session Arguments] attach",
-        description="Open up CCS session & attach to device")
-
-    # XDS110 Parsers
-    sub_parsers.add_parser('xds110-reset', parents=[XDS110ResetParser],
-        usage="tiflash [Session Arguments] xds110-reset",
-        description="Calls xds110reset on specified device")
-    sub_parsers.add_parser('xds110-upgrade', parents=[XDS110UpgradeParser],
-        usage="tiflash [Session Arguments] xds110-upgrade",
-        description="Upgrades XDS110 firmware on device")
-    sub_parsers.add_parser('xds110-list', parents=[XDS110ListParser],
-        usage="tiflash [Session Arguments] xds110-list",
-        description="Lists sernos of connected XDS110 devices")
-
-    # Detect
-    sub_parsers.add_parser('detect', parents=[DetectParser],
-        usage="tiflash [Session Arguments] detect",
-        description="Detect devices connected to machine")
-
-    # Info
-    sub_parsers.add_parser('info', parents=[InfoParser],
-        usage="tiflash [Session Arguments] info",
-        description="Prints out information of tiflash environment")
+    for name, parent, usage, description in SUBCOMMANDS:
+        if cmd is None or cmd == name:
+            sub_parsers.add_parser(name, parents=[parent], usage=usage,
+                                   description=description)
 
     return main_parser
 
@@ -151,11 +190,23 @@ def parse_args():
         argparse.Namespace: provided arguments
 
     """
+    argv = sys.argv[1:]
+
+    # Only build the sub command parser that is needed (building them all is
+    # a large part of startup time); help without a command lists them all
+    cmd = None
+    for arg in argv:
+        if arg in HELP_ARGS:
+            break
+        if arg in SUBCOMMAND_NAMES:
+            cmd = arg
+            break
+
     # Generate parser
-    main_parser = generate_parser()
+    main_parser = generate_parser(cmd)
 
     # Parser arguments
-    args = main_parser.parse_args()
+    args = main_parser.parse_args(argv)
 
     return args
 
@@ -289,14 +340,17 @@ def handle_verify(args):
             option_id = opt[0]
             option_value = opt[1]
 
-        options.update({option_id: option_value})
+            options.update({option_id: option_value})
 
     if len(options) == 0:
         options = None
 
     # TODO: Add multi image verifying
     try:
-        result = tiflash.verify(args.image[0], options=options, binary=args.bin, **session_args)
+        result = tiflash.verify(args.image[0], options=options, binary=args.bin,
+                                address=args.address, fast=args.fast,
+                                checksum_only=args.checksum_only,
+                                crc_expr=args.crc_expr, **session_args)
         print(result)
     except Exception as e:
         __exit_with_error(e)
@@ -309,7 +363,12 @@ def handle_flash(args):
     options = dict()
 
     for img in args.images:
-        images.append(img)
+        # image@address: binary image flashed at address
+        if '@' in img and not os.path.isfile(img):
+            (path, address) = img.rsplit('@', 1)
+            images.append({'image': path, 'binary': True, 'address': address})
+        else:
+            images.append(img)
 
     if args.options:
         for opt in args.options:
@@ -321,10 +380,15 @@ def handle_flash(args):
     if len(options) == 0:
         options = None
 
-    # TODO: Add multi image flashing
     try:
-        result = tiflash.flash(images[0], binary=args.bin, options=options,
-                           address=args.address, **session_args)
+        sector_size = int(args.sector_size, 0) if args.sector_size else None
+        result = tiflash.flash(images if len(images) > 1 else images[0],
+                           binary=args.bin, options=options,
+                           address=args.address,
+                           skip_if_same=args.skip_if_same,
+                           confirm_same=args.confirm_same, delta=args.delta,
+                           sector_size=sector_size,
+                           crc_expr=args.crc_expr, **session_args)
         print(result)
     except Exception as e:
         __exit_with_error(e)
@@ -349,6 +413,24 @@ def handle_memory(args):
                 **session_args)
         except Exception as e:
             __exit_with_error(e)
+    elif args.cmd == 'memory-dump':
+        progress = __print_progress if args.progress else None
+        try:
+            chunk_size = int(args.chunk_size, 0) if args.chunk_size else None
+            result = tiflash.memory_dump(args.address, int(args.length, 0),
+                args.output, chunk_size=chunk_size, progress=progress,
+                resume=args.resume, page=args.page, **session_args)
+            if args.progress:
+                sys.stderr.write("\n")
+            print(result)
+        except Exception as e:
+            __exit_with_error(e)
+
+
+def __print_progress(done, total):
+    """Helper function for printing progress (on one line)"""
+    sys.stderr.write("\r%d/%d bytes (%d%%)" % (done, total, done * 100 // total))
+    sys.stderr.flush()
 
 
 def handle_register(args):
@@ -422,6 +504,81 @@ def handle_xds110(args):
             __exit_with_error(e)
 
 
+def handle_server(args):
+    """Helper function for handling 'server' command"""
+    session_args = get_session_args(args)
+
+    if args.cmd == 'server-start':
+        try:
+            result = tiflash.start_server(max_sessions=args.max_sessions,
+                                          idle_timeout=args.idle_timeout,
+                                          **session_args)
+            print(result)
+        except Exception as e:
+            __exit_with_error(e)
+
+    elif args.cmd == 'server-stop':
+        try:
+            result = tiflash.stop_server(**session_args)
+            print(result)
+        except Exception as e:
+            __exit_with_error(e)
+
+
+def handle_farm(args):
+    """Helper function for handling 'farm' command"""
+    session_args = get_session_args(args)
+    boards = list(args.boards)
+    options = dict()
+
+    # A board given with the session args is flashed as well
+    for key in ('serno', 'ccxml'):
+        if key in session_args.keys():
+            boards.append(session_args.pop(key))
+
+    if args.boards_file:
+        try:
+            with open(args.boards_file, 'r') as f:
+                boards.extend([l.strip() for l in f if l.strip()])
+        except IOError as e:
+            __exit_with_error(e)
+
+    if args.options:
+        for opt in args.options:
+            option_id = opt[0]
+            option_value = opt[1]
+
+            options.update({option_id: option_value})
+
+    if len(options) == 0:
+        options = None
+
+    from tiflash import farm    # only needed by this command
+
+    try:
+        sector_size = int(args.sector_size, 0) if args.sector_size else None
+        results = farm.flash(args.image, boards, workers=args.workers,
+                             binary=args.bin, address=args.address,
+                             options=options, skip_if_same=args.skip_if_same,
+                             confirm_same=args.confirm_same,
+                             delta=args.delta,
+                             sector_size=sector_size,
+                             **session_args)
+    except Exception as e:
+        __exit_with_error(e)
+
+    failed = 0
+    for result in results:
+        if result['success']:
+            print("%s: True" % result['board'])
+        else:
+            failed += 1
+            print("%s: %s" % (result['board'], result['error'] or False))
+
+    if failed:
+        __exit_with_error("%d of %d boards failed" % (failed, len(results)))
+
+
 def handle_detect(args):
     """Helper function for handling 'detect' command"""
     session_args = get_session_args(args)
@@ -459,6 +616,37 @@ def main(args=None):
     if not args:
         args = parse_args()
 
+    if getattr(args, 'profile', False):
+        __profile(handle_cmd, args)
+    else:
+        handle_cmd(args)
+
+
+def __profile(handler, args):
+    """Runs handler(args) and prints the timings (spans) of the run as JSON to
+    stderr (--profile)
+
+    Args:
+        handler (callable): function handling the command
+        args (argparse.namespace): arguments to pass to handler
+    """
+    from tiflash.utils import trace
+
+    spans = list()
+    trace.add_hook(spans.append)
+    try:
+        handler(args)
+    finally:
+        trace.remove_hook(spans.append)
+        sys.stderr.write(json.dumps({'spans': spans}, indent=2) + "\n")
+
+
+def handle_cmd(args):
+    """Runs the command given in args
+
+    Args:
+        args (argparse.namespace): parsed arguments
+    """
     # Options
     if args.cmd == 'options-get' \
         or args.cmd == 'options-set' \
@@ -487,7 +675,8 @@ def main(args=None):
 
     # Memory
     elif args.cmd == 'memory-read' \
-        or args.cmd == 'memory-write':
+        or args.cmd == 'memory-write' \
+        or args.cmd == 'memory-dump':
         handle_memory(args)
 
     # Register
@@ -509,6 +698,15 @@ def main(args=None):
         or args.cmd == 'xds110-list':
         handle_xds110(args)
 
+    # DSS Server
+    elif args.cmd == 'server-start' \
+        or args.cmd == 'server-stop':
+        handle_server(args)
+
+    # Farm
+    elif args.cmd == 'farm-flash':
+        handle_farm(args)
+
     # Detect
     elif args.cmd == 'detect':
         handle_detect(args)
@@ -15,6 +15,7 @@ from tiflash.utils import devices
 from tiflash.utils import dss
 from tiflash.utils import xds110
 from tiflash.utils import detect
+from tiflash.utils import trace
 
 
 class TIFlashAPIError(TIFlashError):
@@ -38,6 +39,7 @@ def __get_cpu_from_ccxml(ccxml_path, ccs_path):
     return cpu
 
 
+@trace.traced("api.handle_ccs")
 def __handle_ccs(ccs):
     """Takes either ccs version number or path to custom ccs installation and
     verifies and returns the path to the ccs installation
@@ -183,6 +185,7 @@ def __handle_ccxml_args(ccs_path, ccxml=None, serno=None,
 
 
 
+@trace.traced("api.handle_ccxml")
 def __handle_ccxml(ccs_path, ccxml=None, serno=None, devicetype=None,
                     connection=None, fresh=False, debug=False):
     """Takes ccxml args and returns a corresponding ccxml file.
@@ -250,6 +253,7 @@ def __handle_ccxml(ccs_path, ccxml=None, serno=None, devicetype=None,
     return ccxml_path
 
 
+@trace.traced("api.handle_session")
 def __handle_session(ccs_path, chip=None, timeout=None, devicetype=None,
                      ccxml=None, connection=None, serno=None, debug=False,
                      fresh=False, attach=False):
@@ -308,6 +312,7 @@ def __handle_session(ccs_path, chip=None, timeout=None, devicetype=None,
     return flash
 
 
+@trace.traced("api.get_connections")
 def get_connections(ccs=None, search=None):
     """Gets list of all connections installed on machine (ccs installation)
 
@@ -332,6 +337,7 @@ def get_connections(ccs=None, search=None):
     return connection_list
 
 
+@trace.traced("api.get_devicetypes")
 def get_devicetypes(ccs=None, search=None):
     """Gets list of all devicetypes installed on machine (ccs installation)
 
@@ -355,6 +361,7 @@ def get_devicetypes(ccs=None, search=None):
     return device_list
 
 
+@trace.traced("api.get_cpus")
 def get_cpus(ccs=None, search=None):
     """Gets list of all cpus installed on machine (ccs installation)
 
@@ -378,6 +385,7 @@ def get_cpus(ccs=None, search=None):
     return cpu_list
 
 
+@trace.traced("api.list_options")
 def list_options(option_id=None, ccs=None, **session_args):
     """"Gets all options for the session device.
 
@@ -402,14 +410,8 @@ def list_options(option_id=None, ccs=None, **session_args):
     dev_prop_xml = flash_properties.get_device_properties_xml(devicetype, ccs_path)
     gen_prop_xml = flash_properties.get_generic_properties_xml(ccs_path)
 
-    property_elements = flash_properties.get_property_elements(dev_prop_xml)
-    property_elements.extend(flash_properties.get_property_elements(gen_prop_xml, target="generic"))
-
-    # Convert elements to dictionaries
-    options = dict()
-    for opt in property_elements:
-        opt_dict = flash_properties.parse_property_element(opt)
-        options.update(opt_dict)
+    options = flash_properties.get_options(dev_prop_xml)
+    options.update(flash_properties.get_options(gen_prop_xml, target="generic"))
 
     # Filter options to only option_id if provided
     if option_id:
@@ -421,6 +423,7 @@ def list_options(option_id=None, ccs=None, **session_args):
     return options
 
 
+@trace.traced("api.print_options")
 def print_options(option_id=None, ccs=None, **session_args):
     """"Prints all available options for the session device.
 
@@ -436,6 +439,7 @@ def print_options(option_id=None, ccs=None, **session_args):
     flash.print_options(option_id=option_id)
 
 
+@trace.traced("api.get_bool_option")
 def get_bool_option(option_id, pre_operation=None, ccs=None,
                     **session_args):
     """Reads and returns the boolean value of the option_id.
@@ -463,6 +467,7 @@ def get_bool_option(option_id, pre_operation=None, ccs=None,
     return bool_val
 
 
+@trace.traced("api.get_float_option")
 def get_float_option(option_id, pre_operation=None, ccs=None,
                      **session_args):
     """Reads and returns the float value of the option_id.
@@ -490,6 +495,7 @@ def get_float_option(option_id, pre_operation=None, ccs=None,
     return float_val
 
 
+@trace.traced("api.get_option")
 def get_option(option_id, pre_operation=None, ccs=None,
                **session_args):
     """Reads and returns the value of the option_id.
@@ -517,6 +523,7 @@ def get_option(option_id, pre_operation=None, ccs=None,
     return option_val
 
 
+@trace.traced("api.set_option")
 def set_option(option_id, option_val, post_operation=None, ccs=None,
                **session_args):
     """Sets the value of the option_id.
@@ -546,6 +553,7 @@ def set_option(option_id, option_val, post_operation=None, ccs=None,
 
 
 
+@trace.traced("api.reset")
 def reset(options=None, ccs=None, **session_args):
     """Performs a Board Reset on device
 
@@ -567,6 +575,7 @@ def reset(options=None, ccs=None, **session_args):
     return flash.reset(options)
 
 
+@trace.traced("api.erase")
 def erase(options=None, ccs=None, **session_args):
     """Erases device; setting 'options' before erasing device
 
@@ -591,8 +600,10 @@ def erase(options=None, ccs=None, **session_args):
     return flash.erase(options)
 
 
+@trace.traced("api.verify")
 def verify(image, binary=False, address=None, options=None, ccs=None,
-           **session_args):
+           fast=False, checksum_only=False, crc_expr=None,
+           crc_symbol_file=None, **session_args):
     """Verifies device; setting 'options' before erasing device
 
     Args:
@@ -603,6 +614,15 @@ def verify(image, binary=False, address=None, options=None, ccs=None,
             {option_id: option_val}; These options are set first before
             calling verify function.
         ccs (str): version number of CCS to use or path to custom installation
+        fast (bool): reads back the image's address ranges in bulk and
+            compares them against the image in python (see TIFlash.verify)
+        checksum_only (bool): compares the CRC32 of each segment instead of
+            its bytes
+        crc_expr (str): expression returning the CRC32 of a memory range on
+            the target, formatted with 'address' and 'size' (checksum_only;
+            default computes the CRC32 of the bytes read back)
+        crc_symbol_file (str): .out or GEL symbol file to load before
+            evaluating 'crc_expr'
         session_args (**dict): keyword arguments containing settings for
             the device connection
 
@@ -610,27 +630,56 @@ def verify(image, binary=False, address=None, options=None, ccs=None,
         bool: Result of verify operation (success/failure)
 
     Raises:
-        TIFlashError: raises error if option invalid
+        TIFlashError: raises error if option invalid or (fast verify) the
+            first differing address of each segment that does not match
     """
     ccs_path = __handle_ccs(ccs)
 
     flash = __handle_session(ccs_path, **session_args)
 
-    return flash.verify(image, binary=binary, address=address, options=options)
+    return flash.verify(image, binary=binary, address=address, options=options,
+                        fast=fast, checksum_only=checksum_only,
+                        crc_expr=crc_expr, crc_symbol_file=crc_symbol_file)
 
 
+@trace.traced("api.flash")
 def flash(image, binary=False, address=None, options=None, ccs=None,
+          skip_if_same=False, confirm_same=False, delta=False,
+          sector_size=None, crc_expr=None, crc_symbol_file=None,
           **session_args):
     """Flashes device; setting 'options' before flashing device
 
+    Several images can be flashed in one multiload session by passing a list
+    of images. Each image in the list is either a path or a dict of the
+    format {'image': str, 'binary': bool, 'address': int}.
+
+    Example:
+        flash(["boot.out", "app.out",
+               {'image': "cal.bin", 'binary': True, 'address': 0x3F000}],
+              serno="L4000CE")
+
     Args:
-        image (str): path to image to use for flashing
+        image (str or list): path to image to use for flashing or list of
+            images to flash
         binary (bool): flashes image as binary if True
         address(int): offset address to flash image
         options (dict): dictionary of options in the format
             {option_id: option_val}; These options are set first before
             calling flash function.
         ccs (str): version number of CCS to use or path to custom installation
+        skip_if_same (bool): skips flashing if the device was last flashed
+            with the same image (and options) by tiflash
+        confirm_same (bool): before skipping, reads back a small region of
+            the image from the device to confirm it holds the image
+        delta (bool): only flashes the sectors that differ from the device's
+            memory (see TIFlash.flash)
+        sector_size (int): size of a flash sector in bytes (delta only;
+            default is 4 KB)
+        crc_expr (str): expression returning the CRC32 of a memory range on
+            the target, formatted with 'address' and 'size' (delta only;
+            default reads the memory back)
+        crc_symbol_file (str): .out or GEL symbol file to load before
+            evaluating 'crc_expr'
         session_args (**dict): keyword arguments containing settings for
             the device connection
 
@@ -644,36 +693,51 @@ def flash(image, binary=False, address=None, options=None, ccs=None,
 
     flash = __handle_session(ccs_path, **session_args)
 
-    return flash.flash(image, binary=binary, address=address, options=options)
+    delta_args = dict()
+    if sector_size is not None:
+        delta_args['sector_size'] = sector_size
+
+    return flash.flash(image, binary=binary, address=address, options=options,
+                       skip_if_same=skip_if_same, confirm_same=confirm_same,
+                       delta=delta, crc_expr=crc_expr,
+                       crc_symbol_file=crc_symbol_file, **delta_args)
 
 
-def memory_read(address, num_bytes=1, page=0, ccs=None, **session_args):
+@trace.traced("api.memory_read")
+def memory_read(address, num_bytes=1, page=0, raw=False, ccs=None,
+                **session_args):
     """Reads specified bytes from memory
 
     Args:
         address (long): memory address to read from
         num_bytes (int): number of bytes to read
         page (int, optional): page number to read memory from
+        raw (bool, optional): transfers the bytes in binary and returns them
+            as bytes; much faster for large reads
         ccs (str): version number of CCS to use or path to custom installation
         session_args (**dict): keyword arguments containing settings for
             the device connection
 
     Returns:
-        list: Returns list of bytes read from memory
+        list or bytes: Returns list of bytes read from memory, or the bytes in
+        address order if 'raw' is set
     """
     ccs_path = __handle_ccs(ccs)
 
     flash = __handle_session(ccs_path, **session_args)
 
-    return flash.memory_read(address, num_bytes, page)
+    return flash.memory_read(address, num_bytes, page, raw=raw)
 
 
+@trace.traced("api.memory_write")
 def memory_write(address, data, page=0, ccs=None, **session_args):
     """Writes specified data to memory
 
     Args:
         address (long): memory address to read from
-        data (list): list of bytes to write to memory
+        data (list or bytes-like): list of bytes to write to memory or any
+            object supporting the buffer protocol (bytes, bytearray,
+            memoryview, array, ...); the latter is transferred in binary
         page (int, optional): page number to read memory from
         ccs (str): version number of CCS to use or path to custom installation
         session_args (**dict): keyword arguments containing settings for
@@ -686,9 +750,47 @@ def memory_write(address, data, page=0, ccs=None, **session_args):
 
     flash = __handle_session(ccs_path, **session_args)
 
-    flash.memory_write(address, data, page=0)
+    flash.memory_write(address, data, page=page)
 
 
+@trace.traced("api.memory_dump")
+def memory_dump(address, length, out_path, chunk_size=None, progress=None,
+                resume=False, page=0, ccs=None, **session_args):
+    """Dumps a range of memory to a (raw binary) file, chunk by chunk
+
+    Args:
+        address (long): memory address of start of range to dump
+        length (int): number of bytes to dump
+        out_path (str): path of file to dump memory to
+        chunk_size (int, optional): number of bytes to read at once
+        progress (callable, optional): function called as
+            progress(bytes_dumped, length) after each chunk
+        resume (bool, optional): resumes a partial dump in 'out_path'
+            instead of overwriting it
+        page (int, optional): page number to read memory from
+        ccs (str): version number of CCS to use or path to custom installation
+        session_args (**dict): keyword arguments containing settings for
+            the device connection
+
+    Returns:
+        int: number of bytes dumped (not including bytes of a resumed dump)
+
+    Raises:
+        TIFlashError: raises error when memory read error received
+    """
+    ccs_path = __handle_ccs(ccs)
+
+    flash = __handle_session(ccs_path, **session_args)
+
+    dump_args = dict()
+    if chunk_size is not None:
+        dump_args['chunk_size'] = chunk_size
+
+    return flash.memory_dump(address, length, out_path, progress=progress,
+                             resume=resume, page=page, **dump_args)
+
+
+@trace.traced("api.register_read")
 def register_read(regname, ccs=None, **session_args):
     """Reads specified register of device
 
@@ -711,6 +813,7 @@ def register_read(regname, ccs=None, **session_args):
     return flash.register_read(regname)
 
 
+@trace.traced("api.register_write")
 def register_write(regname, value, ccs=None, **session_args):
     """Writes a value to specified register of device
 
@@ -731,6 +834,7 @@ def register_write(regname, value, ccs=None, **session_args):
     return flash.register_write(regname, value)
 
 
+@trace.traced("api.evaluate")
 def evaluate(expr, symbol_file=None, ccs=None, **session_args):
     """Evaluates the given C/GEL expression
 
@@ -754,6 +858,7 @@ def evaluate(expr, symbol_file=None, ccs=None, **session_args):
     return flash.evaluate(expr, symbol_file=symbol_file)
 
 
+@trace.traced("api.attach")
 def attach(ccs=None, **session_args):
     """Attach command; opens a CCS session and attaches to device.
 
@@ -775,6 +880,7 @@ def attach(ccs=None, **session_args):
     flash.nop()
 
 
+@trace.traced("api.nop")
 def nop(ccs=None, **session_args):
     """No-op command. This essentially just calls the dss with the provided
     session args.
@@ -794,6 +900,94 @@ def nop(ccs=None, **session_args):
     flash.nop()
 
 
+@trace.traced("api.pipeline")
+def pipeline(steps, ccs=None, **session_args):
+    """Runs several operations one after another using a single DSS
+    invocation and Debug Server Session (instead of one per operation).
+
+    Each step is either the name of an operation or a tuple of
+    (operation, kwargs) where kwargs are the keyword arguments of the tiflash
+    function of the same name (without session args). Supported operations
+    are: reset, erase, verify, flash, memory_read, memory_write,
+    register_read, register_write and evaluate.
+
+    Example:
+        tiflash.pipeline(['erase', ('flash', {'image': 'app.out'}),
+                          ('verify', {'image': 'app.out'}), 'reset'],
+                         serno="L4000CE")
+
+    Args:
+        steps (list): ordered list of steps to run; steps after a failed step
+            are not run
+        ccs (str): version number of CCS to use or path to custom installation
+        session_args (**dict): keyword arguments containing settings for
+            the device connection
+
+    Returns:
+        list: one dict per step of the format {'op': str, 'success': bool,
+        'result': value, 'error': str}
+
+    Raises:
+        TIFlashError: raises error if a step is invalid or the session could
+            not be started
+    """
+    ccs_path = __handle_ccs(ccs)
+
+    flash = __handle_session(ccs_path, **session_args)
+
+    return flash.batch(steps)
+
+
+@trace.traced("api.start_server")
+def start_server(max_sessions=None, idle_timeout=None, ccs=None, debug=False,
+                 **ignored):
+    """Starts a DSS server that keeps the Debug Server running.
+
+    While the server is running, all commands for this CCS installation are
+    sent to the server instead of starting a new DSS process (JVM) for each
+    command. The server keeps debug sessions open (keyed by ccxml and chip),
+    so back-to-back commands on the same device do not reconnect.
+
+    Args:
+        max_sessions (int, optional): max number of debug sessions kept open
+        idle_timeout (int, optional): seconds an unused debug session is kept
+            open before it is closed
+        ccs (str): version number of CCS to use or path to custom installation
+        debug (bool): option to display all output of the DSS server
+
+    Returns:
+        int: port the DSS server is listening on
+
+    Raises:
+        TIFlashError: raises error if DSS server could not be started
+    """
+    ccs_path = __handle_ccs(ccs)
+
+    flash = TIFlash(ccs_path)
+    flash.set_debug(on=debug)
+
+    return flash.start_server(max_sessions=max_sessions,
+                              idle_timeout=idle_timeout)
+
+
+@trace.traced("api.stop_server")
+def stop_server(ccs=None, **ignored):
+    """Stops the DSS server started with start_server().
+
+    Args:
+        ccs (str): version number of CCS to use or path to custom installation
+
+    Returns:
+        bool: True if a running server was stopped; False otherwise
+    """
+    ccs_path = __handle_ccs(ccs)
+
+    flash = TIFlash(ccs_path)
+
+    return flash.stop_server()
+
+
+@trace.traced("api.xds110_reset")
 def xds110_reset(ccs=None, **session_args):
     """Calls xds110reset command on specified serno.
 
@@ -820,6 +1014,7 @@ def xds110_reset(ccs=None, **session_args):
 
 
 
+@trace.traced("api.xds110_list")
 def xds110_list(ccs=None, **session_args):
     """Returns list of sernos and xds110 version numbers of connected XDS110 devices.
 
@@ -839,6 +1034,7 @@ def xds110_list(ccs=None, **session_args):
     return xds110.xds110_list(ccs_path)
 
 
+@trace.traced("api.xds110_upgrade")
 def xds110_upgrade(ccs=None, **session_args):
     """Upgrades/Flashes XDS110 firmware on board.
 
@@ -867,6 +1063,7 @@ def xds110_upgrade(ccs=None, **session_args):
 
     return xds110.xds110_upgrade(ccs_path, serno=ccxml_args['serno'])
 
+@trace.traced("api.detect_devices")
 def detect_devices(ccs=None, **session_args):
     """Detect devices connected to machine.
 
@@ -878,20 +1075,34 @@ def detect_devices(ccs=None, **session_args):
     device_list = list()
     detected_devices = detect.detect_devices()
 
+    try:
+        devicetype_xmls = devices.get_device_xmls_from_sernos(
+            [serno for vid, pid, serno in detected_devices], ccs_path)
+    except devices.DeviceError:
+        devicetype_xmls = dict()
+
+    connection_names = dict()   # connection xml: connection name
+
     for vid, pid, serno in detected_devices:
         try:
             connection_xml = connections.get_connection_xml_from_vidpid(
                 vid, pid, ccs_path)
-            connection = connections.get_connection_name(connection_xml)
+            if connection_xml is None:
+                continue    # connection is not installed
+            if connection_xml not in connection_names.keys():
+                connection_names[connection_xml] = \
+                    connections.get_connection_name(connection_xml)
+            connection = connection_names[connection_xml]
         except connections.ConnectionsError:
             continue # only include TI Devices
 
-        try:
-            devicetype_xml = devices.get_device_xml_from_serno(
-                                                    serno, ccs_path)
-            devicetype = devices.get_devicetype(devicetype_xml)
-        except devices.DeviceError:
-            devicetype = None
+        devicetype = None
+        devicetype_xml = devicetype_xmls.get(serno)
+        if devicetype_xml is not None:
+            try:
+                devicetype = devices.get_devicetype(devicetype_xml)
+            except devices.DeviceError:
+                pass
 
         dev = { 'connection': connection,
                 'devicetype': devicetype,
@@ -901,6 +1112,7 @@ def detect_devices(ccs=None, **session_args):
 
     return device_list
 
+@trace.traced("api.get_info")
 def get_info(ccs=None, **session_args):
     """Returns dict of information regarding tiflash environment
 
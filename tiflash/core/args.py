@@ -59,6 +59,8 @@ SessionParser.add_argument('-D', '--debug', action='store_true',
                            help='Display debugging output')
 SessionParser.add_argument('-A', '--attach', action='store_true',
                            help='Attach CCS to Device after performing action')
+SessionParser.add_argument('--profile', action='store_true',
+                           help='Print timings of command as JSON to stderr')
 
 
 # Option Parser - used for getting/setting options
@@ -117,6 +119,17 @@ VerifyParser = argparse.ArgumentParser(add_help=False)
 VerifyParser.add_argument('image', metavar='image', nargs=1, help='''Image to verify.''')
 VerifyParser.add_argument('-b', '--bin', action='store_true',
                          help='Specify if image is a binary image')
+VerifyParser.add_argument('-a', '--address', metavar='address',
+                         help='Address binary image was flashed at')
+VerifyParser.add_argument('--fast', action='store_true',
+                         help='''Read back image's memory and compare it in
+                         python (reports first differing address)''')
+VerifyParser.add_argument('--checksum-only', action='store_true',
+                         help='Only compare the CRC32 of each segment')
+VerifyParser.add_argument('--crc-expr', metavar='expression',
+                         help='''Expression returning the CRC32 of
+                         {address} {size} on the target (implies
+                         --checksum-only)''')
 #VerifyParser.add_argument('-i', '--image', action='append', metavar='image',
 #                          help='Image to verify can repeat -i/--image command')
 VerifyParser.add_argument('-o', '--option', nargs=2, action='append',
@@ -126,7 +139,11 @@ VerifyParser.add_argument('-o', '--option', nargs=2, action='append',
 
 # Flash Parser
 FlashParser = argparse.ArgumentParser(add_help=False)
-FlashParser.add_argument('images', metavar='image', nargs=1, help='''Image to flash.''')
+FlashParser.add_argument('images', metavar='image', nargs='+',
+                         help='''Image(s) to flash (several images are
+                         flashed in one multiload session). Append
+                         @address to flash an image as binary at address
+                         (i.e. cal.bin@0x3F000)''')
 FlashParser.add_argument('-b', '--bin', action='store_true',
                          help='Specify if image(s) are binary images')
 FlashParser.add_argument('-a', '--address', metavar='address',
@@ -134,6 +151,21 @@ FlashParser.add_argument('-a', '--address', metavar='address',
 FlashParser.add_argument('-o', '--option', nargs=2, action='append',
                          dest='options', metavar=('optionID', 'optionValue'),
                          help='sets an option before running flash cmd')
+FlashParser.add_argument('--skip-if-same', action='store_true',
+                         help='''Skip flashing if device was last flashed with
+                         the same image''')
+FlashParser.add_argument('--confirm-same', action='store_true',
+                         help='''Read back part of image from device before
+                         skipping (use with --skip-if-same)''')
+FlashParser.add_argument('--delta', action='store_true',
+                         help='''Only flash the sectors that differ from the
+                         device's memory''')
+FlashParser.add_argument('--sector-size', metavar='size',
+                         help='Size of a flash sector (use with --delta)')
+FlashParser.add_argument('--crc-expr', metavar='expression',
+                         help='''Expression returning the CRC32 of
+                         {address} {size} on the target (use with --delta;
+                         default reads memory back)''')
 
 # Memory Read Parser
 MemoryReadParser = argparse.ArgumentParser(add_help=False)
@@ -154,6 +186,22 @@ MemoryWriteParser.add_argument('-d', '--data', nargs='+', required=True,
                             help="""Bytes (hex) to write to memory.
                             Each byte separated by a space""")
 
+# Memory Dump Parser
+MemoryDumpParser = argparse.ArgumentParser(add_help=False)
+MemoryDumpParser.add_argument('address',
+                            help="Address in memory of start of range to dump")
+MemoryDumpParser.add_argument('length', help="Number of bytes to dump")
+MemoryDumpParser.add_argument('-o', '--output', required=True,
+                            help="File to dump memory to (raw binary)")
+MemoryDumpParser.add_argument('-p', '--page', default=0,
+                            help="Page number in memory to access address")
+MemoryDumpParser.add_argument('-c', '--chunk-size', default=None,
+                            help="Number of bytes to read at once")
+MemoryDumpParser.add_argument('-r', '--resume', action='store_true',
+                            help="Resume a partial dump in output file")
+MemoryDumpParser.add_argument('--progress', action='store_true',
+                            help="Displays progress of dump")
+
 # Register Read Parser
 RegisterReadParser = argparse.ArgumentParser(add_help=False)
 RegisterReadParser.add_argument('regname', help="Name of register to read.")
@@ -186,6 +234,47 @@ XDS110UpgradeParser = argparse.ArgumentParser(add_help=False)
 # XDS110List Parser
 XDS110ListParser = argparse.ArgumentParser(add_help=False)
 
+# ServerStart Parser
+ServerStartParser = argparse.ArgumentParser(add_help=False)
+ServerStartParser.add_argument('--max-sessions', type=int, default=None,
+                            help="Max number of debug sessions kept open")
+ServerStartParser.add_argument('--idle-timeout', type=int, default=None,
+                            help="""Seconds an unused debug session is kept
+                            open""")
+
+# ServerStop Parser
+ServerStopParser = argparse.ArgumentParser(add_help=False)
+
+# FarmFlash Parser
+FarmFlashParser = argparse.ArgumentParser(add_help=False)
+FarmFlashParser.add_argument('image', metavar='image', help="Image to flash.")
+FarmFlashParser.add_argument('-B', '--boards', nargs='+', default=list(),
+                         metavar='board',
+                         help="Serial numbers or ccxml files of boards to flash")
+FarmFlashParser.add_argument('-f', '--boards-file', metavar='file',
+                         help="""File listing boards to flash (one serial
+                         number or ccxml file per line)""")
+FarmFlashParser.add_argument('-w', '--workers', type=int, default=None,
+                         help="Number of boards to flash at once")
+FarmFlashParser.add_argument('-b', '--bin', action='store_true',
+                         help='Specify if image is a binary image')
+FarmFlashParser.add_argument('-a', '--address', metavar='address',
+                         help='Address to begin flashing image')
+FarmFlashParser.add_argument('-o', '--option', nargs=2, action='append',
+                         dest='options', metavar=('optionID', 'optionValue'),
+                         help='sets an option before running flash cmd')
+FarmFlashParser.add_argument('--skip-if-same', action='store_true',
+                         help='''Skip boards that were last flashed with the
+                         same image''')
+FarmFlashParser.add_argument('--confirm-same', action='store_true',
+                         help='''Read back part of image from board before
+                         skipping it (use with --skip-if-same)''')
+FarmFlashParser.add_argument('--delta', action='store_true',
+                         help='''Only flash the sectors that differ from each
+                         board's memory''')
+FarmFlashParser.add_argument('--sector-size', metavar='size',
+                         help='Size of a flash sector (use with --delta)')
+
 # Detect Parser
 DetectParser = argparse.ArgumentParser(add_help=False)
 
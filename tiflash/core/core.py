@@ -1,10 +1,21 @@
 import os
+import json
+import tempfile
+import threading
 
+from tiflash import image as timage
 from tiflash.utils import dss
 from tiflash.utils import ccxml
 from tiflash.utils import ccs
+from tiflash.utils import xmlhelper
+from tiflash.utils import trace
+from tiflash.utils import flash_state
+from tiflash.utils import delta
+from tiflash.utils import verify
 
 CMD_DEFAULT_TIMEOUT = 60
+BATCH_SKIPPED_MSG = "Not run (a previous step failed)"
+MEMORY_DUMP_CHUNK_SIZE = 0x10000    # bytes read at once by memory_dump
 
 class TIFlashError(Exception):
     """Generic TI Flash error"""
@@ -28,7 +39,7 @@ class TIFlash(object):
         self.timeout = CMD_DEFAULT_TIMEOUT
         self.args = dict()
 
-    def __run_cmd(self, args):
+    def __run_cmd(self, args, progress=None):
         """PRIVATE FUNCTION: Runs dss cmd script with given arguments
 
         This function should be called by wrapper functions that are specific
@@ -37,6 +48,8 @@ class TIFlash(object):
         Args:
             args (dict): argument dictionary to use (often a copy of self.args
             with function specific args added)
+            progress (callable, optional): function called with each progress
+                update (str) posted by the command
 
         Returns:
             (bool, str): returns a tuple of format (result, msg) where result
@@ -46,12 +59,52 @@ class TIFlash(object):
         """
         arg_list = dss.format_args(args)
 
-        (retcode, retval) = dss.call_dss(self.dss_path, arg_list,
-                                        workspace=self.workspace,
-                                        timeout=self.timeout)
+        with trace.span("core.run_cmd", commands=sorted(args.keys())) as span:
+            (retcode, retval) = dss.call_dss(self.dss_path, arg_list,
+                                            workspace=self.workspace,
+                                            timeout=self.timeout,
+                                            progress=progress)
+            if span is not None:
+                span.set(success=retcode)
 
         return (retcode, retval)
 
+    def start_server(self, max_sessions=None, idle_timeout=None):
+        """Starts a DSS server for this object's CCS installation.
+
+        While the server is running, commands are sent to it instead of
+        starting a new DSS process for every command.
+
+        Args:
+            max_sessions (int, optional): max number of debug sessions the
+                server keeps open (connected)
+            idle_timeout (int, optional): seconds an unused debug session is
+                kept open
+
+        Returns:
+            int: port the DSS server is listening on
+
+        Raises:
+            TIFlashError: raises error if DSS server could not be started
+        """
+        try:
+            port = dss.start_server(self.dss_path, workspace=self.workspace,
+                                    debug=('debug' in self.args.keys()),
+                                    max_sessions=max_sessions,
+                                    idle_timeout=idle_timeout)
+        except dss.DSSError as e:
+            raise TIFlashError(e)
+
+        return port
+
+    def stop_server(self):
+        """Stops the DSS server for this object's CCS installation.
+
+        Returns:
+            bool: True if a running server was stopped; False otherwise
+        """
+        return dss.stop_server(self.dss_path)
+
     def set_debug(self, on=True):
         """Turns debug mode on/off for dss calls.
 
@@ -162,11 +215,13 @@ class TIFlash(object):
         self.set_ccxml(ccxml_path)
         self.set_chip(chip)
 
+    @trace.traced("core.generate_ccxml")
     def generate_ccxml(self, connection, devicetype, serno=None):
         """Generates a ccxml given the serial number, connection type, and
         devicetype.
 
-        Generates a ccxml with javascript using the given connection type
+        Generates the ccxml from the TargetDB xmls in python. If that fails,
+        generates a ccxml with javascript using the given connection type
         and devicetype, then uses python to modify and add the serial number
 
         Args:
@@ -193,6 +248,12 @@ class TIFlash(object):
         ccxml_path = "%s/%s" % (ccxml_directory, ccxml_name)
         ccxml_path = os.path.normpath(ccxml_path)
 
+        try:    # Generating without DSS is much faster when it works
+            return ccxml.generate_ccxml(ccxml_path, connection, devicetype,
+                                        self.ccs_path, serno=serno)
+        except ccxml.CCXMLError:
+            pass
+
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
         # Add genccxml args to self.args
@@ -202,6 +263,7 @@ class TIFlash(object):
         if not code or not os.path.exists(ccxml_path):
             raise TIFlashError(msg)
             #raise TIFlashError("Could not successfully generate ccxml file")
+        xmlhelper.invalidate_xml_cache(ccxml_path)
 
         # Add serial number to ccxml file
         if serno:
@@ -426,7 +488,7 @@ class TIFlash(object):
 
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['reset'] = True
+        args.update(self.__get_reset_args())
 
         (code, result) = self.__run_cmd(args)
 
@@ -457,13 +519,16 @@ class TIFlash(object):
             TIFlashError: raises error if option invalid
         """
 
+        # Board no longer holds the last flashed image
+        self.__forget_flash_state()
+
         # Set options before calling erase()
         if options is not None:
             self.set_options(options)
 
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['erase'] = True
+        args.update(self.__get_erase_args())
 
         # call erase()
         (code, result) = self.__run_cmd(args)
@@ -480,9 +545,15 @@ class TIFlash(object):
         else:
             return True
 
-    def verify(self, image, binary=False, address=None, options=None):
+    def verify(self, image, binary=False, address=None, options=None,
+               fast=False, checksum_only=False, crc_expr=None,
+               crc_symbol_file=None):
         """Verifies device; setting 'options' before erasing device
 
+        With 'fast' (or 'checksum_only'/'crc_expr'), the image is verified in
+        python instead of by DSS (see verify_segments); images tiflash.image can not
+        parse (i.e. COFF) are verified by DSS.
+
         Args:
             image (str): path to image to use for verifying
             binary (bool): verifies image as binary if True
@@ -490,30 +561,45 @@ class TIFlash(object):
             options (dict): dictionary of options in the format
                 {option_id: option_val}; These options are set first before
                 calling verify function.
+            fast (bool): reads back the image's address ranges in bulk and
+                compares them against the image in python
+            checksum_only (bool): compares the CRC32 of each segment instead
+                of its bytes
+            crc_expr (str): expression returning the CRC32 of a memory range
+                on the target (checksum_only; default computes the CRC32 of
+                the bytes read back)
+            crc_symbol_file (str): .out or GEL symbol file to load before
+                evaluating 'crc_expr'
 
         Returns:
             bool: Result of verify operation (success/failure)
 
         Raises:
-            TIFlashError: raises error if option invalid
+            TIFlashError: raises error if option invalid or the device does
+                not match the image
         """
 
-        verify_args = {'image': os.path.abspath(image)}
-        if binary:
-            verify_args['bin'] = True
-        if address:
-            verify_args['address'] = str(address)
-
         # Set options before calling verify()
         if options is not None:
             self.set_options(options)
 
-        # Make a copy of self.args so we are not modifying directly
-        args = self.args.copy()
-        args['verify'] = verify_args
+        segments = None
+        if fast or checksum_only or crc_expr is not None:
+            segments = self.__get_image_segments(image, binary, address)
 
-        # call verify()
-        (code, result) = self.__run_cmd(args)
+        if segments is not None:
+            results = self.__verify_segments(segments, checksum_only,
+                                             crc_expr, crc_symbol_file)
+            failed = [r for r in results if not r['success']]
+            (code, result) = (len(failed) == 0,
+                              verify.format_mismatches(failed))
+        else:
+            # Make a copy of self.args so we are not modifying directly
+            args = self.args.copy()
+            args.update(self.__get_verify_args(image, binary, address))
+
+            # call verify()
+            (code, result) = self.__run_cmd(args)
 
         # Unset options so they do not persist
         if options is not None:
@@ -527,43 +613,240 @@ class TIFlash(object):
         else:
             return True
 
-    def flash(self, image, binary=False, address=None, options=None):
+    def verify_segments(self, image, binary=False, address=None,
+                        checksum_only=False, crc_expr=None,
+                        crc_symbol_file=None):
+        """Verifies each segment of an image against the device's memory in
+        python.
+
+        The image's address ranges are read back in bulk (one read per
+        range) and compared chunk by chunk against the image's segments.
+        With 'checksum_only' only the CRC32 of each segment is compared;
+        with 'crc_expr' the device's CRC32 is computed on the target and no
+        memory is read back.
+
+        Args:
+            image (str): path to image to verify (ELF, Intel HEX, TI-TXT or
+                binary)
+            binary (bool): verifies image as binary if True
+            address(int): offset address to verify binary image
+            checksum_only (bool): compares the CRC32 of each segment instead
+                of its bytes
+            crc_expr (str): expression returning the CRC32 of a memory range
+                on the target, formatted with 'address' and 'size' (i.e.
+                "crc32({address}, {size})"); implies 'checksum_only'
+            crc_symbol_file (str): .out or GEL symbol file to load before
+                evaluating 'crc_expr'
+
+        Returns:
+            list: one dict per segment of the format {'address': int,
+            'size': int, 'success': bool, 'mismatch': int}, where 'mismatch'
+            is the first differing address (None if the segment matches or
+            only checksums were compared)
+
+        Raises:
+            TIFlashError: raises error if the image can not be parsed or the
+                memory can not be read
+        """
+        segments = self.__get_image_segments(image, binary, address)
+        if segments is None:
+            raise TIFlashError("Could not parse image: %s" % image)
+
+        return self.__verify_segments(segments, checksum_only, crc_expr,
+                                      crc_symbol_file)
+
+    def __get_image_segments(self, image, binary=False, address=None):
+        """Returns (address, bytes) of each (non empty) segment of an image;
+        None if the image can not be parsed"""
+        try:
+            with timage.load(image, binary=binary, address=address) as img:
+                return [(img.addresses[i], img.get_data(i))
+                        for i in range(len(img)) if img.sizes[i] > 0]
+        except timage.ImageError:
+            return None
+
+    def __verify_segments(self, segments, checksum_only=False, crc_expr=None,
+                          crc_symbol_file=None):
+        """Returns verify results of segments (see verify_segments)"""
+        results = list()
+
+        if crc_expr is not None:
+            checksums = self.__get_device_checksums(
+                [(seg_address, len(data)) for seg_address, data in segments],
+                crc_expr, crc_symbol_file)
+            for seg_address, data in segments:
+                results.append({'address': seg_address, 'size': len(data),
+                                'success': checksums.get(seg_address) ==
+                                           delta.get_checksum(data),
+                                'mismatch': None})
+            return results
+
+        # One bulk read per address range the image loads
+        ranges = delta.get_read_ranges([(None, segments)])
+        memory = [(start, self.memory_read(start, size, raw=True))
+                  for start, size in ranges]
+
+        for seg_address, data in segments:
+            for start, actual in memory:
+                if start <= seg_address < start + len(actual):
+                    actual = actual[seg_address - start:
+                                    seg_address - start + len(data)]
+                    break
+            else:
+                actual = b""
+
+            if checksum_only:
+                mismatch = None
+                success = delta.get_checksum(actual) == \
+                    delta.get_checksum(data)
+            else:
+                offset = verify.find_mismatch(data, actual)
+                mismatch = None if offset is None else seg_address + offset
+                success = offset is None
+
+            results.append({'address': seg_address, 'size': len(data),
+                            'success': success, 'mismatch': mismatch})
+
+        return results
+
+    def flash(self, image, binary=False, address=None, options=None,
+              skip_if_same=False, confirm_same=False, delta=False,
+              sector_size=delta.DELTA_SECTOR_SIZE, crc_expr=None,
+              crc_symbol_file=None):
         """Flashes device; setting 'options' before flashing device
 
+        Several images (i.e. bootloader, application and calibration data)
+        can be given as a list; they are all loaded in one multiload session.
+        Each image in the list is either a path or a dict of the format
+        {'image': str, 'binary': bool, 'address': int}. 'binary' and
+        'address' are used for images that do not set them.
+
+        The fingerprint of every successfully flashed image is recorded per
+        board (serial number and chip). With 'skip_if_same', flashing is
+        skipped when the board's recorded fingerprint matches the image
+        (same content, loadable regions, binary, address and options).
+
+        With 'delta', the device's memory is compared sector by sector
+        against the image(s) and only the sectors that differ are flashed
+        (as binary images at their addresses, in one multiload session).
+        The checksum of each sector is computed from a bulk read of the
+        image's address ranges, or, if 'crc_expr' is given, by evaluating
+        'crc_expr' on the target for each part of a sector the image loads
+        ('crc_expr' is formatted with 'address' and 'size', i.e.
+        "crc32({address}, {size})", and must return the CRC32 of the range).
+        Images tiflash.image can not parse (i.e. COFF) are flashed in full.
+
+        With 'delta', the flash loader must only erase the sectors it writes;
+        the device's erase option (see delta.DELTA_ERASE_OPTIONS, i.e.
+        "FlashProgramOption" = "Necessary Pages Only") is set for the flash.
+        Images are flashed in full if 'options' select another erase setting
+        or the device has none of the erase options. After a delta flash the
+        device's memory is compared against the images again; if it does
+        not match (i.e. the loader erased the whole flash), the images are
+        flashed in full.
+
         Args:
-            image (str): path to image to use for flashing
+            image (str or list): path to image to use for flashing or list
+                of images to flash
             binary (bool): flashes image as binary if True
             address(int): offset address to flash image
             options (dict): dictionary of options in the format
                 {option_id: option_val}; These options are set first before
                 calling flash function.
+            skip_if_same (bool): skips flashing if the board was last
+                flashed with the same image by tiflash
+            confirm_same (bool): before skipping, reads back a small region
+                of the image from the board to confirm it holds the image
+                (images whose regions are unknown, i.e. COFF, are flashed)
+            delta (bool): only flashes the sectors that differ from the
+                device's memory
+            sector_size (int): size of a flash sector in bytes (delta only)
+            crc_expr (str): expression returning the CRC32 of a memory range
+                on the target (delta only; default reads the memory back)
+            crc_symbol_file (str): .out or GEL symbol file to load before
+                evaluating 'crc_expr'
 
         Returns:
             bool: Result of flash operation (success/failure)
 
         Raises:
-            TIFlashError: raises error if option invalid
+            TIFlashError: raises error if option or image invalid
         """
-        flash_args = {'image': os.path.abspath(image)}
-        if binary:
-            flash_args['binary'] = True
-        if address:
-            flash_args['address'] = str(address)
+        images = self.__get_flash_images(image, binary, address)
+        image_path = images[0]['image']
+
+        board = self.__get_board_key()
+        fingerprint = flash_state.get_images_fingerprint(
+            [(i['image'], i['binary'], i['address']) for i in images],
+            options=options)
+
+        if skip_if_same and board is not None and \
+                self.__holds_image(board, fingerprint, images, confirm_same):
+            return True
+
+        self.__forget_flash_state(board)
+
+        runs = None
+        if delta and self.__get_delta_erase_options(options,
+                                                    probe=False) is not None:
+            runs = self.__get_delta_runs(images, sector_size, crc_expr,
+                                         crc_symbol_file)
+
+        # Loader must only erase the sectors written; else flash in full
+        flash_options = options
+        if runs:
+            erase_options = self.__get_delta_erase_options(options)
+            if erase_options is None:
+                runs = None
+            elif erase_options:
+                flash_options = dict(options or dict())
+                flash_options.update(erase_options)
+
+        flash_images = images
+        delta_paths = list()
+        if runs is not None:
+            delta_paths = [self.__get_temp_path(".bin") for r in runs]
+            images = list()
+            for (run_address, data), path in zip(runs, delta_paths):
+                with open(path, 'wb') as f:
+                    f.write(data)
+                images.append({'image': path, 'binary': True,
+                               'address': "0x%x" % run_address})
 
         # Set options before calling flash()
-        if options is not None:
-            self.set_options(options)
+        if flash_options is not None:
+            self.set_options(flash_options)
 
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['flash'] = flash_args
-
-        # call flash()
-        (code, result) = self.__run_cmd(args)
+        images_path = None
+
+        try:
+            if len(images) == 1:
+                args.update(self.__get_flash_args(images[0]['image'],
+                                                  images[0]['binary'],
+                                                  images[0]['address']))
+            elif len(images) > 1:
+                # Images are passed to main.js in a file
+                images_path = self.__get_temp_path(".json")
+                with open(images_path, 'w') as f:
+                    json.dump(images, f)
+                args.update({'flash': {'images': images_path}})
+
+            # call flash() (no images left if delta found no changes)
+            if len(images) > 0:
+                (code, result) = self.__run_cmd(args)
+            else:
+                (code, result) = (True, None)
+        finally:
+            if images_path is not None:
+                os.remove(images_path)
+            for path in delta_paths:
+                os.remove(path)
 
         # Unset options so they do not persist
-        if options is not None:
-            self.unset_options(options)
+        if flash_options is not None:
+            self.unset_options(flash_options)
 
         if not code:
             if result:
@@ -571,27 +854,228 @@ class TIFlash(object):
                 raise TIFlashError(result)
             return False
         else:
+            # Sectors left out of a delta flash must still hold the images
+            if runs and self.__get_delta_runs(flash_images, sector_size,
+                                              crc_expr, crc_symbol_file):
+                return self.flash(image, binary=binary, address=address,
+                                  options=options)
+
+            if board is not None:
+                try:
+                    flash_state.get_store().record(
+                        board, fingerprint, image_path)
+                except flash_state.FlashStateError:
+                    pass    # Only costs flashing again next time
             return True
 
-    def memory_read(self, address, num_bytes=1, page=0):
+    def __get_flash_images(self, image, binary=False, address=None):
+        """Returns list of {'image': str, 'binary': bool, 'address': str}
+        dicts of the image(s) passed to flash()"""
+        if isinstance(image, (list, tuple)):
+            images = list(image)
+        else:
+            images = [image]
+
+        if len(images) == 0:
+            raise TIFlashError("No images to flash")
+
+        flash_images = list()
+        for entry in images:
+            if isinstance(entry, dict):
+                entry = dict(entry)
+            else:
+                entry = {'image': entry}
+
+            if entry.get('image') is None:
+                raise TIFlashError("Invalid image: %s" % str(entry))
+            if not os.path.isfile(entry['image']):
+                raise TIFlashError("Could not find image: %s" % entry['image'])
+
+            entry_address = entry.get('address', address)
+            flash_images.append({
+                'image': os.path.abspath(entry['image']),
+                'binary': bool(entry.get('binary', binary)),
+                'address': str(entry_address) if entry_address else None,
+            })
+            self.__check_image(flash_images[-1])
+
+        return flash_images
+
+    def __check_image(self, entry):
+        """Pre-flight check of an image passed to flash(); raises
+        TIFlashError if the image is known to load nothing (formats
+        tiflash.image can not parse are left to DSS)"""
+        try:
+            with timage.load(entry['image'], binary=entry['binary'],
+                             address=entry['address']) as img:
+                size = img.size
+        except timage.ImageError:
+            return
+
+        if size == 0:
+            raise TIFlashError("Image loads no data: %s" % entry['image'])
+
+    def __get_delta_erase_options(self, options=None, probe=True):
+        """Returns {option_id: value} of the erase option to set so the
+        flash loader only erases the sectors it writes (empty if it is
+        already set); None if another erase setting is set or (with 'probe')
+        the device has none of delta.DELTA_ERASE_OPTIONS"""
+        set_options = dict(self.args.get('setoption', dict()))
+        set_options.update(options or dict())
+
+        for option_id, value in delta.DELTA_ERASE_OPTIONS:
+            if option_id in set_options:
+                return dict() if set_options[option_id] == value else None
+
+        if not probe:
+            return dict()
+
+        for option_id, value in delta.DELTA_ERASE_OPTIONS:
+            try:
+                self.get_option(option_id)
+            except TIFlashError:
+                continue    # Device does not have option
+            return {option_id: value}
+
+        return None
+
+    def __get_delta_runs(self, images, sector_size, crc_expr=None,
+                         crc_symbol_file=None):
+        """Returns (address, bytes) of each run of data in sectors that
+        differ from the device's memory; None if an image can not be parsed
+        (it is flashed in full)"""
+        loaded = list()
+        try:
+            for entry in images:
+                loaded.append(timage.load(entry['image'],
+                                          binary=entry['binary'],
+                                          address=entry['address']))
+            sectors = delta.get_sectors(loaded, sector_size)
+        except timage.ImageError:
+            return None
+        except delta.DeltaError as e:
+            raise TIFlashError(e)
+        finally:
+            for img in loaded:
+                img.close()
+
+        pieces = [p for s, sector_pieces in sectors for p in sector_pieces]
+        checksums = dict()
+
+        if crc_expr is None:
+            for read_address, size in delta.get_read_ranges(sectors):
+                data = self.memory_read(read_address, size, raw=True)
+                for piece_address, piece in pieces:
+                    offset = piece_address - read_address
+                    if 0 <= offset and offset + len(piece) <= len(data):
+                        checksums[piece_address] = delta.get_checksum(
+                            data[offset:offset + len(piece)])
+        elif pieces:
+            checksums = self.__get_device_checksums(
+                [(piece_address, len(piece)) for piece_address, piece in pieces],
+                crc_expr, crc_symbol_file)
+
+        return delta.get_runs(delta.get_changed_sectors(sectors, checksums))
+
+    def __get_device_checksums(self, ranges, crc_expr, crc_symbol_file=None):
+        """Returns {address: CRC32} of the given (address, size) memory
+        ranges, evaluating 'crc_expr' on the target for each range (in one
+        batch); ranges whose result is not a number are left out"""
+        steps = list()
+        for range_address, size in ranges:
+            expr = crc_expr.format(address="0x%x" % range_address, size=size)
+            steps.append(('evaluate', {'expr': expr,
+                                       'symbol_file': crc_symbol_file}))
+            crc_symbol_file = None  # Only loaded once
+
+        checksums = dict()
+        for (range_address, size), step in zip(ranges, self.batch(steps)):
+            if not step['success']:
+                raise TIFlashError("Could not get checksum at 0x%x: %s"
+                                   % (range_address, step['error']))
+            try:
+                checksums[range_address] = \
+                    int(step['result'].strip(), 0) & 0xFFFFFFFF
+            except (TypeError, ValueError):
+                pass
+
+        return checksums
+
+    def __get_board_key(self):
+        """Returns the flash state key of the session's board (None if there
+        is no session)"""
+        if self.ccxml is None:
+            return None
+
+        try:
+            serno = ccxml.get_serno(self.ccxml)
+        except Exception:
+            serno = None    # Device may not use serial numbers
+
+        return flash_state.get_board_key(serno, chip=self.chip,
+                                         ccxml_path=self.ccxml)
+
+    def __holds_image(self, board, fingerprint, images, confirm):
+        """Returns True if the board was last flashed with the images (and if
+        'confirm', the board's memory matches the check region of the first
+        image that has one)"""
+        record = flash_state.get_store().get(board)
+        if record is None or record['fingerprint'] != fingerprint:
+            return False
+
+        if not confirm:
+            return True
+
+        for image in images:
+            check = flash_state.get_check_region(image['image'],
+                                                 binary=image['binary'],
+                                                 address=image['address'])
+            if check is not None:
+                break
+        else:
+            return False
+
+        (check_address, expected) = check
+        try:
+            data = self.memory_read(check_address, len(expected), raw=True)
+        except TIFlashError:
+            return False
+
+        return bytes(data) == expected
+
+    def __forget_flash_state(self, board=None):
+        """Forgets the image recorded for the session's board (its flash is
+        about to change)"""
+        board = board or self.__get_board_key()
+        if board is None:
+            return
+
+        try:
+            flash_state.get_store().forget(board)
+        except flash_state.FlashStateError:
+            pass
+
+    def memory_read(self, address, num_bytes=1, page=0, raw=False):
         """Reads specified bytes from memory
 
         Args:
             address (long): memory address to read from
             num_bytes (int): number of bytes to read
             page (int, optional): page number to read memory from
+            raw (bool, optional): transfers the bytes in binary (through a
+                temporary file) and returns them as bytes; much faster for
+                large reads
 
         Returns:
-            list: Returns list of bytes read from memory
+            list or bytes: Returns list of bytes read from memory, or the
+            bytes in address order if 'raw' is set
         """
-        memory_args = {'read': True}
-        memory_args['address'] = str(address)
-        memory_args['numBytes'] = str(num_bytes)
-        memory_args['page'] = str(page)
+        if raw:
+            return self.__memory_read_raw(address, num_bytes, page)
 
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['memory'] = memory_args
+        args.update(self.__get_memory_read_args(address, num_bytes, page))
 
         # call memory_read
         (code, result) = self.__run_cmd(args)
@@ -599,10 +1083,7 @@ class TIFlash(object):
         if not code:
             raise TIFlashError(result)
         else:
-            parsed_result = dss.parse_response_list(result)
-            parsed_result.reverse() # Reverse order
-            parsed_result = [ int(e) for e in parsed_result ]
-            return parsed_result
+            return self.__parse_memory_read_result(result)
 
 
     def memory_write(self, address, data, page=0):
@@ -610,28 +1091,181 @@ class TIFlash(object):
 
         Args:
             address (long): memory address to read from
-            data (list): list of bytes to write to memory
+            data (list or bytes-like): list of bytes to write to memory or
+                any object supporting the buffer protocol (bytes, bytearray,
+                memoryview, array, ...); the latter is transferred in binary
             page (int, optional): page number to read memory from
 
         Raises:
             TIFlashError: raises error when memory read error received
         """
-        memory_args = {'write': True}
+        # Board no longer holds the last flashed image
+        self.__forget_flash_state()
+
+        raw_data = self.__get_buffer_bytes(data)
+        if raw_data is not None:
+            return self.__memory_write_raw(address, raw_data, page)
+
+        # Make a copy of self.args so we are not modifying directly
+        args = self.args.copy()
+        args.update(self.__get_memory_write_args(address, data, page))
+
+        # call memory_write
+        (code, result) = self.__run_cmd(args)
+
+        if not code:
+            raise TIFlashError(result)
+
+    def memory_dump(self, address, length, out_path,
+                    chunk_size=MEMORY_DUMP_CHUNK_SIZE, progress=None,
+                    resume=False, page=0):
+        """Dumps a range of memory to a (raw binary) file.
+
+        The range is read in chunks of 'chunk_size' bytes which are appended
+        to the file as they are read, so memory use does not grow with the
+        size of the range.
+
+        Args:
+            address (long): memory address of start of range to dump
+            length (int): number of bytes to dump
+            out_path (str): path of file to dump memory to
+            chunk_size (int, optional): number of bytes to read at once
+            progress (callable, optional): function called as
+                progress(bytes_dumped, length) after each chunk (called from
+                a background thread)
+            resume (bool, optional): resumes a partial dump in 'out_path'
+                (dumping starts at the size of the existing file) instead of
+                overwriting it
+            page (int, optional): page number to read memory from
+
+        Returns:
+            int: number of bytes dumped (not including bytes of a resumed
+            dump)
+
+        Raises:
+            TIFlashError: raises error when memory read error received
+        """
+        out_path = os.path.abspath(out_path)
+        offset = 0
+
+        if chunk_size < 1:
+            raise TIFlashError("Chunk size must be at least 1 byte")
+
+        if resume and os.path.isfile(out_path):
+            offset = os.path.getsize(out_path)
+            if offset > length:
+                raise TIFlashError("Existing dump is larger than requested "
+                                   "length: %s" % out_path)
+        else:
+            # Start with an empty file; chunks are appended
+            open(out_path, 'wb').close()
+
+        if offset == length:
+            return 0
+
+        # Progress updates may be handled out of order; only report progress
+        reported = {'bytes': offset}
+        lock = threading.Lock()
+
+        def report(bytes_dumped):
+            with lock:
+                if bytes_dumped <= reported['bytes']:
+                    return
+                reported['bytes'] = bytes_dumped
+                if progress is not None:
+                    progress(bytes_dumped, length)
+
+        memory_args = {'dump': True}
         memory_args['address'] = str(address)
-        data = [ str(e) for e in list(data) ]
-        memory_args['data'] = ' '.join(data)
+        memory_args['length'] = str(length)
+        memory_args['offset'] = str(offset)
+        memory_args['chunkSize'] = str(chunk_size)
         memory_args['page'] = str(page)
+        memory_args['file'] = out_path
 
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
         args['memory'] = memory_args
 
-        # call memory_write
-        (code, result) = self.__run_cmd(args)
+        # call memory_dump
+        (code, result) = self.__run_cmd(args,
+                                progress=lambda update: report(int(update)))
+
+        if not code:
+            raise TIFlashError(result)
+
+        report(length)
+
+        return length - offset
+
+    def __memory_read_raw(self, address, num_bytes, page):
+        """PRIVATE FUNCTION: Reads memory into a temporary file and returns
+        its bytes"""
+        data_path = self.__get_temp_path(".bin")
+
+        try:
+            # Make a copy of self.args so we are not modifying directly
+            args = self.args.copy()
+            args.update(self.__get_memory_read_args(address, num_bytes, page))
+            args['memory']['file'] = data_path
+
+            # call memory_read
+            (code, result) = self.__run_cmd(args)
+
+            if not code:
+                raise TIFlashError(result)
+
+            with open(data_path, 'rb') as f:
+                data = f.read()
+        finally:
+            os.remove(data_path)
+
+        return data
+
+    def __memory_write_raw(self, address, data, page):
+        """PRIVATE FUNCTION: Writes bytes to memory through a temporary
+        file"""
+        data_path = self.__get_temp_path(".bin")
+
+        try:
+            with open(data_path, 'wb') as f:
+                f.write(data)
+
+            memory_args = {'write': True}
+            memory_args['address'] = str(address)
+            memory_args['page'] = str(page)
+            memory_args['file'] = data_path
+
+            # Make a copy of self.args so we are not modifying directly
+            args = self.args.copy()
+            args['memory'] = memory_args
+
+            # call memory_write
+            (code, result) = self.__run_cmd(args)
+        finally:
+            os.remove(data_path)
 
         if not code:
             raise TIFlashError(result)
 
+    def __get_buffer_bytes(self, data):
+        """PRIVATE FUNCTION: Returns the bytes of 'data' if it supports the
+        buffer protocol; None otherwise"""
+        if isinstance(data, (list, tuple)):
+            return None
+
+        try:
+            return memoryview(data).tobytes()
+        except TypeError:
+            return None
+
+    def __get_temp_path(self, suffix):
+        """PRIVATE FUNCTION: Returns path to a new (empty) temporary file"""
+        (fd, path) = tempfile.mkstemp(prefix="tiflash_", suffix=suffix)
+        os.close(fd)
+
+        return path
+
 
     def register_read(self, regname):
         """Reads specified register of device
@@ -645,12 +1279,9 @@ class TIFlash(object):
         Raises:
             TIFlashError: raised if regname is invalid
         """
-        register_args = {'read': True}
-        register_args['regname'] = str(regname)
-
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['register'] = register_args
+        args.update(self.__get_register_read_args(regname))
 
         # call register_read
         (code, result) = self.__run_cmd(args)
@@ -672,13 +1303,9 @@ class TIFlash(object):
         Raises:
             TIFlashError: raised if regname is invalid
         """
-        register_args = {'write': True}
-        register_args['regname'] = str(regname)
-        register_args['value'] = str(value)
-
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['register'] = register_args
+        args.update(self.__get_register_write_args(regname, value))
 
         # call register_read
         (code, result) = self.__run_cmd(args)
@@ -700,14 +1327,9 @@ class TIFlash(object):
         Raises:
             TIFlashError: raises error when expression error is raised
         """
-        expression_args = {'expression': expr}
-
-        if symbol_file is not None:
-            expression_args['symbols'] = symbol_file
-
         # Make a copy of self.args so we are not modifying directly
         args = self.args.copy()
-        args['evaluate'] = expression_args
+        args.update(self.__get_evaluate_args(expr, symbol_file))
 
         # call expression
         (code, result) = self.__run_cmd(args)
@@ -735,3 +1357,209 @@ class TIFlash(object):
 
         # No return on a no-op
         #return result
+
+    def batch(self, steps):
+        """Runs several operations one after another in a single DSS
+        invocation, using one Debug Server Session for all of them.
+
+        Each step is either the name of an operation or a tuple of
+        (operation, kwargs) where kwargs are the keyword arguments of the
+        TIFlash function of the same name. A dict with an 'op' key and the
+        keyword arguments is accepted as well. Supported operations are:
+        reset, erase, verify, flash, memory_read, memory_write,
+        register_read, register_write and evaluate.
+
+        Example:
+            flash.batch(['erase', ('flash', {'image': 'app.out'}),
+                         ('verify', {'image': 'app.out'}), 'reset'])
+
+        Steps are run in order; steps after a failed step are not run. Note
+        that 'options' given to a step stay set on the session for the rest
+        of the steps.
+
+        Args:
+            steps (list): ordered list of steps to run
+
+        Returns:
+            list: one dict per step of the format {'op': str,
+            'success': bool, 'result': value, 'error': str}, where 'result'
+            is the value the TIFlash function of the same name returns and
+            'error' is the error message of a failed (or skipped) step
+
+        Raises:
+            TIFlashError: raises error if a step is invalid or the session
+                could not be started
+        """
+        ops = {
+            'reset': (self.__get_reset_args, None),
+            'erase': (self.__get_erase_args, None),
+            'verify': (self.__get_verify_args, None),
+            'flash': (self.__get_flash_args, None),
+            'memory_read': (self.__get_memory_read_args,
+                            self.__parse_memory_read_result),
+            'memory_write': (self.__get_memory_write_args, None),
+            'register_read': (self.__get_register_read_args,
+                              dss.parse_response_number),
+            'register_write': (self.__get_register_write_args, None),
+            'evaluate': (self.__get_evaluate_args, str),
+        }
+
+        # Step args get everything but the session args (session is started
+        # once for the whole pipeline)
+        step_base_args = self.args.copy()
+        step_base_args.pop('session', None)
+        step_base_args.pop('attach', None)
+
+        step_ops = list()
+        step_cmds = list()
+        for step in steps:
+            (op, kwargs) = self.__parse_batch_step(step)
+            if op not in ops.keys():
+                raise TIFlashError("Unsupported batch operation: %s" % op)
+
+            kwargs = dict(kwargs)
+            options = kwargs.pop('options', None)
+
+            step_args = step_base_args.copy()
+            try:
+                step_args.update(ops[op][0](**kwargs))
+            except TypeError as e:
+                raise TIFlashError("Invalid arguments for %s: %s" % (op, e))
+
+            if options:
+                step_args['setoption'] = dict(
+                    step_args.get('setoption', dict()), **options)
+
+            step_ops.append(op)
+            step_cmds.append(dss.format_args(step_args))
+
+        # Board no longer holds the last flashed image
+        if set(step_ops) & set(['erase', 'flash', 'memory_write']):
+            self.__forget_flash_state()
+
+        # Steps are passed to main.js in a file
+        (fd, steps_path) = tempfile.mkstemp(prefix="tiflash_", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump([[str(a) for a in cmd] for cmd in step_cmds], f)
+
+            args = dict()
+            for key in ('session', 'attach', 'debug'):
+                if key in self.args.keys():
+                    args[key] = self.args[key]
+            args['pipeline'] = {'steps': steps_path}
+
+            (code, result) = self.__run_cmd(args)
+        finally:
+            os.remove(steps_path)
+
+        try:
+            responses = json.loads(result)
+        except (TypeError, ValueError):
+            # Pipeline never ran (i.e. session could not be started)
+            raise TIFlashError(result)
+
+        results = list()
+        for i, op in enumerate(step_ops):
+            step_result = {'op': op, 'success': False, 'result': None,
+                           'error': BATCH_SKIPPED_MSG}
+            if i < len(responses):
+                if responses[i]['retcode'] == 0:
+                    value = responses[i]['result']
+                    parse = ops[op][1]
+                    step_result['success'] = True
+                    step_result['result'] = parse(value) if parse else True
+                    step_result['error'] = None
+                else:
+                    step_result['error'] = responses[i]['result']
+
+            results.append(step_result)
+
+        return results
+
+    def __parse_batch_step(self, step):
+        """Returns (op, kwargs) tuple of a batch step"""
+        if isinstance(step, dict):
+            kwargs = dict(step)
+            return (kwargs.pop('op', None), kwargs)
+        elif isinstance(step, (tuple, list)):
+            if len(step) == 1:
+                return (step[0], dict())
+            elif len(step) == 2 and isinstance(step[1], dict):
+                return (step[0], step[1])
+        elif step is not None:
+            return (step, dict())
+
+        raise TIFlashError("Invalid batch step: %s" % str(step))
+
+    def __get_reset_args(self):
+        return {'reset': True}
+
+    def __get_erase_args(self):
+        return {'erase': True}
+
+    def __get_verify_args(self, image, binary=False, address=None):
+        verify_args = {'image': os.path.abspath(image)}
+        if binary:
+            verify_args['binary'] = True
+        if address:
+            verify_args['address'] = str(address)
+
+        return {'verify': verify_args}
+
+    def __get_flash_args(self, image, binary=False, address=None):
+        if isinstance(image, (list, tuple)):
+            raise TIFlashError("Only flash() can flash several images at once")
+
+        flash_args = {'image': os.path.abspath(image)}
+        if binary:
+            flash_args['binary'] = True
+        if address:
+            flash_args['address'] = str(address)
+
+        return {'flash': flash_args}
+
+    def __get_memory_read_args(self, address, num_bytes=1, page=0):
+        memory_args = {'read': True}
+        memory_args['address'] = str(address)
+        memory_args['numBytes'] = str(num_bytes)
+        memory_args['page'] = str(page)
+
+        return {'memory': memory_args}
+
+    def __parse_memory_read_result(self, result):
+        parsed_result = dss.parse_response_list(result)
+        parsed_result.reverse() # Reverse order
+        parsed_result = [ int(e) for e in parsed_result ]
+
+        return parsed_result
+
+    def __get_memory_write_args(self, address, data, page=0):
+        memory_args = {'write': True}
+        memory_args['address'] = str(address)
+        data = [ str(e) for e in list(data) ]
+        memory_args['data'] = ' '.join(data)
+        memory_args['page'] = str(page)
+
+        return {'memory': memory_args}
+
+    def __get_register_read_args(self, regname):
+        register_args = {'read': True}
+        register_args['regname'] = str(regname)
+
+        return {'register': register_args}
+
+    def __get_register_write_args(self, regname, value):
+        register_args = {'write': True}
+        register_args['regname'] = str(regname)
+        register_args['value'] = str(value)
+
+        return {'register': register_args}
+
+    def __get_evaluate_args(self, expr, symbol_file=None):
+        expression_args = {'expression': expr}
+
+        if symbol_file is not None:
+            expression_args['symbols'] = symbol_file
+
+        return {'evaluate': expression_args}
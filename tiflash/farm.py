@@ -0,0 +1,164 @@
+"""
+farm.py     --  module for running tiflash commands on many boards at once
+
+
+Boards are handled concurrently on a bounded pool of worker threads. Each
+board is flashed in its own DSS process, so a failure on one board does not
+stop the others. Boards sharing the same debug probe are never handled at the
+same time.
+
+Note: a running DSS server (see tiflash.start_server) handles one command at a
+time, so stop the server before flashing a farm to get concurrency.
+
+"""
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+import tiflash
+from tiflash.utils import ccxml
+
+FARM_DEFAULT_WORKERS = 8
+FARM_MAX_WORKERS = 64   # every worker runs its own DSS process (JVM)
+
+
+class FarmError(Exception):
+    """Generic Farm error"""
+    pass
+
+
+def flash(image, boards, workers=None, binary=False, address=None,
+          options=None, ccs=None, skip_if_same=False, confirm_same=False,
+          delta=False, sector_size=None, **session_args):
+    """Flashes an image on to each board in 'boards' concurrently.
+
+    Args:
+        image (str or list): path to image to use for flashing or list of
+            images to flash (see tiflash.flash)
+        boards (list): list of boards to flash. Each board is either a serial
+            number, a path to a ccxml file or a dict of session args for that
+            board
+        workers (int, optional): number of boards to flash at once
+            (default is FARM_DEFAULT_WORKERS; at most FARM_MAX_WORKERS)
+        binary (bool): flashes image as binary if True
+        address(int): offset address to flash image
+        options (dict): dictionary of options in the format
+            {option_id: option_val}; These options are set first before
+            calling flash function.
+        ccs (str): version number of CCS to use or path to custom installation
+        skip_if_same (bool): skips boards that were last flashed with the same
+            image (and options) by tiflash
+        confirm_same (bool): before skipping a board, reads back a small
+            region of the image from it to confirm it holds the image
+        delta (bool): only flashes the sectors that differ from each board's
+            memory (see tiflash.flash)
+        sector_size (int): size of a flash sector in bytes (delta only)
+        session_args (**dict): keyword arguments containing settings used for
+            every board (i.e. devicetype, connection, timeout)
+
+    Returns:
+        list: one dict per board (in the order given) of the format
+        {'board': str, 'success': bool, 'result': bool, 'error': str}
+
+    Raises:
+        FarmError: raises error if 'boards' is empty or invalid
+    """
+    images = image if isinstance(image, (list, tuple)) else [image]
+    for entry in images:
+        path = entry.get('image') if isinstance(entry, dict) else entry
+        if path is None or not os.path.isfile(path):
+            raise FarmError("Could not find image: %s" % path)
+
+    return run(tiflash.flash, boards, workers=workers, image=image,
+               binary=binary, address=address, options=options, ccs=ccs,
+               skip_if_same=skip_if_same, confirm_same=confirm_same,
+               delta=delta, sector_size=sector_size, **session_args)
+
+
+def run(func, boards, workers=None, **kwargs):
+    """Calls a tiflash function once per board concurrently.
+
+    Args:
+        func (callable): tiflash function to call (i.e. tiflash.flash). It is
+            called with 'kwargs' and the board's session args.
+        boards (list): list of boards (serial numbers, ccxml paths or dicts
+            of session args)
+        workers (int, optional): number of boards to handle at once
+        kwargs (**dict): keyword arguments passed to every 'func' call
+
+    Returns:
+        list: one dict per board (in the order given) of the format
+        {'board': str, 'success': bool, 'result': value, 'error': str}
+
+    Raises:
+        FarmError: raises error if 'boards' is empty or invalid
+    """
+    board_args = [__get_board_args(board) for board in boards]
+    if len(board_args) == 0:
+        raise FarmError("No boards provided")
+
+    workers = min(workers or FARM_DEFAULT_WORKERS, FARM_MAX_WORKERS,
+                  len(board_args))
+    if workers < 1:
+        raise FarmError("Number of workers must be at least 1")
+
+    # One lock per debug probe; a probe can only run one session at a time
+    probe_locks = dict()
+    for args in board_args:
+        probe_locks.setdefault(__get_probe_id(args), threading.Lock())
+
+    def run_board(args):
+        board_result = {'board': __get_board_name(args), 'success': False,
+                        'result': None, 'error': None}
+        call_args = dict(kwargs)
+        call_args.update(args)
+
+        with probe_locks[__get_probe_id(args)]:
+            try:
+                board_result['result'] = func(**call_args)
+                board_result['success'] = board_result['result'] is not False
+            except Exception as e:
+                board_result['error'] = str(e)
+
+        return board_result
+
+    pool = ThreadPool(workers)
+    try:
+        results = pool.map(run_board, board_args, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+
+def __get_board_args(board):
+    """Returns the session args dict for a board"""
+    if isinstance(board, dict):
+        if 'serno' not in board.keys() and 'ccxml' not in board.keys():
+            raise FarmError("Board must specify a serno or ccxml: %s" % board)
+        return dict(board)
+    elif board and str(board).endswith(".ccxml"):
+        return {'ccxml': str(board)}
+    elif board:
+        return {'serno': str(board)}
+
+    raise FarmError("Invalid board: %s" % board)
+
+
+def __get_board_name(board_args):
+    """Returns the name to report a board by"""
+    return board_args.get('serno') or board_args.get('ccxml')
+
+
+def __get_probe_id(board_args):
+    """Returns an id of the debug probe a board is connected through"""
+    if board_args.get('serno'):
+        return board_args['serno']
+
+    try:
+        serno = ccxml.get_serno(board_args['ccxml'])
+    except Exception:
+        serno = None
+
+    return serno or os.path.normpath(board_args['ccxml'])
@@ -0,0 +1,412 @@
+"""
+image.py    --  module for reading the segments of images before flashing
+
+
+Parses ELF, Intel HEX, TI-TXT and raw binary images into a list of segments
+(address and size of each block of data the image loads), so the address
+ranges an image touches are known without calling DSS.
+
+Segments are kept in arrays (address, size and data offset of each segment).
+Files are read through mmap; segment data of ELF and binary images is only
+read when asked for.
+
+Example:
+    from tiflash import image
+
+    with image.load("app.out") as img:
+        print(img.format, img.size, img.get_ranges())
+        if not img.fits([(0x0, 0x100000)]):
+            print("Image does not fit in flash")
+
+Note: COFF images (i.e. older TI toolchains) are not supported.
+
+"""
+import os
+import mmap
+import array
+import struct
+import binascii
+
+FORMAT_ELF = "elf"
+FORMAT_HEX = "hex"
+FORMAT_TITXT = "ti-txt"
+FORMAT_BINARY = "binary"
+
+ELF_MAGIC = b"\x7fELF"
+ELF_PT_LOAD = 1
+
+# Intel HEX record types
+HEX_DATA = 0x00
+HEX_EOF = 0x01
+HEX_EXT_SEGMENT_ADDR = 0x02
+HEX_EXT_LINEAR_ADDR = 0x04
+
+try:    # 64 bit addresses where supported
+    array.array('Q')
+    ADDRESS_TYPECODE = 'Q'
+except ValueError:
+    ADDRESS_TYPECODE = 'L'
+
+
+class ImageError(Exception):
+    """Generic Image Error"""
+    pass
+
+
+class Image(object):
+    """Segments of an image file.
+
+    Segments are kept in load order. The data of segment i is
+    buffer[offsets[i]:offsets[i] + sizes[i]] where buffer is the mapped file
+    (ELF and binary images) or the decoded data (HEX and TI-TXT images).
+    """
+
+    def __init__(self, path, format, buffer, addresses, sizes, offsets,
+                 mapped=None):
+        """Initializes the Image (use load() to create an Image)
+
+        Args:
+            path (str): path to image file
+            format (str): format of image file (FORMAT_*)
+            buffer (mmap or bytearray): buffer holding segment data
+            addresses (array): address of each segment
+            sizes (array): size of each segment
+            offsets (array): offset of each segment's data in buffer
+            mapped (mmap, optional): mapped file to close with the image
+        """
+        self.path = path
+        self.format = format
+        self.addresses = addresses
+        self.sizes = sizes
+        self.offsets = offsets
+
+        self._buffer = buffer
+        self._mapped = mapped
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def size(self):
+        """int: total number of bytes the image loads"""
+        return sum(self.sizes)
+
+    def segments(self):
+        """Returns the segments of the image
+
+        Returns:
+            list: (address, size) of each segment in load order
+        """
+        return list(zip(self.addresses, self.sizes))
+
+    def get_data(self, index):
+        """Returns the data of a segment
+
+        Args:
+            index (int): index of segment
+
+        Returns:
+            bytes: data of segment
+        """
+        offset = self.offsets[index]
+
+        return bytes(self._buffer[offset:offset + self.sizes[index]])
+
+    def read(self, address, size):
+        """Returns the bytes the image loads at an address range
+
+        Args:
+            address (int): start address of range
+            size (int): number of bytes in range
+
+        Returns:
+            bytearray or None: bytes loaded at range; None if the image does
+            not load every byte of the range
+        """
+        data = bytearray(size)
+        covered = 0
+
+        for i in range(len(self.addresses)):
+            start = max(address, self.addresses[i])
+            end = min(address + size, self.addresses[i] + self.sizes[i])
+            if start >= end:
+                continue
+
+            offset = self.offsets[i] + start - self.addresses[i]
+            data[start - address:end - address] = \
+                self._buffer[offset:offset + end - start]
+            covered += end - start
+
+        if covered < size:
+            return None
+
+        return data
+
+    def get_ranges(self):
+        """Returns the address ranges the image loads (sorted, adjacent and
+        overlapping segments merged)
+
+        Returns:
+            list: (start address, end address) of each range (end excluded)
+        """
+        ranges = list()
+
+        for address, size in sorted(self.segments()):
+            if ranges and address <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1],
+                                                 address + size))
+            else:
+                ranges.append((address, address + size))
+
+        return ranges
+
+    def get_outside(self, memory_ranges):
+        """Returns the parts of the image that are outside the given memory
+        ranges (i.e. the target's flash)
+
+        Args:
+            memory_ranges (list): (start address, size) of each memory range
+
+        Returns:
+            list: (start address, end address) of each part of the image
+            outside of the memory ranges (end excluded)
+        """
+        memory = sorted((start, start + size) for start, size in memory_ranges)
+        outside = list()
+
+        for start, end in self.get_ranges():
+            for mem_start, mem_end in memory:
+                if mem_end <= start or mem_start >= end:
+                    continue
+                if mem_start > start:
+                    outside.append((start, mem_start))
+                start = max(start, mem_end)
+                if start >= end:
+                    break
+            if start < end:
+                outside.append((start, end))
+
+        return outside
+
+    def fits(self, memory_ranges):
+        """Returns True if every segment of the image is inside the given
+        memory ranges
+
+        Args:
+            memory_ranges (list): (start address, size) of each memory range
+
+        Returns:
+            bool: True if image fits in memory ranges
+        """
+        return len(self.get_outside(memory_ranges)) == 0
+
+    def close(self):
+        """Closes the mapped image file"""
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self._buffer = None
+
+
+def get_format(path, binary=False):
+    """Returns the format of an image file
+
+    Args:
+        path (str): path to image file
+        binary (bool): image is a raw binary image
+
+    Returns:
+        str: format of image (FORMAT_*)
+
+    Raises:
+        ImageError: raised if the format is not supported
+    """
+    if binary:
+        return FORMAT_BINARY
+
+    with open(path, 'rb') as f:
+        header = f.read(4)
+
+    if header == ELF_MAGIC:
+        return FORMAT_ELF
+    elif header[:1] == b":":
+        return FORMAT_HEX
+    elif header[:1] == b"@":
+        return FORMAT_TITXT
+
+    raise ImageError("Unsupported image format: %s" % path)
+
+
+def load(path, binary=False, address=None):
+    """Loads the segments of an image file
+
+    Args:
+        path (str): path to image file
+        binary (bool): image is a raw binary image
+        address (int or str, optional): address a binary image is loaded at
+
+    Returns:
+        Image: segments of image (close() it when done)
+
+    Raises:
+        ImageError: raised if the image can not be read or parsed
+    """
+    try:
+        image_format = get_format(path, binary=binary)
+
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                mapped = None
+                buf = bytearray()
+            else:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                buf = mapped
+    except (IOError, OSError, ValueError) as e:
+        raise ImageError("Could not read image %s: %s" % (path, e))
+
+    try:
+        if image_format == FORMAT_BINARY:
+            segments = [(parse_address(address), 0, len(buf))] if buf else []
+        elif image_format == FORMAT_ELF:
+            segments = __parse_elf(buf)
+        elif image_format == FORMAT_HEX:
+            (buf, segments) = __parse_hex(buf)
+        else:
+            (buf, segments) = __parse_titxt(buf)
+    except (struct.error, ValueError, TypeError, binascii.Error) as e:
+        if mapped is not None:
+            mapped.close()
+        raise ImageError("Could not parse %s image %s: %s"
+                         % (image_format, path, e))
+
+    if image_format in (FORMAT_HEX, FORMAT_TITXT) and mapped is not None:
+        mapped.close()      # data was decoded into its own buffer
+        mapped = None
+
+    addresses = array.array(ADDRESS_TYPECODE, [s[0] for s in segments])
+    offsets = array.array(ADDRESS_TYPECODE, [s[1] for s in segments])
+    sizes = array.array(ADDRESS_TYPECODE, [s[2] for s in segments])
+
+    return Image(path, image_format, buf, addresses, sizes, offsets,
+                 mapped=mapped)
+
+
+def parse_address(address):
+    """Returns an address (int or str, i.e. "0x1000") as int (0 if None)"""
+    if not address:
+        return 0
+
+    try:
+        return int(address, 0)
+    except TypeError:   # already a number
+        return int(address)
+
+
+def __parse_elf(buf):
+    """Returns (physical address, file offset, file size) of each PT_LOAD
+    segment of an ELF file"""
+    ident = bytearray(buf[:6])
+    elf_class = ident[4]
+    endian = "<" if ident[5] == 1 else ">"
+
+    if elf_class == 1:      # 32 bit
+        phoff, = struct.unpack_from(endian + "I", buf, 28)
+        phentsize, phnum = struct.unpack_from(endian + "HH", buf, 42)
+        phdr_format = endian + "IIIIII"     # type offset vaddr paddr filesz
+        fields = (0, 1, 3, 4)
+    elif elf_class == 2:    # 64 bit
+        phoff, = struct.unpack_from(endian + "Q", buf, 32)
+        phentsize, phnum = struct.unpack_from(endian + "HH", buf, 54)
+        phdr_format = endian + "IIQQQQ"     # type flags offset vaddr paddr filesz
+        fields = (0, 2, 4, 5)
+    else:
+        raise ValueError("invalid ELF class %d" % elf_class)
+
+    segments = list()
+    for i in range(phnum):
+        phdr = struct.unpack_from(phdr_format, buf, phoff + i * phentsize)
+        p_type, p_offset, p_paddr, p_filesz = [phdr[j] for j in fields]
+        if p_type != ELF_PT_LOAD or p_filesz == 0:
+            continue
+        if p_offset + p_filesz > len(buf):
+            raise ValueError("segment at 0x%x is truncated" % p_paddr)
+        segments.append((p_paddr, p_offset, p_filesz))
+
+    return segments
+
+
+def __add_data(data, segments, address, record):
+    """Appends record to data; extends the last segment if record continues
+    it, otherwise starts a new segment"""
+    if segments and segments[-1][0] + segments[-1][2] == address:
+        last = segments[-1]
+        segments[-1] = (last[0], last[1], last[2] + len(record))
+    else:
+        segments.append((address, len(data), len(record)))
+    data.extend(record)
+
+
+def __parse_hex(buf):
+    """Returns (data, segments) of an Intel HEX file"""
+    data = bytearray()
+    segments = list()
+    base = 0
+
+    for line in buf[:].splitlines():   # bytes(mmap) is its repr on py2
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] != b":":
+            raise ValueError("invalid record: %r" % line[:16])
+
+        record = bytearray(binascii.unhexlify(line[1:]))
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError("invalid record length: %r" % line[:16])
+        if sum(record) & 0xFF:
+            raise ValueError("invalid record checksum: %r" % line[:16])
+
+        record_type = record[3]
+        payload = record[4:-1]
+
+        if record_type == HEX_DATA:
+            address = base + ((record[1] << 8) | record[2])
+            __add_data(data, segments, address, payload)
+        elif record_type == HEX_EOF:
+            break
+        elif record_type == HEX_EXT_SEGMENT_ADDR:
+            base = ((payload[0] << 8) | payload[1]) << 4
+        elif record_type == HEX_EXT_LINEAR_ADDR:
+            base = ((payload[0] << 8) | payload[1]) << 16
+
+    return (data, segments)
+
+
+def __parse_titxt(buf):
+    """Returns (data, segments) of a TI-TXT file"""
+    data = bytearray()
+    segments = list()
+    address = None
+
+    for line in buf[:].splitlines():   # bytes(mmap) is its repr on py2
+        line = line.strip()
+        if not line:
+            continue
+
+        if line[:1] == b"@":
+            address = int(line[1:], 16)
+        elif line[:1] in (b"q", b"Q"):
+            break
+        elif address is None:
+            raise ValueError("data before first address")
+        else:
+            record = bytearray(binascii.unhexlify(b"".join(line.split())))
+            __add_data(data, segments, address, record)
+            address += len(record)
+
+    return (data, segments)
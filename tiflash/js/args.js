@@ -2,6 +2,7 @@
  * args.js - Arguments include file that handles reading and formatting
  * arguments from the command line (determines how main.js is called)
  */
+importPackage(java.io);
 
 function parse_args(args)
 {
@@ -46,3 +47,26 @@ function _create_args_obj(args, keyval)
     
     return args_json;
 }
+
+/**
+ * Reads a JSON file passed as an argument (i.e. pipeline steps, images to
+ * flash)
+
+ * @param {path} path of JSON file
+ *
+ * @returns {object} parsed content of file
+ */
+function read_json_file(path)
+{
+    var reader = new BufferedReader(new InputStreamReader(
+                        new FileInputStream(path), "UTF-8"));
+    var content = "";
+    var line = null;
+
+    while ((line = reader.readLine()) != null) {
+        content += line;
+    }
+    reader.close();
+
+    return JSON.parse(String(content));
+}
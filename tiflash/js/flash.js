@@ -5,7 +5,7 @@
 function handle_flash_cmds(session, scriptEnv, args)
 {
 
-    var image = args.image.join(' ');
+    var image = args.image ? args.image.join(' ') : null;
     var retval = false;
 
     if (!session.target.isConnected()) {
@@ -13,18 +13,14 @@ function handle_flash_cmds(session, scriptEnv, args)
     }
 
     //  Flash Image(s)
-    if (args.binary != undefined) {
+    if (args.images != undefined) {
+        retval = load_multiple(session, scriptEnv,
+                               read_json_file(args.images.join(' ')));
+    } else if (args.binary != undefined) {
         retval = load_binary(session, scriptEnv, image, args.address);
-    //} else if (images.length == 1) {
     } else {
         retval = load_image(session, scriptEnv, image);
     }
-    /*
-    } else {
-        //retval = load_multiple(session, scriptEnv, images);
-        ;
-    }
-    */
 
     return retval;
 }
@@ -47,6 +43,11 @@ function load_binary(session, scriptEnv, image, address)
 }
 
 
+/**
+ * Loads several images in one multiload session (flash is only erased once)
+
+ * @param {images} array of {image, binary, address} objects in load order
+ */
 function load_multiple(session, scriptEnv, images)
 {
     var ret = false;
@@ -54,13 +55,21 @@ function load_multiple(session, scriptEnv, images)
     session.options.setBoolean("AutoRunToLabelOnRestart", false);
     session.options.setBoolean("ResetOnRestart", false);
     session.flash.multiloadStart();
-    for (var i = 0; i < images.length; i++) {
-        ret = load_image(session, scriptEnv, images[i]);
-        if (ret == false) {
-            break;
+    try {
+        for (var i = 0; i < images.length; i++) {
+            if (images[i].binary) {
+                ret = load_binary(session, scriptEnv, images[i].image,
+                                  images[i].address || undefined);
+            } else {
+                ret = load_image(session, scriptEnv, images[i].image);
+            }
+            if (ret == false) {
+                break;
+            }
         }
+    } finally {
+        session.flash.multiloadEnd();
     }
-    session.flash.multiloadEnd();
     return ret;
 }
 
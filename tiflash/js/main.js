@@ -9,18 +9,21 @@
 
 path = this.arguments[0];
 port = parseInt(this.arguments[1]);
+requestId = parseInt(this.arguments[2]);
 scriptEnv = null;
 debugServer = null;
 debugSession = null;
+sessionPool = null;
 ccsServer = null;
 ccsSession = null;
+scriptStart = new Date().getTime();
+traceTimings = [];
 
 main();
 
 function main()
 {
-    var retcode = 0;
-    var result = "";
+    var response = null;
 
     //  Setup Scripting Environment
     scriptEnv = Packages.com.ti.ccstudio.scripting.environment.ScriptingEnvironment.instance();
@@ -30,19 +33,68 @@ function main()
 
 
     load(scriptEnv.toAbsolutePath("args.js"));
+    load(scriptEnv.toAbsolutePath("result.js"));
     args = parse_args(this.arguments);
 
 
     //  Create Debug Server
     debugServer = scriptEnv.getServer('DebugServer.1');
 
+    trace_phase("setup", scriptStart);
 
-    //  Set Trace Level
+    //  Server mode: keep Debug Server alive and serve requests until shutdown
+    if (args.server) {
+        load(scriptEnv.toAbsolutePath("server.js"));
+
+        set_trace_level(args);
+        serve(scriptEnv, port, requestId, args.server);
+
+        quit(0);
+    }
+
+
+    response = run_commands(args);
+
+    send_trace(args);
+    send_result(scriptEnv, port, requestId, response.result);
+
+    if (args.attach) {
+        load(scriptEnv.toAbsolutePath("session.js"));
+
+        attach_ccs(debugSession, scriptEnv, args.session);
+    }
+
+    quit(response.retcode);
+}
+
+/**
+ * Sets the console trace level according to the debug argument
+
+ * @param {args} parsed arguments
+ */
+function set_trace_level(args)
+{
     if (args.debug) {
         scriptEnv.traceSetConsoleLevel(Packages.com.ti.ccstudio.scripting.environment.TraceLevel.ALL);
     } else {
         scriptEnv.traceSetConsoleLevel(Packages.com.ti.ccstudio.scripting.environment.TraceLevel.OFF);
     }
+}
+
+/**
+ * Runs all commands provided in args
+
+ * @param {args} parsed arguments
+ *
+ * @returns {response} object containing retcode and result of commands
+ */
+function run_commands(args)
+{
+    var response = null;
+    var start = new Date().getTime();
+
+    //  Set Trace Level
+    set_trace_level(args);
 
 
     //  Start Session
@@ -50,15 +102,47 @@ function main()
         load(scriptEnv.toAbsolutePath("session.js"));
 
         try {
-            debugSession = start_session(debugServer, scriptEnv, args.session);
+            if (sessionPool != null) {
+                debugSession = pool_acquire(debugServer, scriptEnv, args.session);
+            } else {
+                debugSession = start_session(debugServer, scriptEnv, args.session);
+            }
         } catch (e) {
-            result = e;
-            retcode = -1;
-
-            send_result(scriptEnv, port, result);
-            quit(retcode);
+            return { retcode: -1, result: e };
         }
 
+        trace_phase("session", start);
+    }
+
+
+    start = new Date().getTime();
+    response = run_session_commands(args);
+    trace_phase("commands", start);
+
+    return response;
+}
+
+/**
+ * Runs all commands provided in args (other than starting the session)
+
+ * @param {args} parsed arguments
+ *
+ * @returns {response} object containing retcode and result of commands
+ */
+function run_session_commands(args)
+{
+    var retcode = 0;
+    var result = "";
+
+
+    //  Pipeline of steps (all run in the session started above)
+    if (args.pipeline) {
+        load(scriptEnv.toAbsolutePath("pipeline.js"));
+        try {
+            return run_pipeline(scriptEnv, args.pipeline);
+        } catch (e) {
+            return { retcode: -1, result: e };
+        }
     }
 
 
@@ -109,11 +193,7 @@ function main()
             try {
                 set_option(debugSession, scriptEnv, id, val);
             } catch (e) {
-                result = e;
-                retcode = -1;
-
-                send_result(scriptEnv, port, result);
-                quit(retcode);
+                return { retcode: -1, result: e };
             }
         }
     }
@@ -126,11 +206,7 @@ function main()
         try {
             handle_operation_cmds(debugSession, scriptEnv, args.operation);
         } catch (e) {
-            result = e;
-            retcode = -1;
-
-            send_result(scriptEnv, port, result);
-            quit(retcode);
+            return { retcode: -1, result: e };
         }
     }
 
@@ -198,7 +274,28 @@ function main()
     //  Memory operations
     if (args.memory) {
         load(scriptEnv.toAbsolutePath("memory.js"));
-        if (args.memory.read) {
+        if (args.memory.dump) {
+            //  Chunked dump to file
+            try {
+                result = dump_memory(debugSession, scriptEnv, args.memory.page,
+                    args.memory.address, args.memory.length,
+                    args.memory.offset, args.memory.chunkSize,
+                    args.memory.file.join(' '), get_progress_poster(args));
+            } catch (e) {
+                result = e;
+                retcode = -1;
+            }
+        } else if (args.memory.read && args.memory.file) {
+            //  Binary transfer through file
+            try {
+                result = save_memory(debugSession, scriptEnv, args.memory.page,
+                    args.memory.address, args.memory.numBytes,
+                    args.memory.file.join(' '));
+            } catch (e) {
+                result = e;
+                retcode = -1;
+            }
+        } else if (args.memory.read) {
             try {
                 result = read_memory(debugSession, scriptEnv, args.memory.page,
                     args.memory.address, args.memory.numBytes);
@@ -206,6 +303,16 @@ function main()
                 result = e;
                 retcode = -1;
             }
+        } else if (args.memory.write && args.memory.file) {
+            //  Binary transfer through file
+            try {
+                result = load_memory(debugSession, scriptEnv,
+                    args.memory.page, args.memory.address,
+                    args.memory.file.join(' '));
+            } catch (e) {
+                result = e;
+                retcode = -1;
+            }
         } else if (args.memory.write) {
             try {
                 result = write_memory(debugSession, scriptEnv,
@@ -251,20 +358,80 @@ function main()
     }
 
 
-    send_result(scriptEnv, port, result);
+    return { retcode: retcode, result: result };
+}
 
-    if (args.attach) {
-        load(scriptEnv.toAbsolutePath("session.js"));
+/**
+ * Returns a function for posting progress updates to the python side (see
+ * the --progress arg), or a function doing nothing if no progress updates
+ * were requested.
 
-        attach_ccs(debugSession, scriptEnv, args.session);
+ * @param {args} parsed arguments
+ *
+ * @returns {function} function taking the progress update to post
+ */
+function get_progress_poster(args)
+{
+    if (!args.progress) {
+        return function (update) {};
+    }
+
+    var progress_port = parseInt(args.progress.port.join(' '));
+    var progress_id = parseInt(args.progress.id.join(' '));
+
+    return function (update) {
+        post_result(progress_port, progress_id, String(update));
+    };
+}
+
+/**
+ * Records the timing of a phase; recorded timings are posted to the python
+ * side by send_trace (see the --trace arg)
+
+ * @param {name} name of phase
+ * @param {start} start time of phase (ms since the epoch)
+ */
+function trace_phase(name, start)
+{
+    traceTimings.push({
+        name: name,
+        start: start,
+        duration: new Date().getTime() - start
+    });
+}
+
+/**
+ * Posts the recorded phase timings (as a JSON list) to the python side if
+ * they were requested (--trace arg) and clears them
+
+ * @param {args} parsed arguments
+ */
+function send_trace(args)
+{
+    var timings = JSON.stringify(traceTimings);
+    traceTimings = [];
+
+    if (!args.trace) {
+        return true;
     }
 
-    quit(retcode);
+    var trace_port = parseInt(args.trace.port.join(' '));
+    var trace_id = parseInt(args.trace.id.join(' '));
+
+    return post_result(trace_port, trace_id, timings);
 }
 
-function send_result(scriptEnv, port, result)
+function send_result(scriptEnv, port, request_id, result)
 {
     load(scriptEnv.toAbsolutePath("result.js"));
+    var result_str = format_result(result);
+
+    //  Post Result to Python Socket
+    return post_result(port, request_id, result_str);
+}
+
+function format_result(result)
+{
     var result_str = String(result);
 
     //  Convert to ',' deliminated string
@@ -273,14 +440,11 @@ function send_result(scriptEnv, port, result)
         //result_str = scriptEnv.arrayToString(result, ",");
     }
 
-
-    //  Post Result to Python Socket
-    return post_result(port, result_str);
+    return result_str;
 }
 
-function quit(retcode)
+function end_session()
 {
-
     if (debugSession)
 	{
         //  Disconnect if connected
@@ -290,7 +454,19 @@ function quit(retcode)
 
         // Close debug session.
         debugSession.terminate();
+        debugSession = null;
     }
+}
+
+function quit(retcode)
+{
+    if (sessionPool != null) {
+        //  Pooled sessions (including debugSession) are terminated here
+        pool_close_all();
+        debugSession = null;
+    }
+
+    end_session();
 
     if (debugServer)
 	{
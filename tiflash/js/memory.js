@@ -48,3 +48,108 @@ function write_memory(session, scriptEnv, page, address, data)
     session.memory.writeData(page, address, data, 8);
     return true;
 }
+
+/**
+ * Save Memory function to save bytes of device's memory to a (raw binary)
+ * file
+
+ * @param {session} DSS Session object for device.
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {page} page in memory to read from
+ * @param {address} address in memory to begin reading
+ * @param {numBytes} number of bytes to read
+ * @param {file} path of file to save bytes to
+ */
+function save_memory(session, scriptEnv, page, address, numBytes, file)
+{
+    if (!session.target.isConnected()) {
+        session.target.connect();
+    }
+
+    page = Number(page);
+    address = Number(address);
+    numBytes = Number(numBytes);
+
+    session.memory.saveRaw(page, address, file, numBytes, 8, false);
+    return true;
+}
+
+/**
+ * Load Memory function to write the bytes of a (raw binary) file to
+ * device's memory
+
+ * @param {session} DSS Session object for device.
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {page} page in memory to write to
+ * @param {address} address in memory to begin writing
+ * @param {file} path of file containing bytes to write
+ */
+function load_memory(session, scriptEnv, page, address, file)
+{
+    if (!session.target.isConnected()) {
+        session.target.connect();
+    }
+
+    page = Number(page);
+    address = Number(address);
+
+    session.memory.loadRaw(page, address, file, 8, false);
+    return true;
+}
+
+/**
+ * Dump Memory function to dump a range of device's memory to a (raw binary)
+ * file chunk by chunk. Chunks are appended to the file, so only one chunk
+ * is held in memory at a time.
+
+ * @param {session} DSS Session object for device.
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {page} page in memory to read from
+ * @param {address} address in memory of start of range to dump
+ * @param {length} number of bytes in range to dump
+ * @param {offset} offset into range to start dumping at (resume)
+ * @param {chunkSize} number of bytes to read at once
+ * @param {file} path of file to append bytes to
+ * @param {progress} function called with number of bytes dumped after each
+ *      chunk
+ */
+function dump_memory(session, scriptEnv, page, address, length, offset,
+                     chunkSize, file, progress)
+{
+    if (!session.target.isConnected()) {
+        session.target.connect();
+    }
+
+    page = Number(page);
+    address = Number(address);
+    length = Number(length);
+    chunkSize = Number(chunkSize);
+
+    var done = Number(offset);
+    var chunk_file = java.io.File.createTempFile("tiflash_", ".bin");
+    var out = new java.io.FileOutputStream(file, true).getChannel();
+
+    try {
+        while (done < length) {
+            var num_bytes = Math.min(chunkSize, length - done);
+
+            session.memory.saveRaw(page, address + done,
+                                   chunk_file.getPath(), num_bytes, 8, false);
+
+            var chunk = new java.io.FileInputStream(chunk_file).getChannel();
+            var copied = 0;
+            while (copied < chunk.size()) {
+                copied += chunk.transferTo(copied, chunk.size() - copied, out);
+            }
+            chunk.close();
+
+            done += num_bytes;
+            progress(done);
+        }
+    } finally {
+        out.close();
+        chunk_file["delete"]();
+    }
+
+    return true;
+}
@@ -0,0 +1,54 @@
+/**
+ * pipeline.js - Pipeline include file that runs several steps (sets of
+ * commands) one after another in the same Debug Server Session
+ */
+
+/**
+ * Public function for running a pipeline of steps. Each step is run with
+ * run_commands() on the session that is already started. The pipeline stops
+ * at the first step that fails.
+ *
+ * The steps file contains a JSON array of steps, each step being an array
+ * of command arguments (same format as the arguments main.js is called
+ * with).
+ *
+ * The result is a JSON array containing a {retcode, result} object for each
+ * step that was run.
+
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {args} pipeline arguments (steps)
+ *
+ * @returns {response} object containing retcode and result of pipeline
+ */
+function run_pipeline(scriptEnv, args)
+{
+    var steps = read_json_file(args.steps.join(' '));
+    var responses = new Array();
+    var retcode = 0;
+    var options_changed = false;
+
+    for (var i = 0; i < steps.length; i++) {
+        var step_args = parse_args(steps[i]);
+        var response = run_commands(step_args);
+
+        if (step_args.setoption) {
+            options_changed = true;
+        }
+
+        responses.push({
+            retcode: response.retcode,
+            result: format_result(response.result)
+        });
+
+        if (response.retcode != 0) {
+            retcode = -1;
+            break;
+        }
+    }
+
+    return {
+        retcode: retcode,
+        result: JSON.stringify(responses),
+        options_changed: options_changed
+    };
+}
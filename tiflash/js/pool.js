@@ -0,0 +1,171 @@
+/**
+ * pool.js - Session pool include file that keeps Debug Server Sessions
+ * open (and connected) between requests when running in server mode
+ */
+
+POOL_DEFAULT_MAX_SESSIONS = 4;
+POOL_DEFAULT_IDLE_TIMEOUT = 300;    //  seconds
+
+/**
+ * Creates the session pool
+
+ * @param {options} server options (maxsessions, idletimeout)
+ */
+function pool_init(options)
+{
+    var max_sessions = POOL_DEFAULT_MAX_SESSIONS;
+    var idle_timeout = POOL_DEFAULT_IDLE_TIMEOUT;
+
+    if (options.maxsessions) {
+        max_sessions = Number(options.maxsessions.join(' '));
+    }
+    if (options.idletimeout) {
+        idle_timeout = Number(options.idletimeout.join(' '));
+    }
+
+    sessionPool = {
+        entries: {},
+        size: 0,
+        config: null,
+        max_sessions: max_sessions,
+        idle_timeout: idle_timeout * 1000
+    };
+}
+
+/**
+ * Returns a connected session for the given session args, reusing a pooled
+ * session for the same (ccxml, chip) when possible.
+
+ * @param {server} DSS Server object for device.
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {args} session arguments
+ *
+ * @returns {session} Debug Server Session
+ */
+function pool_acquire(server, scriptEnv, args)
+{
+    var ccxml = args.ccxml.join(' ');
+    var key = pool_key(args);
+    var entry = null;
+
+    pool_evict_idle();
+
+    entry = sessionPool.entries[key];
+
+    if (entry == null) {
+        //  The Debug Server holds one configuration at a time; sessions
+        //  opened on another ccxml have to go before switching config
+        if (sessionPool.config != ccxml) {
+            pool_close_all();
+            server.setConfig(ccxml);
+            sessionPool.config = ccxml;
+        }
+
+        if (sessionPool.size >= sessionPool.max_sessions) {
+            pool_evict_lru();
+        }
+
+        entry = {
+            session: server.openSession(".*" + args.chip + ".*"),
+            last_used: 0
+        };
+        sessionPool.entries[key] = entry;
+        sessionPool.size++;
+    }
+
+    entry.last_used = java.lang.System.currentTimeMillis();
+
+    //  Set Session Timeout
+    entry.session.setScriptTimeout(Number(args.timeout));
+
+    //  Connect to board
+    if (!entry.session.target.isConnected()) {
+        entry.session.target.connect();
+    }
+
+    return entry.session;
+}
+
+/**
+ * Removes the session for the given session args from the pool and
+ * terminates it.
+
+ * @param {args} session arguments
+ */
+function pool_discard(args)
+{
+    var key = pool_key(args);
+
+    if (sessionPool.entries[key] != null) {
+        pool_remove(key);
+    }
+}
+
+/**
+ * Terminates all sessions that have been idle longer than the idle timeout
+ */
+function pool_evict_idle()
+{
+    var now = java.lang.System.currentTimeMillis();
+
+    for (var key in sessionPool.entries) {
+        if (now - sessionPool.entries[key].last_used > sessionPool.idle_timeout) {
+            pool_remove(key);
+        }
+    }
+}
+
+/**
+ * Terminates the least recently used session
+ */
+function pool_evict_lru()
+{
+    var lru_key = null;
+
+    for (var key in sessionPool.entries) {
+        if (lru_key == null ||
+            sessionPool.entries[key].last_used < sessionPool.entries[lru_key].last_used) {
+            lru_key = key;
+        }
+    }
+
+    if (lru_key != null) {
+        pool_remove(lru_key);
+    }
+}
+
+/**
+ * Terminates all pooled sessions
+ */
+function pool_close_all()
+{
+    if (sessionPool == null) {
+        return;
+    }
+
+    for (var key in sessionPool.entries) {
+        pool_remove(key);
+    }
+}
+
+function pool_key(args)
+{
+    return args.ccxml.join(' ') + "::" + args.chip.join(' ');
+}
+
+function pool_remove(key)
+{
+    var session = sessionPool.entries[key].session;
+
+    delete sessionPool.entries[key];
+    sessionPool.size--;
+
+    try {
+        if (session.target.isConnected()) {
+            session.target.disconnect();
+        }
+        session.terminate();
+    } catch (e) {
+        //  Session already gone; nothing left to clean up
+    }
+}
@@ -1,22 +1,33 @@
+/**
+ * result.js - Result include file that posts results to the python side
+ * (see tiflash/utils/result.py)
+ */
 importPackage(java.io);
 importPackage(java.net);
-//importPackage(Packages.org.mozilla.javascript);
 
 SERVER = "localhost"
-PORT = 19876
 
-function post_result(port, result)
+/**
+ * Posts a result to the python result channel. The result is sent as a
+ * frame of the format:
+ *      [uint32 payload length][uint32 request id][payload (utf-8)]
+
+ * @param {port} port of result channel
+ * @param {request_id} id of the request the result belongs to
+ * @param {result} result string to post
+ */
+function post_result(port, request_id, result)
 {
     var connection = new Socket(SERVER, port);
-    var connection_out = new PrintWriter(connection.getOutputStream(), true);
-    //var connection_in = new BufferedReader(new InputStreamReader(connection.getInputStream()));
-
-//    var context = Context.enter();
-//    var scope = context.initStandardObjects();
-//    var json = NativeJSON.stringify(context, scope, result, null, null);
+    var connection_out = new DataOutputStream(
+                    new BufferedOutputStream(connection.getOutputStream()));
+    var payload = new java.lang.String(result).getBytes("UTF-8");
 
-    //  Send result then close socket
-    connection_out.println(result);
+    //  Send result frame then close socket
+    connection_out.writeInt(payload.length);
+    connection_out.writeInt(request_id);
+    connection_out.write(payload, 0, payload.length);
+    connection_out.flush();
     connection_out.close();
     connection.close();
 
@@ -0,0 +1,133 @@
+/**
+ * server.js - Server include file that keeps the Debug Server alive and
+ * runs commands sent over a local socket (used by DSS server mode)
+ */
+importPackage(java.io);
+importPackage(java.net);
+
+SERVER_HOST = "localhost";
+SERVER_BACKLOG = 16;
+SHUTDOWN_REQUEST = "shutdown";
+SERVER_POLL_INTERVAL = 10000;   //  ms
+
+/**
+ * Public function for serving command requests.
+ *
+ * Debug Server Sessions are kept open in a session pool (see pool.js) so
+ * back-to-back requests on the same target do not have to reconnect.
+ *
+ * The listening port is posted as the result to the python side. Each
+ * request is a single line containing a JSON array of the format:
+ *      [result_port, request_id, cmd_arg, cmd_arg, ...]
+ * The result of the commands is posted to result_port with request_id (see
+ * result.js) and the return code is written back on the request connection.
+
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {port} port to post the server port to
+ * @param {request_id} request id to post the server port with
+ * @param {options} server options (maxsessions, idletimeout)
+ */
+function serve(scriptEnv, port, request_id, options)
+{
+    var server = new ServerSocket(0, SERVER_BACKLOG,
+                                    InetAddress.getByName(SERVER_HOST));
+
+    load(scriptEnv.toAbsolutePath("pool.js"));
+    pool_init(options);
+
+    //  Wake up periodically to close idle sessions
+    server.setSoTimeout(SERVER_POLL_INTERVAL);
+
+    //  Let python side know which port to send requests to
+    post_result(port, request_id, String(server.getLocalPort()));
+
+    while (true) {
+        var client = null;
+        try {
+            client = server.accept();
+        } catch (e) {
+            pool_evict_idle();
+            continue;
+        }
+
+        var request = read_request(client);
+
+        if (request == null) {
+            client.close();
+            continue;
+        }
+
+        if (request[0] == SHUTDOWN_REQUEST) {
+            //  Stop accepting requests before acknowledging shutdown
+            server.close();
+            write_response(client, 0);
+            client.close();
+            break;
+        }
+
+        var response = handle_request(scriptEnv, request);
+
+        write_response(client, response.retcode);
+        client.close();
+    }
+}
+
+/**
+ * Runs a single request and posts its result
+
+ * @param {scriptEnv} DSS Scripting Environment object.
+ * @param {request} request array [result_port, request_id, cmd_arg, ...]
+ *
+ * @returns {response} object containing retcode and result of commands
+ */
+function handle_request(scriptEnv, request)
+{
+    var result_port = parseInt(request[0]);
+    var request_id = parseInt(request[1]);
+    var request_args = parse_args(request.slice(2));
+    var response = null;
+
+    //  Only time this request (not server startup or earlier requests)
+    traceTimings = [];
+
+    try {
+        response = run_commands(request_args);
+    } catch (e) {
+        response = { retcode: -1, result: e };
+    }
+
+    send_trace(request_args);
+    send_result(scriptEnv, result_port, request_id, response.result);
+
+    //  Session stays in the pool for the next request, unless it may be in a
+    //  bad state or had its options changed
+    if (request_args.session && (response.retcode != 0 ||
+            request_args.setoption || response.options_changed)) {
+        pool_discard(request_args.session);
+    }
+    debugSession = null;
+
+    return response;
+}
+
+function read_request(client)
+{
+    var reader = new BufferedReader(
+                    new InputStreamReader(client.getInputStream(), "UTF-8"));
+    var line = reader.readLine();
+
+    if (line == null) {
+        return null;
+    }
+
+    return JSON.parse(String(line));
+}
+
+function write_response(client, retcode)
+{
+    var writer = new PrintWriter(
+                    new OutputStreamWriter(client.getOutputStream(), "UTF-8"), true);
+
+    writer.println(String(retcode));
+    writer.flush();
+}
@@ -49,7 +49,7 @@ function verify_binary(session, scriptEnv, image, address)
         address = 0x0000;
     }
 
-    session.memory.verifyBinaryProram(image, Number(address));
+    session.memory.verifyBinaryProgram(image, Number(address));
 
     return true;
 }
@@ -0,0 +1,172 @@
+"""
+helper module for mapping device serial numbers to board ids entries
+
+Serial numbers are mapped using CCS's board_ids.json file (and the optional
+custom board_ids.json in the .tiflash/custom folder). Each key of the file is
+a serial number prefix; a serial number maps to the entry with the longest
+matching prefix.
+
+The files are loaded once and only reloaded when their mtime or size change.
+
+"""
+
+import os
+import json
+import threading
+
+from tiflash.utils import config
+
+BOARD_IDS_PATH = "/ccs_base/cloudagent/src/targetDetection/board_ids.json"
+
+# Place this file in .tiflash/custom folder to use a custom board_ids file
+CUSTOM_BOARD_IDS_FILE = "board_ids.json"
+
+
+class BoardIdsError(Exception):
+    """Generic Board Ids Error"""
+    pass
+
+
+class BoardIdsIndex(object):
+    """Longest prefix index of board_ids.json files.
+
+    Entries of later files override entries of earlier files with the same
+    prefix.
+    """
+
+    def __init__(self, paths):
+        """Initializes the index (files are loaded on first lookup)
+
+        Args:
+            paths (list): board_ids.json files to index; files that do not
+                exist are skipped (and picked up once they exist)
+        """
+        self.paths = list(paths)
+
+        self._lock = threading.Lock()
+        self._stats = None          # [(mtime, size) or None] of each path
+        self._entries = dict()      # prefix: board ids entry
+        self._lengths = list()      # prefix lengths, longest first
+
+    def lookup(self, serno):
+        """Returns the board ids entry of a serial number
+
+        Args:
+            serno (str): device serial number
+
+        Returns:
+            dict or None: board ids entry (i.e. {'deviceXml': 'cc1310f128'})
+            of longest prefix matching serno; None if no prefix matches
+
+        Raises:
+            BoardIdsError: raised if a board_ids.json file could not be parsed
+        """
+        self.__refresh()
+
+        return self.__match(serno)
+
+    def lookup_many(self, sernos):
+        """Returns the board ids entries of many serial numbers
+
+        Args:
+            sernos (list): device serial numbers
+
+        Returns:
+            dict: {serno: board ids entry or None}
+
+        Raises:
+            BoardIdsError: raised if a board_ids.json file could not be parsed
+        """
+        self.__refresh()
+
+        return dict((serno, self.__match(serno)) for serno in sernos)
+
+    def __match(self, serno):
+        entries = self._entries
+        for length in self._lengths:
+            entry = entries.get(serno[:length])
+            if entry is not None:
+                return entry
+
+        return None
+
+    def __refresh(self):
+        """Rebuilds index if any board_ids.json file changed"""
+        stats = [self.__stat(path) for path in self.paths]
+        if stats == self._stats:
+            return
+
+        with self._lock:
+            if stats == self._stats:
+                return
+
+            entries = dict()
+            for path, stat in zip(self.paths, stats):
+                if stat is None:
+                    continue
+                try:
+                    with open(path) as board_ids_f:
+                        entries.update(json.load(board_ids_f))
+                except (IOError, OSError, ValueError) as e:
+                    raise BoardIdsError("Could not load '%s': %s" % (path, e))
+
+            # Empty prefixes would match every serial number
+            entries.pop("", None)
+
+            self._entries = entries
+            self._lengths = sorted(set(len(p) for p in entries.keys()),
+                                   reverse=True)
+            self._stats = stats
+
+    def __stat(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return (stat.st_mtime, stat.st_size)
+
+
+__indexes = dict()
+__indexes_lock = threading.Lock()
+
+
+def get_board_ids_path(ccs_path):
+    """Returns full path to the board_ids.json file of a ccs installation
+
+    Args:
+        ccs_path (str): full path to ccs installation
+
+    Returns:
+        str: full path to board_ids.json file
+    """
+    return os.path.normpath(ccs_path + "/" + BOARD_IDS_PATH)
+
+
+def get_custom_board_ids_path():
+    """Returns full path to the custom board_ids.json file
+
+    Returns:
+        str: full path to .tiflash/custom/board_ids.json file
+    """
+    return os.path.normpath(config.get_custom_dir() + '/' +
+                            CUSTOM_BOARD_IDS_FILE)
+
+
+def get_index(ccs_path):
+    """Returns the board ids index of a ccs installation (includes the custom
+    board_ids.json file; shared by all callers in this process)
+
+    Args:
+        ccs_path (str): full path to ccs installation
+
+    Returns:
+        BoardIdsIndex: board ids index of ccs installation
+    """
+    paths = (get_board_ids_path(ccs_path), get_custom_board_ids_path())
+
+    with __indexes_lock:
+        if paths not in __indexes.keys():
+            __indexes[paths] = BoardIdsIndex(paths)
+
+    return __indexes[paths]
@@ -11,12 +11,19 @@ Contact: webbjcam@gmail.com
 import platform
 import os
 import re
+import json
+import time
+import threading
 
 from tiflash.utils import config
 
 TI_DIRECTORY = "ti"
 #DEFAULT_WORKSPACE = "@user.home/.tiflash/workspace"
 
+REGISTRY_FILE = "ccs_registry.json"
+REGISTRY_VERSION = 1
+REGISTRY_REVALIDATE_INTERVAL = 1.0  # seconds a validated entry is trusted
+
 class FindCCSError(Exception):
     """Generic FindCCS Error"""
     pass
@@ -179,7 +186,7 @@ def get_ccs_version(ccs_root):
                 break
     return version
 
-def get_ccs_installations(ccs_prefix):
+def get_ccs_installations(ccs_prefix, visited=None):
     """Returns a list of paths to all found ccs-root locations.
 
     Uses ccs_prefix to begin search.
@@ -187,6 +194,8 @@ def get_ccs_installations(ccs_prefix):
     Args:
         ccs_prefix (str): path to top level directory containing ccs
             installations
+        visited (dict, optional): if provided, is filled with
+            {directory: mtime} of every directory searched for installations
     Returns:
         list: list of paths to ccs installations found in search
     Raises:
@@ -199,6 +208,9 @@ def get_ccs_installations(ccs_prefix):
         if __is_ccs_root(path):
             paths.append(path)
         else:
+            if visited is not None:
+                visited[path] = os.stat(path).st_mtime
+
             directories = [ directory for directory in os.listdir(path)
                             if os.path.isdir(path + '/' + directory) ]
 
@@ -252,8 +264,8 @@ def find_ccs(version=None, ccs_prefix=None):
     if ccs_prefix is None:
         ccs_prefix = get_ccs_prefix()
 
-    # Get all CCS installations
-    ccs_installations = get_ccs_installations(ccs_prefix)
+    # Get all CCS installations (cached by registry)
+    ccs_installations = get_registry().get_installations(ccs_prefix)
 
     # Check if any CCS installations were found
     if len(ccs_installations) == 0:
@@ -262,12 +274,15 @@ def find_ccs(version=None, ccs_prefix=None):
 
     # Get version numbers of installations
     for installation in ccs_installations:
-        try:
-            v = get_ccs_version(installation)
-            ccs_installation_versions[v] = installation     # duplicate versions will be overwritten
-            version_list.append(v)
-        except:
+        v = installation['version']
+        if v is None:   # ccs.properties could not be read
             continue
+        ccs_installation_versions[v] = installation['root']     # duplicate versions will be overwritten
+        version_list.append(v)
+
+    if len(version_list) == 0:
+        raise FindCCSError(
+            "Could not find any installations of Code Composer Studio")
 
     # Filter to only matching version numbers
     if version is not None:
@@ -279,3 +294,260 @@ def find_ccs(version=None, ccs_prefix=None):
 
     ccs_path = ccs_installation_versions[max(version_list)]
     return os.path.normpath(ccs_path)
+
+
+class CCSRegistry(object):
+    """Registry of CCS installations.
+
+    Records each installation's root, version, PF filters and DSS launcher
+    path so finding an installation does not search the file system on every
+    call. The registry is kept in memory and saved to the .tiflash/cache
+    folder.
+
+    An entry is revalidated (by comparing mtimes) at most once every
+    'revalidate_interval' seconds:
+        - prefix: mtimes of every directory searched for installations
+        - installation: mtime and size of eclipse/ccs.properties
+        - dss launcher: launcher still exists
+    """
+
+    def __init__(self, cache_dir=None,
+                 revalidate_interval=REGISTRY_REVALIDATE_INTERVAL):
+        """Initializes the registry, loading the saved registry if one exists.
+
+        Args:
+            cache_dir (str, optional): directory to save the registry in
+                (default is the .tiflash/cache folder)
+            revalidate_interval (float, optional): seconds a validated entry
+                is trusted without checking the file system again
+        """
+        self.cache_dir = cache_dir or config.get_cache_dir()
+        self.revalidate_interval = revalidate_interval
+
+        self._lock = threading.RLock()
+        self._prefixes = dict()     # prefix: {'dirs': {dir: mtime}, 'roots': []}
+        self._installs = dict()     # root: installation record
+        self._dss_paths = dict()    # root: dss launcher path
+        self._checked = dict()      # entry: time entry was last validated
+
+        self._load()
+
+    def get_installations(self, ccs_prefix):
+        """Returns the CCS installations found in ccs_prefix
+
+        Args:
+            ccs_prefix (str): path to top level directory containing ccs
+                installations
+
+        Returns:
+            list: installation records of the format
+            {'root': str, 'version': str, 'pf_filters': list}
+
+        Raises:
+            OSError: raised if ccs_prefix does not exist
+        """
+        ccs_prefix = os.path.normpath(ccs_prefix)
+
+        with self._lock:
+            if not self._is_valid(('prefix', ccs_prefix),
+                                  self._check_prefix):
+                visited = dict()
+                roots = get_ccs_installations(ccs_prefix, visited=visited)
+                self._prefixes[ccs_prefix] = {'dirs': visited,
+                                              'roots': roots}
+                self._checked[('prefix', ccs_prefix)] = time.time()
+                self._save()
+
+            installations = list()
+            for root in self._prefixes[ccs_prefix]['roots']:
+                installation = self.get_installation(root)
+                if installation is not None:
+                    installations.append(installation)
+
+        return installations
+
+    def get_installation(self, ccs_root):
+        """Returns the record of a CCS installation
+
+        Args:
+            ccs_root (str): full path to root of ccs installation
+
+        Returns:
+            dict or None: installation record of the format
+            {'root': str, 'version': str, 'pf_filters': list} or None if
+            ccs_root is not a ccs installation
+        """
+        with self._lock:
+            if not self._is_valid(('install', ccs_root),
+                                  self._check_install):
+                self._installs.pop(ccs_root, None)
+                properties = self._stat_properties(ccs_root)
+                if properties is None:
+                    return None
+
+                self._installs[ccs_root] = self._read_install(ccs_root,
+                                                              properties)
+                self._checked[('install', ccs_root)] = time.time()
+                self._save()
+
+            record = self._installs[ccs_root]
+
+        return {'root': record['root'], 'version': record['version'],
+                'pf_filters': list(record['pf_filters'])}
+
+    def get_dss_path(self, ccs_root):
+        """Returns the recorded DSS launcher path of a CCS installation
+
+        Args:
+            ccs_root (str): full path to root of ccs installation
+
+        Returns:
+            str or None: path to DSS launcher or None if not recorded
+        """
+        ccs_root = os.path.normpath(ccs_root)
+
+        with self._lock:
+            if not self._is_valid(('dss', ccs_root), self._check_dss):
+                self._dss_paths.pop(ccs_root, None)
+                return None
+
+            return self._dss_paths[ccs_root]
+
+    def set_dss_path(self, ccs_root, dss_path):
+        """Records the DSS launcher path of a CCS installation
+
+        Args:
+            ccs_root (str): full path to root of ccs installation
+            dss_path (str): full path to DSS launcher (eclipsec/ccstudio)
+        """
+        ccs_root = os.path.normpath(ccs_root)
+
+        with self._lock:
+            self._dss_paths[ccs_root] = dss_path
+            self._checked[('dss', ccs_root)] = time.time()
+            self._save()
+
+    def _is_valid(self, entry, check):
+        """Returns True if entry is registered and still valid"""
+        checked = self._checked.get(entry)
+        if checked is not None and \
+                time.time() - checked < self.revalidate_interval:
+            return True
+
+        if not check(entry[1]):
+            self._checked.pop(entry, None)
+            return False
+
+        self._checked[entry] = time.time()
+        return True
+
+    def _check_prefix(self, ccs_prefix):
+        if ccs_prefix not in self._prefixes.keys():
+            return False
+
+        for directory, mtime in self._prefixes[ccs_prefix]['dirs'].items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def _check_install(self, ccs_root):
+        if ccs_root not in self._installs.keys():
+            return False
+
+        record = self._installs[ccs_root]
+        return self._stat_properties(ccs_root) == \
+            [record['properties_mtime'], record['properties_size']]
+
+    def _check_dss(self, ccs_root):
+        if ccs_root not in self._dss_paths.keys():
+            return False
+
+        return os.path.isfile(self._dss_paths[ccs_root])
+
+    def _stat_properties(self, ccs_root):
+        """Returns [mtime, size] of ccs.properties or None if missing"""
+        try:
+            stat = os.stat(ccs_root + '/eclipse/ccs.properties')
+        except OSError:
+            return None
+
+        return [stat.st_mtime, stat.st_size]
+
+    def _read_install(self, ccs_root, properties):
+        """Returns installation record read from ccs.properties"""
+        try:
+            version = get_ccs_version(ccs_root)
+            pf_filters = get_ccs_pf_filters(ccs_root)
+        except (IOError, OSError):
+            version = None
+            pf_filters = list()
+
+        return {'root': ccs_root, 'version': version,
+                'pf_filters': pf_filters,
+                'properties_mtime': properties[0],
+                'properties_size': properties[1]}
+
+    def _get_registry_path(self):
+        return os.path.join(self.cache_dir, REGISTRY_FILE)
+
+    def _load(self):
+        """Loads saved registry (entries are validated on first use)"""
+        try:
+            with open(self._get_registry_path(), 'r') as f:
+                saved = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+
+        if saved.get('version') != REGISTRY_VERSION:
+            return
+
+        self._prefixes = saved.get('prefixes', dict())
+        self._installs = saved.get('installs', dict())
+        self._dss_paths = saved.get('dss_paths', dict())
+
+    def _save(self):
+        """Saves registry; failing to save only costs searching next time"""
+        saved = {
+            'version': REGISTRY_VERSION,
+            'prefixes': self._prefixes,
+            'installs': self._installs,
+            'dss_paths': self._dss_paths,
+        }
+        registry_path = self._get_registry_path()
+        tmp_path = "%s.%d.tmp" % (registry_path, os.getpid())
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(tmp_path, 'w') as f:
+                json.dump(saved, f)
+            if os.path.exists(registry_path):
+                os.remove(registry_path)
+            os.rename(tmp_path, registry_path)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+__registry = None
+__registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the CCS installation registry of this process (created on
+    first use)
+
+    Returns:
+        CCSRegistry: registry of ccs installations
+    """
+    global __registry
+
+    with __registry_lock:
+        if __registry is None:
+            __registry = CCSRegistry()
+
+    return __registry
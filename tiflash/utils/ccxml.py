@@ -10,13 +10,15 @@ ccxml.py    --   helper module for modifying a ccxml file
 
 import platform
 import os
-#import xml.etree.ElementTree as ET
+import xml.etree.ElementTree as ET
 
 from tiflash.utils.connections import get_connections_directory
 from tiflash.utils.devices import get_devices_directory
 from tiflash.utils import xmlhelper
+from tiflash.utils import targetdb_index
 
 TARGET_CONFIG_EXT = "ti/CCSTargetConfigurations"
+CCXML_XML_VERSION = "1.2"
 
 
 class CCXMLError(Exception):
@@ -141,10 +143,101 @@ def add_serno(ccxml_path, serno, ccs_path):
 
     # Update ccxml file
     tree.write(ccxml_path, encoding='utf-8', xml_declaration=True)
+    xmlhelper.invalidate_xml_cache(ccxml_path)
 
     return True
 
 
+def generate_ccxml(ccxml_path, connection, devicetype, ccs_path, serno=None):
+    """Generates a ccxml file from the TargetDB xmls of the given connection
+    and devicetype (without calling DSS).
+
+    The connection's drivers are chosen by the isa of every cpu/router used by
+    the device, the same way the DSS target configuration generator does.
+
+    Args:
+        ccxml_path (str): full path of ccxml file to create
+        connection (str): connection name (i.e. "Texas Instruments XDS110 USB
+            Debug Probe")
+        devicetype (str): devicetype name (i.e. "CC1310F128")
+        ccs_path (str): full path to ccs installation to use
+        serno (str, optional): serial number of device to add to ccxml
+
+    Returns:
+        str: full path to generated ccxml file
+
+    Raises:
+        CCXMLError: raised if ccxml could not be generated from TargetDB xmls
+    """
+    index = targetdb_index.get_index(ccs_path)
+    conn_xml = index.get_xml('connections', connection)
+    device_xml = index.get_xml('devices', devicetype)
+
+    if conn_xml is None:
+        raise CCXMLError("Could not find connection xml for %s" % connection)
+    if device_xml is None:
+        raise CCXMLError("Could not find device xml for %s" % devicetype)
+
+    try:
+        conn_root = xmlhelper.get_cached_xml_root(conn_xml)
+        isas = __get_isas(device_xml, xmlhelper.get_targetDB(ccs_path),
+                          set())
+    except Exception as e:
+        raise CCXMLError("Error parsing TargetDB xmls: %s" % e)
+
+    drivers = list()
+    for drivers_element in conn_root.findall("drivers"):
+        if drivers_element.attrib.get('isa', '').lower() not in isas:
+            continue
+        for instance in drivers_element.findall("instance"):
+            if instance.attrib not in [d.attrib for d in drivers]:
+                drivers.append(instance)
+
+    if len(drivers) == 0:
+        raise CCXMLError("Connection %s has no drivers for device %s"
+                         % (connection, devicetype))
+
+    conn_id = "%s_0" % connection
+    device_id = "%s_0" % devicetype
+    conn_name = os.path.basename(conn_xml)
+    device_name = os.path.basename(device_xml)
+
+    root = ET.Element("configurations", XML_version=CCXML_XML_VERSION,
+                      id="configurations_0")
+    config_element = ET.SubElement(root, "configuration",
+                                   XML_version=CCXML_XML_VERSION, id=conn_id)
+    ET.SubElement(config_element, "instance", XML_version=CCXML_XML_VERSION,
+                  desc=conn_id, href="connections/%s" % conn_name, id=conn_id,
+                  xml=conn_name, xmlpath="connections")
+    conn_element = ET.SubElement(config_element, "connection",
+                                 XML_version=CCXML_XML_VERSION, id=conn_id)
+
+    for instance in drivers:
+        ET.SubElement(conn_element, "instance", dict(instance.attrib))
+
+    if serno:
+        conn_element.append(_create_serno_property(serno, conn_xml))
+
+    platform_element = ET.SubElement(conn_element, "platform",
+                                     XML_version=CCXML_XML_VERSION,
+                                     id="platform_0")
+    ET.SubElement(platform_element, "instance", XML_version=CCXML_XML_VERSION,
+                  desc=device_id, href="devices/%s" % device_name,
+                  id=device_id, xml=device_name, xmlpath="devices")
+
+    __indent(root)
+
+    ccxml_dir = os.path.dirname(ccxml_path)
+    if ccxml_dir and not os.path.isdir(ccxml_dir):
+        os.makedirs(ccxml_dir)
+
+    ET.ElementTree(root).write(ccxml_path, encoding='utf-8',
+                               xml_declaration=True)
+    xmlhelper.invalidate_xml_cache(ccxml_path)
+
+    return ccxml_path
+
+
 def _create_serno_property(serno, conn_xml):
     """INTERNAL FUNCTION: Creates a serial number property from the given
         connection xml file and adds the given serial number.
@@ -205,7 +298,7 @@ def get_connection_xml(ccxml_path, ccs_path):
     Returns:
         (str) path to connection xml
     """
-    root = xmlhelper.get_xml_root(ccxml_path)
+    root = xmlhelper.get_cached_xml_root(ccxml_path)
     xmlpath = None
 
     connection_name = get_connection(ccxml_path)
@@ -236,7 +329,7 @@ def get_device_xml(ccxml_path, ccs_path):
     Returns:
         (str) path to device xml
     """
-    root = xmlhelper.get_xml_root(ccxml_path)
+    root = xmlhelper.get_cached_xml_root(ccxml_path)
     xmlpath = None
 
     device_instance = root.find("configuration/connection/platform/instance[@xml]")
@@ -291,6 +384,42 @@ def get_ccxml_path(ccxml_name):
     return ccxml_path
 
 
+def __get_isas(xml_path, targetdb, visited):
+    """Returns the set of isas (lowercase) used in a TargetDB xml, including
+    the xmls it references (i.e. cpus of a device)"""
+    isas = set()
+    root = xmlhelper.get_cached_xml_root(xml_path)
+
+    for element in root.iter():
+        if 'isa' in element.attrib.keys():
+            isas.add(element.attrib['isa'].lower())
+
+        href = element.attrib.get('href')
+        if element.tag == "instance" and href and href not in visited:
+            visited.add(href)
+            href_path = os.path.normpath(targetdb + '/' + href)
+            if os.path.isfile(href_path):
+                isas.update(__get_isas(href_path, targetdb, visited))
+
+    return isas
+
+
+def __indent(element, level=0):
+    """Indents element (and children) in place for pretty printing"""
+    indent = "\n" + level * "    "
+    children = list(element)
+
+    if children:
+        element.text = indent + "    "
+        for child in children:
+            __indent(child, level + 1)
+            child.tail = indent + "    "
+        children[-1].tail = indent
+
+    if level == 0:
+        element.tail = "\n"
+
+
 def __get_ccxml_root(ccxml_path):
     """Returns the root Element of the ccxml file
 
@@ -303,6 +432,6 @@ def __get_ccxml_root(ccxml_path):
     if not os.path.exists(ccxml_path):
         raise CCXMLError("Could not find ccxml: %s" % ccxml_path)
 
-    root = xmlhelper.get_xml_root(ccxml_path)
+    root = xmlhelper.get_cached_xml_root(ccxml_path)
 
     return root
@@ -11,6 +11,7 @@ import os
 
 DEFAULT_TIFLASH_FOLDER = "~/.tiflash"
 DEFAULT_CUSTOM_FOLDER = "custom"
+DEFAULT_CACHE_FOLDER = "cache"
 
 def init_config_dirs():
     """Creates .tiflash base folder as well as any configuration subfolders
@@ -21,6 +22,7 @@ def init_config_dirs():
     """
     base = get_base_dir()
     custom = get_custom_dir()
+    cache = get_cache_dir()
 
     if not os.path.exists(base):
         os.mkdir(base)
@@ -28,6 +30,9 @@ def init_config_dirs():
     if not os.path.exists(custom):
         os.mkdir(custom)
 
+    if not os.path.exists(cache):
+        os.mkdir(cache)
+
 
 
 def get_base_dir():
@@ -47,3 +52,12 @@ def get_custom_dir():
     """
 
     return os.path.join(get_base_dir(), DEFAULT_CUSTOM_FOLDER)
+
+def get_cache_dir():
+    """Returns the path to the cache folder inside .tiflash folder
+
+    Returns:
+        str: full path to the .tiflash/cache folder
+    """
+
+    return os.path.join(get_base_dir(), DEFAULT_CACHE_FOLDER)
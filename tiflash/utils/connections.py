@@ -11,8 +11,10 @@ Contact: webbjcam@gmail.com
 import os
 import re
 import json
+import threading
 
 from tiflash.utils import xmlhelper
+from tiflash.utils import targetdb_index
 
 CONNECTIONS_DIR = "/ccs_base/common/targetdb/connections"
 DEBUG_PROBES_PATH = "/ccs_base/cloudagent/src/targetDetection/debug_probes.json"
@@ -20,6 +22,10 @@ DEBUG_PROBES_PATH = "/ccs_base/cloudagent/src/targetDetection/debug_probes.json"
 # Place this file in utils/ folder to use a custom debug_probes file
 CUSTOM_DEBUG_PROBES_FILE = "debug_probes.json"
 
+# debug_probes.json file: (file stats, {(vid, pid): connection xml path})
+__vidpid_maps = dict()
+__vidpid_maps_lock = threading.Lock()
+
 class ConnectionsError(Exception):
     """Generic Connection Error"""
     pass
@@ -62,16 +68,8 @@ def get_connections(ccs_path):
     #   Set Connections directory
     connections_directory = get_connections_directory(ccs_path)
 
-    #   Get connections xmls
-    connection_xmls = get_connection_xmls(ccs_path, full_path=True)
-
-    connection_list = list()
-    for cxml in connection_xmls:
-        try:    # Some xmls are not valid connection xml files
-            connection = get_connection_name(cxml)
-        except Exception:
-            continue
-        connection_list.append(connection)
+    connection_list = targetdb_index.get_index(ccs_path).get_names(
+        'connections')
 
     return connection_list
 
@@ -141,12 +139,12 @@ def get_connection_name(conn_xml):
         ConnectionsError: raises exception xml is unable to be parsed
 
     """
-    root = __get_connection_root(conn_xml)
+    tag, attrib = __get_connection_root_attrib(conn_xml)
 
-    if root.tag != "connection":
+    if tag != "connection":
         raise ConnectionsError("Error parsing connection xml: %s" % conn_xml)
 
-    connection_name = xmlhelper.get_attrib_value(root.attrib, ["desc", "id"])
+    connection_name = xmlhelper.get_attrib_value(attrib, ["desc", "id"])
 
     return connection_name
 
@@ -189,9 +187,34 @@ def get_connection_xml_from_vidpid(vid, pid, ccs_path):
     Returns:
         str: full connection name
     """
-    connection = None
-    probe_list = None
+    vidpid_map = get_vidpid_map(ccs_path)
+
+    if (vid, pid) not in vidpid_map.keys():
+        raise ConnectionsError(
+            "Was not able to find a connection with given vid (%s) and pid (%s)"
+             % (vid, pid))
+
+    return vidpid_map[(vid, pid)]
+
+
+def get_vidpid_map(ccs_path):
+    """Returns dict mapping (vid, pid) of debug probes to connection xmls
+
+    Built from debug_probes.json file ('connectionXml' and 'probeDetection'
+    entries). The map is only rebuilt when the debug_probes.json file or
+    the connections directory change.
+
+    Args:
+        ccs_path (str): full path to ccs installation to use
+
+    Returns:
+        dict: {(vid, pid): full path to connection xml (None if connection
+            xml is not installed)}
 
+    Raises:
+        ConnectionsError: raises exception if debug_probes.json file can not
+            be found
+    """
     # Allow for using custom debug probes file by placing custom file in utils/
     custom_debug_probes_path = os.path.normpath(os.path.dirname(__file__) +
                                             '/' + CUSTOM_DEBUG_PROBES_FILE)
@@ -201,43 +224,65 @@ def get_connection_xml_from_vidpid(vid, pid, ccs_path):
     else:
         debug_probes_file = os.path.normpath(ccs_path + "/" + DEBUG_PROBES_PATH)
 
-    if not os.path.isfile(debug_probes_file):
-        raise DeviceError("Could not find 'debug_probes.json' file: %s"
-                          % debug_probes_file)
+    try:
+        connections_directory = get_connections_directory(ccs_path)
+        probes_stat = os.stat(debug_probes_file)
+        stats = (probes_stat.st_mtime, probes_stat.st_size,
+                 os.stat(connections_directory).st_mtime)
+    except OSError:
+        raise ConnectionsError("Could not find 'debug_probes.json' file: %s"
+                               % debug_probes_file)
+
+    key = (debug_probes_file, os.path.normpath(ccs_path))
+    cached = __vidpid_maps.get(key)
+    if cached is not None and cached[0] == stats:
+        return cached[1]
 
-    with open(debug_probes_file) as f:
-        probe_list = json.load(f)
+    with __vidpid_maps_lock:
+        with open(debug_probes_file) as f:
+            probe_list = json.load(f)
 
-    for probe in probe_list:
-        if int(probe['vid'], 16) == vid and int(probe['pid'], 16) == pid:
+        connection_xmls = set(get_connection_xmls(ccs_path))
+
+        vidpid_map = dict()
+        for probe in probe_list:
             if "connectionXml" in probe.keys():
                 connection = probe['connectionXml']
-                break
             elif "probeDetection" in probe.keys():
                 connection = probe['probeDetection']['algorithm']
-                break
-    else:
-        raise ConnectionsError(
-            "Was not able to find a connection with given vid (%s) and pid (%s)"
-             % (vid, pid))
+            else:
+                continue
+
+            vidpid = (int(probe['vid'], 16), int(probe['pid'], 16))
+            if vidpid in vidpid_map.keys():     # first entry wins
+                continue
+
+            xml_name = connection
+            if not xml_name.endswith('.xml'):
+                xml_name += ".xml"
 
-    connection_path = get_connection_xml_path(connection, ccs_path)
-    return connection_path
+            vidpid_map[vidpid] = None
+            if xml_name in connection_xmls:
+                vidpid_map[vidpid] = os.path.normpath(
+                    connections_directory + "/" + xml_name)
 
+        __vidpid_maps[key] = (stats, vidpid_map)
 
-def __get_connection_root(connection_path):
-    """Returns the root Element of the connection file
+    return vidpid_map
+
+
+def __get_connection_root_attrib(connection_path):
+    """Returns the tag and attributes of the root Element of the connection
+    file (without parsing the whole file)
 
     Args:
         connection_path (str): full path to connection file to parse
 
     Returns:
-        xml.Element: root element of connection file
+        tuple: (tag, attrib dict) of root element of connection file
     """
     if not os.path.exists(connection_path):
         raise ConnectionsError("Could not find connection xml: %s" %
             connection_path)
 
-    root = xmlhelper.get_xml_root(connection_path)
-
-    return root
+    return xmlhelper.get_xml_root_attrib(connection_path)
@@ -12,6 +12,7 @@ import os
 import re
 
 from tiflash.utils import xmlhelper
+from tiflash.utils import targetdb_index
 
 CPUS_DIR = "/ccs_base/common/targetdb/cpus"
 
@@ -57,16 +58,7 @@ def get_cpus(ccs_path):
     #   Set CPU directory
     cpus_directory = get_cpus_directory(ccs_path)
 
-    #   Get cpus xmls
-    cpu_xmls = get_cpu_xmls(ccs_path, full_path=True)
-
-    cpu_list = list()
-    for cxml in cpu_xmls:
-        try:    # Some xmls are not valid cpu xml files
-            cpu = get_cpu_name(cxml)
-        except Exception:
-            continue
-        cpu_list.append(cpu)
+    cpu_list = targetdb_index.get_index(ccs_path).get_names('cpus')
 
     return cpu_list
 
@@ -133,12 +125,12 @@ def get_cpu_name(xml_file):
         CPUError: raises exception xml is unable to be parsed
 
     """
-    root = __get_cpu_root(xml_file)
+    tag, attrib = __get_cpu_root_attrib(xml_file)
 
-    if root.tag != "cpu":
-        raise CPUError("Error parsing cpu xml: %s" % cpu_xml)
+    if tag != "cpu":
+        raise CPUError("Error parsing cpu xml: %s" % xml_file)
 
-    cpu_name = xmlhelper.get_attrib_value(root.attrib, ["desc", "id"])
+    cpu_name = xmlhelper.get_attrib_value(attrib, ["desc", "id"])
 
     return cpu_name
 
@@ -171,18 +163,17 @@ def find_cpu(cpu_name, ccs_path):
     return match_list
 
 
-def __get_cpu_root(cpu_path):
-    """Returns the root Element of the cpu file
+def __get_cpu_root_attrib(cpu_path):
+    """Returns the tag and attributes of the root Element of the cpu file
+    (without parsing the whole file)
 
     Args:
         cpu_path (str): full path to cpu file to parse
 
     Returns:
-        xml.Element: root element of cpu file
+        tuple: (tag, attrib dict) of root element of cpu file
     """
     if not os.path.exists(cpu_path):
         raise CPUError("Could not find cpu xml: %s" % cpu_path)
 
-    root = xmlhelper.get_xml_root(cpu_path)
-
-    return root
+    return xmlhelper.get_xml_root_attrib(cpu_path)
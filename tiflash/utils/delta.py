@@ -0,0 +1,136 @@
+"""
+helper module for delta flashing (see TIFlash.flash 'delta')
+
+The images are split into sectors. The part of each sector an image loads
+(a 'piece') is compared by CRC32 against the device's memory at the same
+address; only sectors with a differing piece are flashed. Adjacent pieces of
+the differing sectors are merged into runs, each flashed as a binary image
+at its address.
+
+Delta flashing is only safe when the flash loader erases just the sectors it
+writes; DELTA_ERASE_OPTIONS lists the flash options (per device family) that
+select it.
+
+"""
+
+import zlib
+
+DELTA_SECTOR_SIZE = 0x1000  # default sector size (bytes)
+
+# (option id, value) of the flash options that only erase the sectors written
+DELTA_ERASE_OPTIONS = [
+    ("FlashEraseSetting", "Necessary Sectors Only"),    # CC13xx/CC26xx
+    ("FlashProgramOption", "Necessary Pages Only"),     # CC32xx
+    ("FlashEraseSelection",
+     "Erase and download necessary segments only"),     # MSP432
+]
+
+
+class DeltaError(Exception):
+    """Generic Delta Error"""
+    pass
+
+
+def get_sectors(images, sector_size=DELTA_SECTOR_SIZE):
+    """Splits the segments of images into sectors
+
+    Args:
+        images (list): tiflash.image.Image of each image in load order
+        sector_size (int): size of a flash sector (bytes)
+
+    Returns:
+        list: (sector address, pieces) of each sector an image loads, sorted
+        by address; pieces is a list of (address, bytes) of the data loaded
+        into the sector
+    """
+    if sector_size < 1:
+        raise DeltaError("Sector size must be at least 1 byte")
+
+    sectors = dict()
+    for img in images:
+        for i in range(len(img)):
+            start = img.addresses[i]
+            end = start + img.sizes[i]
+            data = img.get_data(i)
+
+            address = start
+            while address < end:
+                sector = address - address % sector_size
+                piece_end = min(end, sector + sector_size)
+                sectors.setdefault(sector, list()).append(
+                    (address, data[address - start:piece_end - start]))
+                address = piece_end
+
+    return sorted(sectors.items())
+
+
+def get_read_ranges(sectors):
+    """Returns the address ranges to read from the device to get the
+    checksum of every piece (adjacent pieces merged)
+
+    Args:
+        sectors (list): sectors returned by get_sectors()
+
+    Returns:
+        list: (address, size) of each range
+    """
+    ranges = list()
+
+    for address, data in sorted(p for s, pieces in sectors for p in pieces):
+        if ranges and address <= ranges[-1][0] + ranges[-1][1]:
+            end = max(ranges[-1][0] + ranges[-1][1], address + len(data))
+            ranges[-1] = (ranges[-1][0], end - ranges[-1][0])
+        else:
+            ranges.append((address, len(data)))
+
+    return ranges
+
+
+def get_checksum(data):
+    """Returns the CRC32 (unsigned) of data"""
+    return zlib.crc32(bytes(data)) & 0xFFFFFFFF
+
+
+def get_changed_sectors(sectors, checksums):
+    """Returns the sectors with a piece whose checksum differs from the
+    device's
+
+    Args:
+        sectors (list): sectors returned by get_sectors()
+        checksums (dict): {piece address: checksum of device memory}; pieces
+            missing from the dict are treated as differing
+
+    Returns:
+        list: changed sectors (same format as get_sectors())
+    """
+    changed = list()
+
+    for sector, pieces in sectors:
+        for address, data in pieces:
+            if checksums.get(address) != get_checksum(data):
+                changed.append((sector, pieces))
+                break
+
+    return changed
+
+
+def get_runs(sectors):
+    """Returns the data to flash for the given sectors, adjacent pieces
+    merged into runs
+
+    Args:
+        sectors (list): sectors returned by get_sectors() (i.e. the changed
+            sectors)
+
+    Returns:
+        list: (address, bytes) of each run
+    """
+    runs = list()
+
+    for address, data in sorted(p for s, pieces in sectors for p in pieces):
+        if runs and runs[-1][0] + len(runs[-1][1]) == address:
+            runs[-1][1].extend(data)
+        else:
+            runs.append((address, bytearray(data)))
+
+    return [(address, bytes(data)) for address, data in runs]
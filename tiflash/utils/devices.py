@@ -10,19 +10,19 @@ Contact: webbjcam@gmail.com
 
 import os
 import re
-import json
 
 from tiflash.utils import xmlhelper
-from tiflash.utils import config
+from tiflash.utils import targetdb_index
+from tiflash.utils import board_ids
 
 from tiflash.utils.connections import get_connections_directory
 from tiflash.utils.cpus import get_cpus_directory
 
 DEVICES_DIR = "/ccs_base/common/targetdb/devices"
-BOARD_IDS_PATH = "/ccs_base/cloudagent/src/targetDetection/board_ids.json"
+BOARD_IDS_PATH = board_ids.BOARD_IDS_PATH
 
-# Place this file in utils/ folder to use a custom board_ids file
-CUSTOM_BOARD_IDS_FILE = "board_ids.json"
+# Place this file in .tiflash/custom folder to use a custom board_ids file
+CUSTOM_BOARD_IDS_FILE = board_ids.CUSTOM_BOARD_IDS_FILE
 
 
 class DeviceError(Exception):
@@ -61,22 +61,13 @@ def get_device_xml_from_devicetype(devicetype, ccs_path):
         DeviceError: raises exception if devices directory can not
             be found
     """
-    device_xml = None
-
-    # Get devices xmls
-    device_xmls = get_device_xmls(ccs_path, full_path=True)
-
-    for dxml in device_xmls:
-        try:    # Some xmls are not valid device xml files
-            device = get_devicetype(dxml)
-        except Exception:
-            continue
+    # Raises DeviceError if devices directory does not exist
+    get_devices_directory(ccs_path)
 
-        if device == devicetype:
-            device_xml = os.path.normpath(dxml)
-            break
+    device_xml = targetdb_index.get_index(ccs_path).get_xml('devices',
+                                                            devicetype)
 
-    else:
+    if device_xml is None:
         raise DeviceError("Could not find device xml for %s. Please install "
                             "drivers for %s.""" % (devicetype, devicetype))
 
@@ -93,13 +84,13 @@ def get_devicetype(device_xml):
         str: devicetype set in device xml file
     """
     devicetype = None
-    root = __get_device_root(device_xml)
+    tag, attrib = __get_device_root_attrib(device_xml)
 
-    if root.tag != "device":
+    if tag != "device":
         raise DeviceError("Error parsing devicetype from device xml: %s" %
                         device_xml)
 
-    devicetype = xmlhelper.get_attrib_value(root.attrib, ["desc", "partnum", "id"])
+    devicetype = xmlhelper.get_attrib_value(attrib, ["desc", "partnum", "id"])
 
     return devicetype
 
@@ -114,13 +105,21 @@ def get_cpu(device_xml):
         str: cpu name
     """
     cpu = None
-    root = __get_device_root(device_xml)
-
-    cpu_element = root.find(".//cpu")
-    if cpu_element is None:
+    if not os.path.exists(device_xml):
+        raise DeviceError("Could not find device: %s" % device_xml)
+
+    # Only parse up to the first cpu element
+    elements = xmlhelper.iter_xml_elements(device_xml)
+    try:
+        cpu_attrib = next((attrib for tag, attrib in elements if tag == "cpu"),
+                          None)
+    finally:
+        elements.close()
+
+    if cpu_attrib is None:
         raise DeviceError("Error parsing cpu from device xml: %s" % device_xml)
 
-    cpu = xmlhelper.get_attrib_value(cpu_element.attrib, ["desc", "id"])
+    cpu = xmlhelper.get_attrib_value(cpu_attrib, ["desc", "id"])
 
     return cpu
 
@@ -252,16 +251,7 @@ def get_devicetypes(ccs_path):
     #   Set Devices directory
     devices_directory = get_devices_directory(ccs_path)
 
-    #   Get devices xmls
-    device_xmls = get_device_xmls(ccs_path, full_path=True)
-
-    device_list = list()
-    for cxml in device_xmls:
-        try:    # Some xmls are not valid device xml files
-            device = get_devicetype(cxml)
-        except Exception:
-            continue
-        device_list.append(device)
+    device_list = targetdb_index.get_index(ccs_path).get_names('devices')
 
     return device_list
 
@@ -313,43 +303,59 @@ def get_device_xml_from_serno(serno, ccs_path):
             determined by given serial number
 
     """
-    devices_directory = get_devices_directory(ccs_path)
+    dxml_fullpath = get_device_xmls_from_sernos([serno], ccs_path)[serno]
 
-    board_ids_path = os.path.normpath(ccs_path + "/" + BOARD_IDS_PATH)
+    if dxml_fullpath is None:
+        raise DeviceError(
+            "Could not determine devicetype from %s." % serno)
 
-    if not os.path.isfile(board_ids_path):
-        raise DeviceError("Could not find 'board_ids.json' file: %s"
-                          % board_ids_path)
+    if not os.path.isfile(dxml_fullpath):
+        raise DeviceError("Could not find '%s' file." %
+                          os.path.basename(dxml_fullpath))
 
-    # Load default board_ids.json from CCS installation
-    with open(board_ids_path) as board_ids_f:
-        board_ids = json.load(board_ids_f)
+    return dxml_fullpath
 
-    # Allow for using custom boards_id file by placing custom file in .tiflash/custom folder
-    custom_board_ids_path = os.path.normpath(config.get_custom_dir() + '/' +
-                                             CUSTOM_BOARD_IDS_FILE)
 
-    # Update default board ids with entries from custom file
-    if os.path.isfile(custom_board_ids_path):
-        with open(custom_board_ids_path) as custom_board_ids_f:
-            custom_board_ids = json.load(custom_board_ids_f)
+def get_device_xmls_from_sernos(sernos, ccs_path):
+    """ Returns full paths to device xmls determined by device serial nos.
 
-        board_ids.update(custom_board_ids)
+    Uses board_ids.json file (and custom board_ids.json file in .tiflash/custom
+    folder) to determine devicetypes. The entry with the longest prefix
+    matching the serial no. is used.
 
-    sernos = board_ids.keys()
-    for s in sernos:
-        if serno.startswith(s):
-            dxml = board_ids[s]['deviceXml'] + ".xml"
-            break
-    else:
-        raise DeviceError(
-            "Could not determine devicetype from %s." % serno)
+    Args:
+        sernos (list): device serial numbers
+        ccs_path (str): full path to ccs installation to use
 
-    dxml_fullpath = os.path.abspath(devices_directory + "/" + dxml)
-    if not os.path.isfile(dxml_fullpath):
-        raise DeviceError("Could not find '%s' file." % dxml)
+    Returns:
+        dict: {serno: path to device xml or None if devicetype could not be
+            determined}
 
-    return dxml_fullpath
+    Raises:
+        DeviceError: raises exception if board_ids.json file can not be found
+            or parsed
+    """
+    devices_directory = get_devices_directory(ccs_path)
+
+    board_ids_path = board_ids.get_board_ids_path(ccs_path)
+
+    if not os.path.isfile(board_ids_path):
+        raise DeviceError("Could not find 'board_ids.json' file: %s"
+                          % board_ids_path)
+
+    try:
+        entries = board_ids.get_index(ccs_path).lookup_many(sernos)
+    except board_ids.BoardIdsError as e:
+        raise DeviceError(str(e))
+
+    dxmls = dict()
+    for serno, entry in entries.items():
+        dxmls[serno] = None
+        if entry is not None:
+            dxml = entry['deviceXml'] + ".xml"
+            dxmls[serno] = os.path.abspath(devices_directory + "/" + dxml)
+
+    return dxmls
 
 
 def get_device_from_serno(serno, ccs_path):
@@ -387,6 +393,22 @@ def __get_device_root(device_path):
     if not os.path.exists(device_path):
         raise DeviceError("Could not find device: %s" % device_path)
 
-    root = xmlhelper.get_xml_root(device_path)
+    root = xmlhelper.get_cached_xml_root(device_path)
 
     return root
+
+
+def __get_device_root_attrib(device_path):
+    """Returns the tag and attributes of the root Element of the device file
+    (without parsing the whole file)
+
+    Args:
+        device_path (str): full path to device file to parse
+
+    Returns:
+        tuple: (tag, attrib dict) of root element of device file
+    """
+    if not os.path.exists(device_path):
+        raise DeviceError("Could not find device: %s" % device_path)
+
+    return xmlhelper.get_xml_root_attrib(device_path)
@@ -9,10 +9,16 @@ Contact: webbjcam@gmail.com
 """
 
 import subprocess
+import threading
 import platform
+import socket
+import json
 import os
 
-from tiflash.utils.result import ResultServer
+from tiflash.utils import config
+from tiflash.utils import ccs
+from tiflash.utils import trace
+from tiflash.utils.result import get_channel
 
 MAIN_JS_PATH = "js/main.js"
 ECLIPSE_SUBPATH = "/eclipse"
@@ -20,12 +26,32 @@ DSS_ARGS = ['-nosplash', '-application', 'com.ti.ccstudio.apps.runScript',
             '-product', 'com.ti.ccstudio.branding.product', '-dss.rhinoArgs']
 
 CMD_DEFAULT_TIMEOUT = 60
+RESULT_TIMEOUT = 10     # time to wait for a result once command completed
+TRACE_TIMEOUT = 1       # time to wait for DSS timings once command completed
+
+# DSS Server (long running main.js serving command requests)
+SERVER_HOST = "localhost"
+SERVER_STATE_FILE = "dss_server.json"
+SERVER_START_TIMEOUT = 120
+SERVER_CONNECT_TIMEOUT = 2
+SERVER_MAX_SESSIONS = 4     # max number of debug sessions kept open
+SERVER_IDLE_TIMEOUT = 300   # seconds an unused debug session is kept open
+SHUTDOWN_REQUEST = "shutdown"
+ATTACH_CMD = "--attach"
+
+__runner = threading.local()
+
 
 class DSSError(Exception):
     """Generic DSS Error"""
     pass
 
 
+class DSSServerUnavailable(DSSError):
+    """Raised when a DSS server can not be reached"""
+    pass
+
+
 def find_dss(ccs_path):
     """Finds path to eclipsec/ccstudio executable.
 
@@ -58,6 +84,11 @@ def find_dss(ccs_path):
     if not os.path.exists(ccs_path):
         raise DSSError("Could not find CCS installation: %s" % ccs_path)
 
+    # Launcher found on a previous search
+    script_launcher_path = ccs.get_registry().get_dss_path(ccs_path)
+    if script_launcher_path is not None:
+        return script_launcher_path
+
     walker = os.walk(ccs_path + ECLIPSE_SUBPATH)
 
     for root, dirs, files in walker:
@@ -69,34 +100,338 @@ def find_dss(ccs_path):
     else:
         raise DSSError("Could not find script launcher: %s" % script_launcher)
 
+    ccs.get_registry().set_dss_path(ccs_path, script_launcher_path)
+
     return script_launcher_path
 
 
-def call_dss(dss_path, commands, workspace=None, timeout=CMD_DEFAULT_TIMEOUT):
+@trace.traced("dss.call_dss")
+def call_dss(dss_path, commands, workspace=None, timeout=CMD_DEFAULT_TIMEOUT,
+             progress=None):
     """Calls js/main.js via new script runner (eclipsec)
 
-    Makes a subprocess call to main.js by using the given eclipsec exe
+    If a DSS server is running for the given dss_path (see start_server), the
+    commands are sent to the server. Otherwise a subprocess call to main.js is
+    made using the given eclipsec exe.
 
     Args:
         dss_path (str): Path to dss.bat/.sh installation to use
         commands (list): list of string commands to pass to main.js
         workspace (str): workspace name
         timeout (int):  time to give command to complete (negative == infinite)
+        progress (callable, optional): function called with each progress
+            update (str) posted by the commands (called from a background
+            thread)
 
     Returns:
         (bool, str): returns tuple with (bool=result, str=value)
             caller must convert value to proper value
 
     """
-    # Open local socket for IPC (result of command is posted to socket)
-    result_server = ResultServer(debug=False)
-    port = result_server.start()
+    # Commands of this thread are run by someone else (see set_runner)
+    runner = getattr(__runner, 'call_dss', None)
+    if runner is not None:
+        return runner(dss_path, commands, workspace=workspace,
+                      timeout=timeout, progress=progress)
+
+    # Result of command is posted to the result channel (used for IPC)
+    request = get_channel().open_request()
+    progress_request = None
+    trace_request = None
     result = None
+    retcode = None
+
+    # Progress updates are posted to their own request
+    if progress is not None:
+        progress_request = get_channel().open_request(callback=progress)
+        commands = list(commands) + format_args({'progress': {
+            'port': progress_request.port, 'id': progress_request.id}})
+
+    # DSS side timings are posted to their own request (only when tracing)
+    if trace.is_enabled():
+        trace_request = get_channel().open_request()
+        commands = list(commands) + format_args({'trace': {
+            'port': trace_request.port, 'id': trace_request.id}})
 
     # Remove timeout if negative number provided (inifinite timeout)
     if timeout < 0:
         timeout = None
 
+    # Attaching CCS needs its own process (it waits on stdin)
+    server_port = None
+    if ATTACH_CMD not in commands:
+        server_port = get_server(dss_path, workspace=workspace)
+
+    try:
+        if server_port is not None:
+            with trace.span("dss.server_request", port=server_port) as span:
+                try:
+                    retcode = _send_request(server_port,
+                                [request.port, request.id] + list(commands),
+                                timeout=timeout)
+                except DSSServerUnavailable:
+                    # Stale server entry; fall back to spawning a new process
+                    __remove_server_state(dss_path)
+                except Exception as e:
+                    print(e)
+                    return (False, "Command Failed")
+
+                if retcode is not None and trace_request is not None:
+                    __add_dss_spans(span, trace_request)
+
+        if retcode is None:
+            cmd = _get_dss_cmd(dss_path, request.port, request.id, commands,
+                                workspace=workspace)
+            with trace.span("dss.spawn") as span:
+                try:
+                    retcode = subprocess.call(cmd)
+                except Exception as e:
+                    print(e)
+                    return (False, "Command Failed")
+
+                if trace_request is not None:
+                    __add_dss_spans(span, trace_request)
+
+        # Command completed; result is posted (or in flight) by now
+        with trace.span("dss.result"):
+            result = request.get_result(timeout=RESULT_TIMEOUT)
+    finally:
+        request.close()
+        if progress_request is not None:
+            progress_request.close()
+        if trace_request is not None:
+            trace_request.close()
+
+    return (retcode == 0, result)
+
+
+def set_runner(runner):
+    """Sets the function running the DSS calls made by this thread (i.e.
+    tiflash.aio runs them on an event loop)
+
+    Args:
+        runner (callable or None): function with the signature of call_dss
+            or None to run DSS calls in this thread again
+    """
+    __runner.call_dss = runner
+
+
+def start_server(dss_path, workspace=None, debug=False,
+                 timeout=SERVER_START_TIMEOUT, max_sessions=None,
+                 idle_timeout=None):
+    """Starts a DSS server (main.js in server mode) for the given dss_path.
+
+    The server keeps the Debug Server alive and runs commands sent by
+    call_dss, saving the JVM startup on every command. Debug sessions are
+    pooled by (ccxml, chip) so back-to-back commands on the same board reuse
+    a connected target. If a server is already running for dss_path, its
+    port is returned.
+
+    Args:
+        dss_path (str): Path to dss.bat/.sh installation to use
+        workspace (str): workspace name
+        debug (bool): display output of DSS server
+        timeout (int): time to wait for the server to start
+        max_sessions (int, optional): max number of debug sessions kept open
+            (default: SERVER_MAX_SESSIONS)
+        idle_timeout (int, optional): seconds an unused debug session is kept
+            open (default: SERVER_IDLE_TIMEOUT)
+
+    Returns:
+        int: port the DSS server is listening on
+
+    Raises:
+        DSSError: raises exception if DSS server could not be started
+    """
+    server_port = get_server(dss_path, workspace=workspace)
+    if server_port is not None:
+        return server_port
+
+    request = get_channel().open_request()
+
+    server_args = {
+        'maxsessions': max_sessions or SERVER_MAX_SESSIONS,
+        'idletimeout': idle_timeout or SERVER_IDLE_TIMEOUT,
+    }
+    commands = format_args({'server': server_args})
+    if debug:
+        commands.append("--debug")
+
+    cmd = _get_dss_cmd(dss_path, request.port, request.id, commands,
+                        workspace=workspace)
+
+    try:
+        if debug:
+            proc = subprocess.Popen(cmd)
+        else:
+            with open(os.devnull, 'w') as devnull:
+                proc = subprocess.Popen(cmd, stdout=devnull, stderr=devnull)
+
+        # Server posts the port it is listening on as its result
+        server_port = request.get_result(timeout=timeout)
+    finally:
+        request.close()
+
+    try:
+        server_port = int(server_port)
+    except (TypeError, ValueError):
+        if proc.poll() is None:
+            proc.kill()
+        raise DSSError("Could not start DSS server: %s" % dss_path)
+
+    state = __load_server_state()
+    state[os.path.normpath(dss_path)] = {
+        'port': server_port,
+        'pid': proc.pid,
+        'workspace': workspace,
+    }
+    __save_server_state(state)
+
+    return server_port
+
+
+def stop_server(dss_path):
+    """Stops the DSS server running for the given dss_path.
+
+    Args:
+        dss_path (str): Path to dss.bat/.sh installation to use
+
+    Returns:
+        bool: True if a running server was stopped; False otherwise
+    """
+    state = __load_server_state()
+    server = state.get(os.path.normpath(dss_path))
+
+    if server is None:
+        return False
+
+    __remove_server_state(dss_path)
+
+    try:
+        _send_request(server['port'], [SHUTDOWN_REQUEST],
+                      timeout=SERVER_START_TIMEOUT)
+    except DSSServerUnavailable:
+        return False
+
+    return True
+
+
+def get_server(dss_path, workspace=None):
+    """Returns the port of the DSS server running for dss_path.
+
+    Args:
+        dss_path (str): Path to dss.bat/.sh installation to use
+        workspace (str, optional): workspace the server must be using
+
+    Returns:
+        int or None: port of DSS server or None if no server is running
+    """
+    state = __load_server_state()
+    server = state.get(os.path.normpath(dss_path))
+
+    if server is None:
+        return None
+
+    if workspace is not None and server['workspace'] not in (None, workspace):
+        return None
+
+    return server['port']
+
+
+def _send_request(server_port, request, timeout=None):
+    """Sends a request to a DSS server and returns the return code.
+
+    Args:
+        server_port (int): port DSS server is listening on
+        request (list): request arguments (result port and request id
+            followed by commands)
+        timeout (float): time to wait for the request to complete
+
+    Returns:
+        int: return code of request
+
+    Raises:
+        DSSServerUnavailable: raised if could not connect to DSS server
+    """
+    try:
+        conn = socket.create_connection((SERVER_HOST, server_port),
+                                        timeout=SERVER_CONNECT_TIMEOUT)
+    except socket.error:
+        raise DSSServerUnavailable("Could not connect to DSS server on port "
+                                   "%d" % server_port)
+
+    try:
+        conn.settimeout(timeout)
+        conn.sendall(_encode_request(request))
+
+        response = b""
+        while not response.endswith(b"\n"):
+            data = conn.recv(64)
+            if not data:
+                break
+            response += data
+    finally:
+        conn.close()
+
+    return _parse_response(response)
+
+
+def _encode_request(request):
+    """Returns a DSS server request as a line of JSON (bytes)"""
+    # Split args on whitespace the same way the DSS command line does
+    request_args = [a for arg in request for a in str(arg).split()]
+    request_str = json.dumps(request_args) + "\n"
+
+    return request_str.encode("utf-8")
+
+
+def _parse_response(response):
+    """Returns the return code of a DSS server response (bytes)
+
+    Raises:
+        DSSError: raised if the response is not a return code
+    """
+    try:
+        return int(response.decode("utf-8").strip())
+    except ValueError:
+        raise DSSError("Invalid response from DSS server: %s" % response)
+
+
+def __add_dss_spans(span, trace_request):
+    """Adds the phases timed by main.js (see --trace) as children of span
+
+    Args:
+        span (trace.Span): span of the DSS call
+        trace_request (ResultRequest): request the timings were posted to
+    """
+    timings = trace_request.get_result(timeout=TRACE_TIMEOUT)
+    if timings is None:
+        return
+
+    try:
+        phases = json.loads(timings)
+    except ValueError:
+        return
+
+    # main.js times phases in milliseconds
+    for phase in phases:
+        span.add_child("js." + phase['name'], phase['start'] / 1000.0,
+                       phase['duration'] / 1000.0)
+
+
+def _get_dss_cmd(dss_path, port, request_id, commands, workspace=None):
+    """Returns the command list for calling main.js with the given commands
+
+    Args:
+        dss_path (str): Path to dss.bat/.sh installation to use
+        port (int): port of result channel
+        request_id (int): id the result is posted with
+        commands (list): list of string commands to pass to main.js
+        workspace (str): workspace name
+
+    Returns:
+        list: command list to pass to subprocess
+    """
     main_js = os.path.abspath(os.path.dirname(
         __file__) + "/../" + MAIN_JS_PATH)
     if not os.path.isfile(main_js):
@@ -112,23 +447,50 @@ def call_dss(dss_path, commands, workspace=None, timeout=CMD_DEFAULT_TIMEOUT):
     cmd.extend(DSS_ARGS)
 
     # Create list of args for js script
-    script_args = [main_js, cwd, str(port)]
+    script_args = [main_js, cwd, str(port), str(request_id)]
     script_args.extend(commands)
     # Convert list to one string (necessary for rhino exec)
     script_args = map(str, script_args)
     script_args_str = " ".join(script_args)
 
     cmd.append(script_args_str)
+
+    return cmd
+
+
+def __get_server_state_path():
+    """Returns full path to the file keeping track of running DSS servers"""
+    return os.path.join(config.get_base_dir(), SERVER_STATE_FILE)
+
+
+def __load_server_state():
+    """Returns dict of running DSS servers keyed by dss_path"""
+    state_path = __get_server_state_path()
+
+    if not os.path.isfile(state_path):
+        return dict()
+
     try:
-        retcode = subprocess.call(cmd)
-    except Exception as e:
-        print(e)
-        return (False, "Command Failed")
+        with open(state_path) as f:
+            return json.load(f)
+    except ValueError:
+        return dict()
 
-    # Wait on result to be populated
-    result = result_server.get_result(timeout=timeout)
 
-    return (retcode == 0, result)
+def __save_server_state(state):
+    """Saves dict of running DSS servers keyed by dss_path"""
+    config.init_config_dirs()
+
+    with open(__get_server_state_path(), 'w') as f:
+        json.dump(state, f)
+
+
+def __remove_server_state(dss_path):
+    """Removes the DSS server entry for dss_path"""
+    state = __load_server_state()
+
+    if state.pop(os.path.normpath(dss_path), None) is not None:
+        __save_server_state(state)
 
 
 def format_args(args):
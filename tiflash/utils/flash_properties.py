@@ -11,7 +11,8 @@ flash_properties.py    --   helper module for gathering device specific
 
 import os
 import re
-from xml.dom import minidom
+import copy
+import threading
 
 from tiflash.utils import xmlhelper
 
@@ -22,12 +23,82 @@ PROPERTIESDB_XML = "PropertiesDB.xml"
 FLASH_PROPERTIES_TRANSLATOR = "FlashPropertiesTranslator.xml"
 FLASH_PROPERTIES_TAG = "_FlashProperties"
 
+#   Tags of elements that make a property not a settable option
+HIDDEN_PROPERTY_TAGS = ('hidden', 'action')
+
+# Parsed files: full path: ((mtime, size), parsed data)
+__schemas = dict()
+__translators = dict()
+__cache_lock = threading.Lock()
+
 
 class FlashPropertiesError(Exception):
     """Generic FlashProperties Error"""
     pass
 
 
+class _Translator(object):
+    """Compiled FlashPropertiesTranslator.xml
+
+    Partnum patterns are compiled once and tried in translator order (the
+    first property file with a matching pattern wins); the result of each
+    devicetype is kept.
+    """
+
+    def __init__(self, translator_xml):
+        self.entries = list()    # (property file name, compiled pattern)
+        self.results = dict()    # devicetype: property file name
+
+        root = xmlhelper.get_xml_root(translator_xml)
+        for pf in root.iter('FlashProperties'):
+            # only take elements that have attributes
+            if len(pf.attrib) == 0:
+                continue
+
+            for pn in pf.iter('partnum'):
+                if 'regex' in pn.attrib.keys():
+                    part_pattern = pn.attrib['regex']
+                else:
+                    # Prepare for regex
+                    beginsWithPattern = pn.attrib['beginsWith'].replace('*',
+                                                                        '.')
+                    part_pattern = "^" + beginsWithPattern
+                self.entries.append((pf.attrib['name'],
+                                     re.compile(part_pattern)))
+
+    def translate(self, devicetype):
+        """Returns name of property file for devicetype (None if no match)"""
+        if devicetype not in self.results.keys():
+            self.results[devicetype] = self.__match(devicetype)
+
+        return self.results[devicetype]
+
+    def __match(self, devicetype):
+        for name, regex in self.entries:
+            if regex.search(devicetype):
+                return name
+
+        return None
+
+
+def __get_cached(cache, xml_path, parse):
+    """Returns parse(xml_path), parsing again only if the file changed"""
+    stat = os.stat(xml_path)
+    version = (stat.st_mtime, stat.st_size)
+
+    with __cache_lock:
+        cached = cache.get(xml_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    parsed = parse(xml_path)
+
+    with __cache_lock:
+        cache[xml_path] = (version, parsed)
+
+    return parsed
+
+
 def __translate_to_property_xml(devicetype, translator_xml):
     """Returns property xml translated by FlashPropertiesTranslator.xml
 
@@ -51,49 +122,21 @@ def __translate_to_property_xml(devicetype, translator_xml):
         raise FlashPropertiesError("Could not find 'translator' file: %s" %
                                    translator_xml)
 
-    xmldoc = minidom.parse(translator_xml)
-
-    property_files = xmldoc.getElementsByTagName('FlashProperties')
-
-    # Loop through device types in translator to find correct property file
-    for pf in property_files:
-        # only take elements that have attributes
-        if pf.attributes is None or len(pf.attributes) == 0:
-            continue
-
-        property_file_name = pf.attributes['name'].value
-        partnums = pf.getElementsByTagName('partnum')
-
-        for pn in partnums:
-            part_regex = None
-            part_pattern = None
-            try:
-                part_pattern = pn.attributes['regex'].value
-            except Exception:
-                beginsWith = pn.attributes['beginsWith'].value
-
-                # Prepare for regex
-                beginsWithPattern = beginsWith.replace('*', '.')
-                part_pattern = "^" + beginsWithPattern
-
-            part_regex = re.compile(part_pattern)
-
-            if part_regex.search(devicetype):
-                prop_file = property_file_name
-                break
-
-        #   Check if we found the property file
-        if prop_file is not None:
-            properties_directory = os.path.dirname(translator_xml)
-            if not os.path.isdir(properties_directory):
-                raise FlashPropertiesError(
-                    "Could not find 'properties' directory.")
-            prop_file = properties_directory + "/" \
-                + prop_file + FLASH_PROPERTIES_TAG + ".xml"
-            prop_file = os.path.normpath(prop_file)
-            if not os.path.isfile(prop_file):
-                raise FlashPropertiesError("Trouble finding %s" % prop_file)
-            break
+    translator = __get_cached(__translators, os.path.abspath(translator_xml),
+                              _Translator)
+    prop_file = translator.translate(devicetype)
+
+    #   Check if we found the property file
+    if prop_file is not None:
+        properties_directory = os.path.dirname(translator_xml)
+        if not os.path.isdir(properties_directory):
+            raise FlashPropertiesError(
+                "Could not find 'properties' directory.")
+        prop_file = properties_directory + "/" \
+            + prop_file + FLASH_PROPERTIES_TAG + ".xml"
+        prop_file = os.path.normpath(prop_file)
+        if not os.path.isfile(prop_file):
+            raise FlashPropertiesError("Trouble finding %s" % prop_file)
 
     return prop_file
 
@@ -184,15 +227,15 @@ def get_property_elements(xmlfile, target=None, exclude_tags=None):
         xmlfile (str): full path to device property xml file to parse
 
     Returns:
-        list: list of property names
+        list: list of property elements (xml.Element)
 
     Raises:
         FlashPropertiesError: raises exception if xml is unable to be parsed
 
     """
-    xmldoc = minidom.parse(xmlfile)
+    root = xmlhelper.get_xml_root(xmlfile)
 
-    properties = xmlhelper.get_elements_by(xmldoc, tag='property')
+    properties = list(root.iter('property'))
 
     if len(properties) < 1:
         raise FlashPropertiesError("Error parsing properties xml: %s"
@@ -200,19 +243,18 @@ def get_property_elements(xmlfile, target=None, exclude_tags=None):
 
     property_elements = []
     for p in properties:
-        children = xmlhelper.get_elements_by(p, tag='*')
+        children = list(p.iter())[1:]   # all descendants
         if len(children) != 0:
             for c in children:
-                if c.tagName == 'hidden' or c.tagName == 'action':
+                if c.tag in HIDDEN_PROPERTY_TAGS:
                     break
             else:
                 property_elements.append(p)
 
     if target is not None:
         def get_target_name(e):
-            target_element = xmlhelper.get_unique_element_by(e, tag='target')
-            target_name = xmlhelper.get_text_from_element(target_element)
-            return target_name
+            target_element = e.find('.//target')
+            return __get_text(target_element)
 
         property_elements = [ p for p in property_elements if get_target_name(p) == target ]
 
@@ -230,24 +272,95 @@ def parse_property_element(element):
         dict: dictionary of parsed element info
     """
     property_values = dict()
-    property_id = xmlhelper.get_attribute_value(element, 'id')
+    property_id = element.attrib.get('id')
 
-    type_element = xmlhelper.get_unique_element_by(element, tag='valueType')
+    type_element = element.find('.//valueType')
     if type_element is None:
         raise FlashPropertiesError("Invalid Property Element")
 
-    property_values['type'] = xmlhelper.get_text_from_element(type_element)
+    property_values['type'] = __get_text(type_element)
 
     if property_values['type'] == 'ChoiceList':
-        vals_element = xmlhelper.get_unique_element_by(element, tag='values')
-        val_elements = xmlhelper.get_elements_by(vals_element, tag='value')
-        property_values['choices'] = [xmlhelper.get_text_from_element(val)
-                                      for val in val_elements]
+        vals_element = element.find('.//values')
+        val_elements = vals_element.iter('value') \
+            if vals_element is not None else []
+        property_values['choices'] = [__get_text(val) for val in val_elements]
 
-    default_element = xmlhelper.get_unique_element_by(element,
-                                                      tag='defaultValue')
+    default_element = element.find('.//defaultValue')
     if default_element is not None:
-        property_values['default'] = xmlhelper.get_text_from_element(
-            default_element)
+        property_values['default'] = __get_text(default_element)
 
     return {property_id: property_values}
+
+
+def get_option_schema(xmlfile):
+    """Returns the option schema of a properties xml file
+
+    The file is parsed once; the schema is cached until the file changes.
+
+    Args:
+        xmlfile (str): full path to property xml file to parse
+
+    Returns:
+        list: option records (shared; do not modify) of the format
+            {'id': str, 'target': str, 'type': str, 'choices': list,
+             'default': str} ('choices' and 'default' only if the property
+             has them)
+
+    Raises:
+        FlashPropertiesError: raises exception if xml is unable to be parsed
+    """
+    return __get_cached(__schemas, os.path.abspath(xmlfile),
+                        __parse_option_schema)
+
+
+def get_options(xmlfile, target=None):
+    """Returns the options (settable properties) of a properties xml file
+
+    Args:
+        xmlfile (str): full path to property xml file to parse
+        target (str, optional): only return options of this target (i.e.
+            "generic")
+
+    Returns:
+        dict: {option id: {'type': str, 'choices': list, 'default': str}}
+
+    Raises:
+        FlashPropertiesError: raises exception if xml is unable to be parsed
+    """
+    options = dict()
+    for record in get_option_schema(xmlfile):
+        if target is not None and record['target'] != target:
+            continue
+
+        values = dict((k, copy.copy(v)) for k, v in record.items()
+                      if k not in ('id', 'target'))
+        options[record['id']] = values
+
+    return options
+
+
+def __parse_option_schema(xmlfile):
+    """Returns list of option records parsed from properties xml file"""
+    schema = list()
+    for element in get_property_elements(xmlfile):
+        try:
+            record = parse_property_element(element)
+        except FlashPropertiesError:    # not an option
+            continue
+
+        property_id, record = list(record.items())[0]
+        record['id'] = property_id
+        record['target'] = __get_text(element.find('.//target'))
+        schema.append(record)
+
+    return schema
+
+
+def __get_text(element):
+    """Returns the text of an element ('' if element is None or has no
+    text)"""
+    if element is None or element.text is None:
+        return ''
+
+    return element.text
@@ -0,0 +1,260 @@
+"""
+helper module for remembering what was last flashed to each board
+
+Flashing an image is skipped (see TIFlash.flash 'skip_if_same') when the
+board's recorded fingerprint matches the fingerprint of the image about to
+be flashed. The fingerprint is a hash of the image's content, its loadable
+regions and how it is flashed (binary, address, options).
+
+The state is kept in ~/.tiflash/flash_state.json and keyed by board (serial
+number and chip). Anything that changes a board's flash (erase, memory
+writes, flashing without skip_if_same) must forget or re-record the board.
+
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from tiflash import image as timage
+from tiflash.utils import config
+
+FLASH_STATE_FILE = "flash_state.json"
+CHECK_BYTES = 64    # bytes read back from the board to confirm an image
+
+
+class FlashStateError(Exception):
+    """Generic Flash State Error"""
+    pass
+
+
+class FlashStateStore(object):
+    """Store of the fingerprint last flashed to each board.
+
+    Each board is recorded as:
+        {'fingerprint': str, 'image': str, 'time': float}
+    """
+
+    def __init__(self, path=None):
+        """Initializes the store
+
+        Args:
+            path (str, optional): file to keep the state in (default is
+                ~/.tiflash/flash_state.json)
+        """
+        self.path = path or os.path.join(config.get_base_dir(),
+                                         FLASH_STATE_FILE)
+        self._lock = threading.Lock()
+
+    def get(self, board):
+        """Returns the record of what was last flashed to a board
+
+        Args:
+            board (str): board key (see get_board_key)
+
+        Returns:
+            dict or None: record of board or None if nothing is recorded
+        """
+        return self.__load().get(board)
+
+    def record(self, board, fingerprint, image):
+        """Records the fingerprint of an image flashed to a board
+
+        Args:
+            board (str): board key (see get_board_key)
+            fingerprint (str): fingerprint of flashed image
+                (see get_fingerprint)
+            image (str): path to flashed image
+        """
+        with self._lock:
+            state = self.__load()
+            state[board] = {'fingerprint': fingerprint,
+                            'image': os.path.abspath(image),
+                            'time': time.time()}
+            self.__save(state)
+
+    def forget(self, board):
+        """Forgets what was flashed to a board (i.e. its flash changed)
+
+        Args:
+            board (str): board key (see get_board_key)
+        """
+        with self._lock:
+            state = self.__load()
+            if state.pop(board, None) is not None:
+                self.__save(state)
+
+    def __load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def __save(self, state):
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise FlashStateError("Could not save flash state: %s" % e)
+
+
+__store = None
+__store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the flash state store (shared by all callers in this process)
+
+    Returns:
+        FlashStateStore: flash state store
+    """
+    global __store
+
+    with __store_lock:
+        if __store is None:
+            __store = FlashStateStore()
+
+    return __store
+
+
+def get_board_key(serno, chip=None, ccxml_path=None):
+    """Returns the key a board is recorded under
+
+    Boards are identified by serial number; boards without one (i.e. devices
+    not using serial numbers) by their ccxml file.
+
+    Args:
+        serno (str): serial number of board (may be None)
+        chip (str, optional): chip/cpu flashed
+        ccxml_path (str, optional): ccxml of board (used if serno is None)
+
+    Returns:
+        str: board key
+    """
+    if serno:
+        board = "serno:%s" % serno
+    elif ccxml_path:
+        board = "ccxml:%s" % os.path.normpath(os.path.abspath(ccxml_path))
+    else:
+        raise FlashStateError("Board needs a serial number or ccxml")
+
+    if chip:
+        board += "::%s" % chip
+
+    return board
+
+
+def get_regions(image, binary=False, address=None):
+    """Returns the memory regions an image loads
+
+    Regions are known for the formats tiflash.image can parse (binary, ELF,
+    Intel HEX and TI-TXT); other formats (i.e. COFF) return an empty list.
+
+    Args:
+        image (str): path to image
+        binary (bool): image is a binary image
+        address (int, optional): address a binary image is loaded at
+
+    Returns:
+        list: (address, size) of each loadable region
+    """
+    try:
+        with timage.load(image, binary=binary, address=address) as img:
+            return img.segments()
+    except timage.ImageError:
+        return list()
+
+
+def get_fingerprint(image, binary=False, address=None, options=None):
+    """Returns the fingerprint of flashing an image
+
+    Args:
+        image (str): path to image
+        binary (bool): image is flashed as binary
+        address (int, optional): address a binary image is flashed at
+        options (dict, optional): options set before flashing
+
+    Returns:
+        str: hex digest identifying the image and how it is flashed
+    """
+    fingerprint = hashlib.sha256()
+
+    with open(image, 'rb') as f:
+        for chunk in iter(lambda: f.read(0x10000), b""):
+            fingerprint.update(chunk)
+
+    regions = get_regions(image, binary=binary, address=address)
+    flash_args = {
+        'binary': bool(binary),
+        'address': str(address) if address else None,
+        'options': sorted((str(k), str(v))
+                          for k, v in (options or dict()).items()),
+        'regions': regions,
+    }
+    fingerprint.update(json.dumps(flash_args, sort_keys=True).encode("utf-8"))
+
+    return fingerprint.hexdigest()
+
+
+def get_images_fingerprint(images, options=None):
+    """Returns the fingerprint of flashing several images in one multiload
+    session (same as get_fingerprint for a single image)
+
+    Args:
+        images (list): (path, binary, address) of each image in load order
+        options (dict, optional): options set before flashing
+
+    Returns:
+        str: hex digest identifying the images and how they are flashed
+    """
+    if len(images) == 1:
+        (image, binary, address) = images[0]
+        return get_fingerprint(image, binary=binary, address=address,
+                               options=options)
+
+    fingerprint = hashlib.sha256()
+    for image, binary, address in images:
+        fingerprint.update(get_fingerprint(image, binary=binary,
+                                           address=address,
+                                           options=options).encode("utf-8"))
+
+    return fingerprint.hexdigest()
+
+
+def get_check_region(image, binary=False, address=None, size=CHECK_BYTES):
+    """Returns the address and bytes of a small region of the image that can
+    be read back from a board to confirm it holds the image
+
+    Args:
+        image (str): path to image
+        binary (bool): image is flashed as binary
+        address (int, optional): address a binary image is flashed at
+        size (int): max number of bytes in region
+
+    Returns:
+        (int, bytes) or None: address and expected bytes of region; None if
+        the image's regions are not known
+    """
+    try:
+        with timage.load(image, binary=binary, address=address) as img:
+            for i in range(len(img)):
+                if img.sizes[i] > 0:
+                    region_size = min(size, img.sizes[i])
+                    return (img.addresses[i],
+                            bytes(img.read(img.addresses[i], region_size)))
+    except timage.ImageError:
+        pass
+
+    return None
@@ -2,6 +2,15 @@
 Module for creating a socket for js/main.js script to post
 command results to (used for IPC)
 
+Each process has one result channel: a local socket listening on an OS
+assigned port. Every command gets a request id and posts its result to the
+channel as a frame of the format:
+
+    [uint32 payload length][uint32 request id][payload (utf-8)]
+
+(big endian; see js/result.js). The request id lets any number of commands
+that are in flight at the same time share the channel.
+
 
 Author: Cameron Webb
 Date: March 2018
@@ -9,139 +18,197 @@ Contact: webbjcam@gmail.com
 
 """
 
+import os
 import socket
+import struct
 import threading
-from sys import version_info as pyversion
 
 HOST = "localhost"
-PORT = 19876    # Port to open socket on
-MAX_PORTS = 24   # Determines number of tiflash processes can run simultaneously
-MAX_CLIENTS = 1
-if pyversion[0] == 2:
-    SOCK_TIMEOUT = None   # timeouts don't seem to work for py2
-else:
-    SOCK_TIMEOUT = 120   # timeout to wait for result #increased from 60 for CCS12 compatibility
+BACKLOG = 16        # number of pending connections to the channel
+FRAME_HEADER = struct.Struct(">II")   # (payload length, request id)
 
 
-class ResultServerError(Exception):
-    """Generic Error for Result Server"""
+class ResultChannelError(Exception):
+    """Generic Error for Result Channel"""
     pass
 
 
-class ResultServer(object):
-    """ Class for receiving a result over a local socket
-        from js/main.js subprocess.
+class ResultRequest(object):
+    """ Class for receiving the result of a single command posted to the
+    ResultChannel.
 
-    Creates local socket for the js/main.js subprocess to post the result of
-    a command to.
-
-    Args:
-        port (int): port to create socket on
+    Requests are created with ResultChannel.open_request() and must be
+    closed (close()) once the result was received.
 
+    A request with a callback receives any number of results (i.e. progress
+    updates); each result is passed to the callback as it is posted.
     """
 
-    def __init__(self, host=HOST, port=PORT, debug=False):
-        """ Initializes and starts the ResultServer
+    def __init__(self, channel, request_id, callback=None):
+        """ Initializes the ResultRequest
 
         Args:
-            host (str): host to open socket; should ALWAYS be 'localhost'
-            port (int): port to open socket on;
-            debug (bool): choose to include debug messages
+            channel (ResultChannel): channel the result is posted to
+            request_id (int): id of request
+            callback (callable, optional): function called with each result
+                posted (called from the channel's thread)
 
         """
-        self.host = host
-        self.port = port
-        self.debug = debug
+        self.channel = channel
+        self.id = request_id
+        self.port = channel.port
+        self.callback = callback
 
         self.result = None
-        self.server_thread = None
-        # Server Running Event (set only when server is running)
-        self.running = threading.Event()
+        # Result Received Event (set once result is posted)
+        self.received = threading.Event()
 
-    def __del__(self):
-        # Notify server to stop running
-        self.running.clear()
+    def get_result(self, timeout=None):
+        """ Gets the result posted for this request. Blocks until result is
+            posted, unless a timeout is given.
 
-    def start(self):
-        """Starts the Result Server"""
-        self.server_thread = threading.Thread(
-            target=self._start_server, args=(self.debug,))
-        self.server_thread.start()
+        Args:
+            timeout (int): time to wait for result to be posted to socket.
+                If 'None' will block/wait forever. If '0' will not block.
+
+        Returns:
+            str: result posted or None if no result was posted in time
 
-        # Wait for server running event
-        if not self.running.wait(timeout=0.5):  # timeout=0 feels to risky
-            raise ResultServerError("Result Server failed to start")
+        """
+        if not self.received.wait(timeout=timeout):
+            return None
 
-        return self.port
+        return self.result
 
-    def get_result(self, timeout=None):
-        """ Gets the result posted to the socket. Blocks until result is posted
-            to socket, unless a timeout is given.
+    def close(self):
+        """Stops listening for the result of this request"""
+        self.channel._close_request(self.id)
+
+    def _post(self, payload):
+        self.result = payload.decode("utf-8")
+        if self.callback is not None:
+            self.callback(self.result)
+        self.received.set()
+
+
+class ResultChannel(object):
+    """ Class for receiving results over a local socket from js/main.js
+        subprocesses (and DSS servers).
+
+    Listens on an OS assigned port; results are dispatched to the open
+    ResultRequest with the matching request id.
+    """
+
+    def __init__(self, host=HOST):
+        """ Initializes and starts the ResultChannel
 
         Args:
-            timeout (int): time to wait for result to be posted to socket.
-                If 'None' will block/wait forever. If '0' will not block.
+            host (str): host to open socket; should ALWAYS be 'localhost'
+
+        Raises:
+            ResultChannelError: raised if channel socket could not be opened
 
         """
-        if self.server_thread.is_alive() is True:
-            self.server_thread.join(timeout=timeout)
+        self.host = host
+        self.pid = os.getpid()
+
+        self._requests = dict()
+        self._next_id = 1
+        self._lock = threading.Lock()
 
-            # Thread should only be alive if timeout was exceeded
-            if self.server_thread.is_alive is True:
-                return None
+        try:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.bind((self.host, 0))
+            self._sock.listen(BACKLOG)
+        except socket.error as e:
+            raise ResultChannelError("Could not open result channel: %s" % e)
 
-        if type(self.result) == str:
-            return self.result.strip()
-        else:
-            return self.result
+        self.port = self._sock.getsockname()[1]
 
-    def _start_server(self, debug):
-        """ Creates the socket for the result to be posted to.
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
 
+    def open_request(self, callback=None):
+        """Returns a new ResultRequest to receive a result on
+
+        Args:
+            callback (callable, optional): function called with each result
+                posted to the request
+
+        Returns:
+            ResultRequest: request with a unique id
         """
-        result = ""
-        if debug:
-            print("Starting server...")
-        # with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:   #Py3
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        with self._lock:
+            request = ResultRequest(self, self._next_id, callback=callback)
+            self._requests[request.id] = request
+            # ids are written by java as a (signed) int
+            self._next_id = (self._next_id % 0x7FFFFFFF) + 1
 
-        s.settimeout(SOCK_TIMEOUT)
+        return request
 
-        # Try up to MAX_PORTS different ports
-        for i in range(MAX_PORTS):
-            try:
-                s.bind((self.host, self.port + i))
-                self.port = self.port + i
-                break
-            except Exception:
-                continue
-        else:
-            raise ResultServerError("""Too many result sockets in use. (At
-                least %d)""" % MAX_PORTS)
-
-        # Set/Fire server running event
-        self.running.set()
-
-        s.listen(MAX_CLIENTS)
-        conn, addr = s.accept()
-        # with conn: #Py3
-        if debug:
-            print("Connected by", addr)
-
-        # Run until server running event is cleared
-        while self.running.is_set():
+    def _close_request(self, request_id):
+        with self._lock:
+            self._requests.pop(request_id, None)
+
+    def _serve(self):
+        """Accepts connections for as long as the process runs"""
+        while True:
             try:
-                data = conn.recv(1024)
-            except socket.timeout:
-                result = None
+                conn, addr = self._sock.accept()
+            except socket.error:
                 break
-            if not data:
-                break
-            result += data.decode("utf-8").strip()
 
-        if debug:
-            print("Received: %s from %s" % (result, addr))
+            client_thread = threading.Thread(target=self._handle_client,
+                                             args=(conn,))
+            client_thread.daemon = True
+            client_thread.start()
+
+    def _handle_client(self, conn):
+        """Reads frames until the client closes the connection"""
+        reader = conn.makefile('rb')
+        try:
+            while True:
+                header = reader.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+
+                length, request_id = FRAME_HEADER.unpack(header)
+                payload = reader.read(length)
+                if len(payload) < length:
+                    break
+
+                with self._lock:
+                    request = self._requests.get(request_id)
+
+                # Results of closed (timed out) requests are dropped
+                if request is not None:
+                    try:
+                        request._post(payload)
+                    except Exception:
+                        pass    # Errors in callbacks are not ours to handle
+        except socket.error:
+            pass
+        finally:
+            reader.close()
+            conn.close()
+
+
+__channel = None
+__channel_lock = threading.Lock()
+
+
+def get_channel():
+    """Returns the result channel of this process (created on first use)
+
+    Returns:
+        ResultChannel: result channel of this process
+    """
+    global __channel
 
-        self.result = result
+    with __channel_lock:
+        # A forked process needs its own channel
+        if __channel is None or __channel.pid != os.getpid():
+            __channel = ResultChannel()
 
-        s.close()
+    return __channel
@@ -0,0 +1,341 @@
+"""
+helper module for indexing the TargetDB (devices, connections and cpus xmls)
+
+Finding a devicetype, connection or cpu by name means parsing every xml in
+its TargetDB directory. The index parses each xml once and maps the names to
+their xml files. The index is kept in memory and saved under
+~/.tiflash/cache, so it survives between runs. An xml is only parsed again
+when its mtime or size changed. The xmls are checked when the directory
+changed (xml added or removed), or at most once every
+INDEX_REVALIDATE_INTERVAL seconds otherwise (xmls edited in place).
+
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from tiflash.utils import xmlhelper
+from tiflash.utils import config
+
+INDEX_VERSION = 2
+INDEX_FILE_PREFIX = "targetdb_"
+INDEX_REVALIDATE_INTERVAL = 1.0     # seconds a scanned directory is trusted
+
+# TargetDB directory: (root tag of xmls, ordered attribs to get name from)
+INDEX_KINDS = {
+    'devices': ('device', ["desc", "partnum", "id"]),
+    'connections': ('connection', ["desc", "id"]),
+    'cpus': ('cpu', ["desc", "id"]),
+}
+
+
+class TargetDBIndexError(Exception):
+    """Generic TargetDB Index Error"""
+    pass
+
+
+class TargetDBIndex(object):
+    """Index of the TargetDB of a CCS installation.
+
+    Each xml file is recorded as:
+        {'mtime': float, 'size': int, 'name': str, 'attrib': dict,
+         'skipped': str}
+    where 'name' is None for files that are not valid xmls of the kind and
+    'skipped' is the reason the file was skipped (None for valid xmls).
+    Device records also contain the name of the device's 'cpu'.
+
+    Xmls are parsed one after another in the calling thread; only the root
+    element (and first cpu of devices) is read, so even a first scan of a new
+    installation is cheap.
+    """
+
+    def __init__(self, ccs_path, cache_dir=None,
+                 revalidate_interval=INDEX_REVALIDATE_INTERVAL):
+        """Initializes the index, loading the saved index if one exists.
+
+        Args:
+            ccs_path (str): full path to ccs installation to index
+            cache_dir (str, optional): directory to save the index in
+                (default is the .tiflash/cache folder)
+            revalidate_interval (float, optional): seconds a scanned
+                directory is trusted before its xmls are checked again
+        """
+        self.ccs_path = os.path.abspath(ccs_path)
+        self.cache_dir = cache_dir or config.get_cache_dir()
+        self.revalidate_interval = revalidate_interval
+
+        self._lock = threading.Lock()
+        self._kinds = dict()        # kind: {'files': {xml name: record}}
+        self._names = dict()        # kind: {name: xml path}
+        self._checked = dict()      # kind: (time, dir mtime) of last scan
+
+        self.__load()
+
+    def get_names(self, kind):
+        """Returns the names of all valid xmls of 'kind'
+
+        Args:
+            kind (str): 'devices', 'connections' or 'cpus'
+
+        Returns:
+            list: names (ordered by xml file name)
+        """
+        self.__refresh(kind)
+        files = self._kinds[kind]['files']
+
+        return [files[f]['name'] for f in sorted(files.keys())
+                if files[f]['name'] is not None]
+
+    def get_xml(self, kind, name):
+        """Returns full path to the xml of 'kind' with the given name
+
+        Args:
+            kind (str): 'devices', 'connections' or 'cpus'
+            name (str): name to look up (i.e. devicetype)
+
+        Returns:
+            str or None: full path to xml or None if no xml has that name
+        """
+        self.__refresh(kind)
+
+        return self._names[kind].get(name)
+
+    def get_skipped(self, kind):
+        """Returns the xmls of 'kind' that were skipped and why
+
+        Args:
+            kind (str): 'devices', 'connections' or 'cpus'
+
+        Returns:
+            dict: {xml file name: reason xml was skipped}
+        """
+        self.__refresh(kind)
+        files = self._kinds[kind]['files']
+
+        return dict((f, files[f]['skipped']) for f in files.keys()
+                    if files[f]['name'] is None)
+
+    def get_record(self, kind, xml_path):
+        """Returns the index record of an xml file
+
+        Args:
+            kind (str): 'devices', 'connections' or 'cpus'
+            xml_path (str): full path to xml file
+
+        Returns:
+            dict or None: record of xml file or None if not indexed
+        """
+        self.__refresh(kind)
+
+        if os.path.normpath(os.path.dirname(xml_path)) != self.__get_dir(kind):
+            return None
+
+        return self._kinds[kind]['files'].get(os.path.basename(xml_path))
+
+    def __refresh(self, kind):
+        """Rescans the directory of 'kind' if it changed since last scan or
+        was scanned more than 'revalidate_interval' seconds ago (xmls edited
+        in place do not change the directory mtime)"""
+        if kind not in INDEX_KINDS.keys():
+            raise TargetDBIndexError("Unknown TargetDB directory: %s" % kind)
+
+        directory = self.__get_dir(kind)
+        try:
+            dir_mtime = os.stat(directory).st_mtime
+        except OSError:
+            dir_mtime = None
+
+        if self.__is_fresh(kind, dir_mtime):
+            return
+
+        with self._lock:
+            if self.__is_fresh(kind, dir_mtime):
+                return
+
+            changed = self.__scan(kind, directory)
+            self._checked[kind] = (time.time(), dir_mtime)
+
+            if changed:
+                self.__save()
+
+    def __is_fresh(self, kind, dir_mtime):
+        if kind not in self._checked.keys():
+            return False
+
+        (checked, checked_mtime) = self._checked[kind]
+        return checked_mtime == dir_mtime and \
+            time.time() - checked < self.revalidate_interval
+
+    def __scan(self, kind, directory):
+        """Checks every xml in directory by mtime and size; parses only new
+        or changed xmls. Returns True if the index changed."""
+        old_files = self._kinds.get(kind, dict()).get('files', dict())
+        files = dict()
+        changed = False
+
+        try:
+            xml_names = [f for f in os.listdir(directory) if f.endswith('.xml')]
+        except OSError:
+            xml_names = list()
+
+        to_parse = list()
+        for xml_name in sorted(xml_names):
+            try:
+                stat = os.stat(os.path.join(directory, xml_name))
+            except OSError:
+                continue
+
+            record = old_files.get(xml_name)
+            if record is None or record['mtime'] != stat.st_mtime or \
+                    record['size'] != stat.st_size:
+                to_parse.append((xml_name, stat))
+            else:
+                files[xml_name] = record
+
+        parsed = [_parse_xml(kind, os.path.join(directory, xml_name))
+                  for xml_name, stat in to_parse]
+
+        for (xml_name, stat), record in zip(to_parse, parsed):
+            record['mtime'] = stat.st_mtime
+            record['size'] = stat.st_size
+            files[xml_name] = record
+            changed = True
+
+        if set(files.keys()) != set(old_files.keys()):
+            changed = True
+
+        self._kinds[kind] = {'files': files}
+        self.__update_names(kind)
+
+        return changed
+
+    def __update_names(self, kind):
+        """Rebuilds name -> xml path map (first xml by file name wins)"""
+        directory = self.__get_dir(kind)
+        files = self._kinds[kind]['files']
+        names = dict()
+
+        for xml_name in sorted(files.keys(), reverse=True):
+            if files[xml_name]['name'] is not None:
+                names[files[xml_name]['name']] = os.path.normpath(
+                    os.path.join(directory, xml_name))
+
+        self._names[kind] = names
+
+    def __get_dir(self, kind):
+        return os.path.normpath(self.ccs_path + "/" + xmlhelper.TARGETDB_DIR +
+                                "/" + kind)
+
+    def __get_index_path(self):
+        ccs_hash = hashlib.sha1(self.ccs_path.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir,
+                            "%s%s.json" % (INDEX_FILE_PREFIX, ccs_hash[:16]))
+
+    def __load(self):
+        """Loads saved index (records are still checked on first lookup)"""
+        try:
+            with open(self.__get_index_path(), 'r') as f:
+                saved = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+
+        if saved.get('version') != INDEX_VERSION or \
+                saved.get('ccs_path') != self.ccs_path:
+            return
+
+        for kind in INDEX_KINDS.keys():
+            if kind in saved['kinds'].keys():
+                self._kinds[kind] = {'files': saved['kinds'][kind]}
+
+    def __save(self):
+        """Saves index; failing to save only costs parsing next time"""
+        saved = {
+            'version': INDEX_VERSION,
+            'ccs_path': self.ccs_path,
+            'kinds': dict((k, self._kinds[k]['files'])
+                          for k in self._kinds.keys()),
+        }
+        index_path = self.__get_index_path()
+        tmp_path = "%s.%d.tmp" % (index_path, os.getpid())
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(tmp_path, 'w') as f:
+                json.dump(saved, f)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            os.rename(tmp_path, index_path)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _parse_xml(kind, xml_path):
+    """Returns the index record of an xml of 'kind'"""
+    tag, name_attribs = INDEX_KINDS[kind]
+    record = {'name': None, 'attrib': dict(), 'skipped': None}
+
+    # Only parse as far as needed (root element; first cpu of devices)
+    elements = xmlhelper.iter_xml_elements(xml_path)
+    try:    # Some xmls are not valid xml files of this kind
+        root_tag, root_attrib = next(elements)
+
+        if root_tag != tag:
+            record['skipped'] = "root element is <%s> not <%s>" % (root_tag,
+                                                                   tag)
+            return record
+
+        try:
+            record['name'] = xmlhelper.get_attrib_value(root_attrib,
+                                                        name_attribs)
+        except xmlhelper.XMLHelperError:
+            record['skipped'] = "missing name attribute (%s)" % \
+                ", ".join(name_attribs)
+            return record
+
+        record['attrib'] = root_attrib
+
+        if kind == 'devices':
+            record['cpu'] = None
+            cpu_attrib = next((attrib for element_tag, attrib in elements
+                               if element_tag == "cpu"), None)
+            if cpu_attrib is not None:
+                try:
+                    record['cpu'] = xmlhelper.get_attrib_value(
+                        cpu_attrib, ["desc", "id"])
+                except xmlhelper.XMLHelperError:
+                    pass
+    except Exception as e:
+        record['name'] = None
+        record['skipped'] = "could not parse xml: %s" % e
+    finally:
+        elements.close()
+
+    return record
+
+
+__indexes = dict()
+__indexes_lock = threading.Lock()
+
+
+def get_index(ccs_path):
+    """Returns the TargetDB index of a ccs installation (shared by all
+    callers in this process)
+
+    Args:
+        ccs_path (str): full path to ccs installation
+
+    Returns:
+        TargetDBIndex: index of ccs installation's TargetDB
+    """
+    key = os.path.abspath(ccs_path)
+
+    with __indexes_lock:
+        if key not in __indexes.keys():
+            __indexes[key] = TargetDBIndex(key)
+
+    return __indexes[key]
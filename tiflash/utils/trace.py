@@ -0,0 +1,206 @@
+"""
+helper module for timing the phases of tiflash calls (spans)
+
+A span times one phase of a call (i.e. finding CCS, starting the DSS
+subprocess, waiting for the result). Spans opened while another span is open
+(in the same thread) become its children. Once a top level span finishes,
+its tree of spans is passed to every registered hook as a JSON serializable
+dict:
+
+    {'name': str, 'start': float, 'duration': float, 'attrs': dict,
+     'children': [span dicts]}
+
+where 'start' is seconds since the epoch and 'duration' is in seconds.
+
+Tracing is off unless a hook is registered; spans then cost a single check.
+
+"""
+
+import time
+import functools
+import threading
+import contextlib
+
+__hooks = list()
+__hooks_lock = threading.Lock()
+__local = threading.local()
+
+
+class TraceError(Exception):
+    """Generic Trace Error"""
+    pass
+
+
+class Span(object):
+    """Timing of one phase of a call."""
+
+    def __init__(self, name, start=None, attrs=None):
+        """Initializes the Span (started now unless start is given)
+
+        Args:
+            name (str): name of phase
+            start (float, optional): start time (seconds since the epoch)
+            attrs (dict, optional): attributes describing the phase
+        """
+        self.name = name
+        self.start = time.time() if start is None else start
+        self.duration = None
+        self.attrs = dict(attrs or dict())
+        self.children = list()
+
+    def set(self, **attrs):
+        """Sets attributes of the span (i.e. span.set(retcode=0))"""
+        self.attrs.update(attrs)
+
+    def add_child(self, name, start, duration, **attrs):
+        """Adds an already finished child span (i.e. timed by DSS)
+
+        Args:
+            name (str): name of phase
+            start (float): start time (seconds since the epoch)
+            duration (float): duration in seconds
+
+        Returns:
+            Span: child span
+        """
+        child = Span(name, start=start, attrs=attrs)
+        child.duration = duration
+        self.children.append(child)
+
+        return child
+
+    def finish(self):
+        """Sets the span's duration (if not set already)"""
+        if self.duration is None:
+            self.duration = time.time() - self.start
+
+    def to_dict(self):
+        """Returns the span (and its children) as a JSON serializable dict"""
+        return {
+            'name': self.name,
+            'start': self.start,
+            'duration': self.duration,
+            'attrs': dict(self.attrs),
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+def add_hook(callback):
+    """Registers a function to call with each finished top level span (as a
+    dict); turns tracing on.
+
+    Args:
+        callback (callable): function taking a span dict (called from the
+            thread the span finished in)
+    """
+    if not callable(callback):
+        raise TraceError("Trace hook must be callable: %s" % callback)
+
+    with __hooks_lock:
+        __hooks.append(callback)
+
+
+def remove_hook(callback):
+    """Unregisters a function added with add_hook; tracing is turned off once
+    no hooks are left.
+
+    Args:
+        callback (callable): function passed to add_hook
+
+    Returns:
+        bool: True if callback was registered; False otherwise
+    """
+    with __hooks_lock:
+        if callback not in __hooks:
+            return False
+        __hooks.remove(callback)
+
+    return True
+
+
+def is_enabled():
+    """Returns True if tracing is on (i.e. a hook is registered)"""
+    return len(__hooks) > 0
+
+
+def current_span():
+    """Returns the innermost open span of this thread
+
+    Returns:
+        Span or None: open span or None if no span is open (or tracing is
+        off)
+    """
+    stack = getattr(__local, 'stack', None)
+    if not stack:
+        return None
+
+    return stack[-1]
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Context manager timing the enclosed block as a span
+
+    Args:
+        name (str): name of phase
+        **attrs: attributes describing the phase
+
+    Yields:
+        Span or None: the open span (None if tracing is off)
+    """
+    if not __hooks:
+        yield None
+        return
+
+    stack = getattr(__local, 'stack', None)
+    if stack is None:
+        stack = __local.stack = list()
+
+    new_span = Span(name, attrs=attrs)
+    if stack:
+        stack[-1].children.append(new_span)
+    stack.append(new_span)
+
+    try:
+        yield new_span
+    except Exception as e:
+        new_span.set(error=str(e))
+        raise
+    finally:
+        new_span.finish()
+        stack.pop()
+
+        if not stack:
+            __emit(new_span)
+
+
+def traced(name=None):
+    """Decorator timing each call of the decorated function as a span
+
+    Args:
+        name (str, optional): name of span (default is the function's name)
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not __hooks:
+                return func(*args, **kwargs)
+
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def __emit(root_span):
+    """Passes a finished top level span to every hook"""
+    with __hooks_lock:
+        hooks = list(__hooks)
+
+    span_dict = root_span.to_dict()
+    for hook in hooks:
+        hook(span_dict)
@@ -0,0 +1,60 @@
+"""
+helper module for verifying device memory against an image in python
+(see TIFlash.verify 'fast')
+
+The image's address ranges are read back from the device in bulk and each
+segment of the image is compared chunk by chunk against the bytes read, so
+the first differing address of every segment is known.
+
+"""
+
+VERIFY_CHUNK_SIZE = 0x1000  # bytes compared at once
+
+
+def find_mismatch(expected, actual, chunk_size=VERIFY_CHUNK_SIZE):
+    """Returns the offset of the first byte of 'actual' that differs from
+    'expected'
+
+    Args:
+        expected (bytes): expected bytes (image)
+        actual (bytes): actual bytes (device memory); missing bytes differ
+        chunk_size (int): number of bytes compared at once
+
+    Returns:
+        int or None: offset of first differing byte; None if all bytes match
+    """
+    for offset in range(0, len(expected), chunk_size):
+        expected_chunk = bytearray(expected[offset:offset + chunk_size])
+        actual_chunk = bytearray(actual[offset:offset + chunk_size])
+        if expected_chunk == actual_chunk:
+            continue
+
+        for i in range(len(expected_chunk)):
+            if i >= len(actual_chunk) or expected_chunk[i] != actual_chunk[i]:
+                return offset + i
+
+    return None
+
+
+def format_mismatches(results):
+    """Returns the failed segments of a verify as a printable message
+
+    Args:
+        results (list): results returned by TIFlash.verify_segments()
+
+    Returns:
+        str: one line per failed segment
+    """
+    lines = list()
+
+    for result in results:
+        if result['success']:
+            continue
+
+        line = "Segment 0x%x (%d bytes) does not match" % (result['address'],
+                                                          result['size'])
+        if result['mismatch'] is not None:
+            line += " at 0x%x" % result['mismatch']
+        lines.append(line)
+
+    return "\n".join(lines)
@@ -1,5 +1,7 @@
 import os
+import threading
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
 
 TARGETDB_DIR = "/ccs_base/common/targetdb"
 PROPERTYDB_DIR = "/ccs_base/DebugServer/propertyDB"
@@ -7,6 +9,12 @@ CONNECTIONS = "/connections"
 CPUS = "/cpus"
 DEVICES = "/devices"
 
+XML_CACHE_SIZE = 32     # number of parsed xml documents kept in cache
+
+# (full path): ((mtime, size), root element); least recently used first
+__xml_cache = OrderedDict()
+__xml_cache_lock = threading.Lock()
+
 
 class XMLHelperError(Exception):
     """Generic XML Helper Error"""
@@ -104,6 +112,98 @@ def get_xml_root(xml_path):
 
     return root
 
+def get_cached_xml_root(xml_path):
+    """Gets the root element of the xml file from the document cache
+    (parses the file if not cached or if the file changed since it was
+    cached).
+
+    The returned element is shared by all callers and MUST NOT be modified;
+    use get_xml_root or get_xml_tree to get an element to modify. Code that
+    writes xml files should call invalidate_xml_cache.
+
+    Args:
+        xml_path (str): full path to xml file to parse
+
+    Returns:
+        ElementTree.Element: root element of xml doc (read-only)
+    """
+    key = os.path.abspath(xml_path)
+    try:
+        stat = os.stat(key)
+    except OSError:
+        raise XMLHelperError("Could not find xml file: %s" % xml_path)
+    version = (stat.st_mtime, stat.st_size)
+
+    with __xml_cache_lock:
+        cached = __xml_cache.pop(key, None)
+        if cached is not None and cached[0] == version:
+            __xml_cache[key] = cached   # most recently used
+            return cached[1]
+
+    root = ET.parse(key).getroot()
+
+    with __xml_cache_lock:
+        __xml_cache[key] = (version, root)
+        while len(__xml_cache) > XML_CACHE_SIZE:
+            __xml_cache.popitem(last=False)
+
+    return root
+
+
+def invalidate_xml_cache(xml_path=None):
+    """Removes an xml file from the document cache
+
+    Args:
+        xml_path (str, optional): full path to xml file to remove; removes
+            every file if not provided
+    """
+    with __xml_cache_lock:
+        if xml_path is None:
+            __xml_cache.clear()
+        else:
+            __xml_cache.pop(os.path.abspath(xml_path), None)
+
+
+def iter_xml_elements(xml_path):
+    """Yields the tag and attributes of each element in the xml file, parsing
+    only as far as the elements are consumed.
+
+    Use this instead of get_xml_root when only the first elements are needed
+    (i.e. root attributes); the rest of the file is never parsed.
+
+    Args:
+        xml_path (str): full path to xml file to parse
+
+    Yields:
+        tuple: (tag, attrib dict) of each element in document order
+    """
+    if not os.path.exists(xml_path):
+        raise XMLHelperError("Could not find xml file: %s" % xml_path)
+
+    with open(xml_path, 'rb') as xml_file:
+        for event, element in ET.iterparse(xml_file, events=('start',)):
+            yield (element.tag, dict(element.attrib))
+
+
+def get_xml_root_attrib(xml_path):
+    """Gets the tag and attributes of the root element of the xml file
+    (stops parsing after the root element's start tag).
+
+    Args:
+        xml_path (str): full path to xml file to parse
+
+    Returns:
+        tuple: (tag, attrib dict) of root element
+    """
+    elements = iter_xml_elements(xml_path)
+    try:
+        return next(elements)
+    except StopIteration:
+        raise XMLHelperError("Could not find root element: %s" % xml_path)
+    finally:
+        elements.close()
+
+
 def get_sibling(target_node, parent_node, index):
     """Returns the sibling node at the index relative to the target_node.
 